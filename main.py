@@ -18,6 +18,11 @@ import glob
 from datetime import datetime as dt
 import pandas as pd
 import json
+import threading
+import webbrowser
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
 
 from tkinter import Tk, filedialog
 
@@ -25,14 +30,29 @@ from PyQt5.QtWidgets import (
     QApplication, QLabel, QPushButton, QGridLayout, QWidget, QComboBox,
     QButtonGroup, QRadioButton, QMessageBox, QMenuBar, QLineEdit, QSpinBox,
     QHBoxLayout, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QCheckBox,
-    QProgressDialog, QHeaderView
+    QProgressDialog, QHeaderView, QActionGroup
 )
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import QEventLoop, Qt, QTimer
+from PyQt5.QtGui import QIcon, QColor
+from PyQt5.QtCore import QEventLoop, Qt, QTimer, pyqtSignal
 
-from tower_bolt_package.funcs import discover_folders, discover_xmls, find_duplicate_xmls
+from tower_bolt_package.funcs import (discover_folders, has_required_xmls,
+                                      latest_pdf_in_folder, tower_patterns, flange_patterns)
 from tower_bolt_package.flange import Flange
-from tower_bolt_package.reporting import generate_pdf, write_to_excel
+from tower_bolt_package.reporting import generate_pdf, write_to_excel, PDF_PROFILES
+from tower_bolt_package.whatif import build_cache
+from tower_bolt_package.watcher import FlangeWatcher
+from tower_bolt_package.batch import make_pool, run_flange_job, ReportPipeline, default_workers
+from tower_bolt_package.governor import ResourceLimits
+from tower_bolt_package.status import FlangeStatusIndex, outcome_of
+from tower_bolt_package.aio import AsyncFS
+from tower_bolt_package.anomaly import write_project_summary
+from tower_bolt_package.equipment import EquipmentHistory, DEVICE_FIELDS
+from tower_bolt_package.profiling import FlangeProfiler
+from tower_bolt_package.scaffold import FolderPlan, read_manifest
+from tower_bolt_package.dup_index import DuplicateIndex, identical_paths
+from tower_bolt_package.dashboard import start_dashboard, PORT as DASHBOARD_PORT
+from tower_bolt_package.analysis_store import (analysis_filename, save_analysis,
+                                               find_analysis_files, rerender)
 
 
 # ----------------------------
@@ -41,12 +61,13 @@ from tower_bolt_package.reporting import generate_pdf, write_to_excel
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-tower_patterns = [r"[a-z]{1,3}[ ]{0,1}[a-z]{0,1}[0-9]{1,3}"]
-flange_patterns = []
-
 icon_path = os.path.join("tower_bolt_package", "Vestas_Icon_BlueSky01_Service-tools_RGB.png")
 template_path = os.path.join(SCRIPT_DIR, "tower_bolt_package", "report_template.xlsx")
 
+# Flange combo box badge colors, by last outcome or folder state
+status_colors = {"Pass": "#d2f090", "Alert": "#ffe8b3", "Fail": "#f59393",
+                 "ready": "#9ecbff", "missing": "#c8c8c8"}
+
 def load_config():
     """Load configuration from tension_config.json."""
     config_path = os.path.join(SCRIPT_DIR, "tension_config.json")
@@ -68,6 +89,11 @@ def save_config(config):
         pass
 
 
+def load_criteria():
+    """Load the failure criteria from the report template."""
+    return pd.read_excel(template_path, "Failure Criteria", index_col=0, engine='openpyxl')
+
+
 def show_msg(title: str, text: str, icon=QMessageBox.Information):
     """Topmost, modal message box with clean text."""
     msg = QMessageBox()
@@ -90,12 +116,6 @@ def show_warn(title: str, text: str):
     show_msg(title, text, QMessageBox.Warning)
 
 
-def has_required_xmls(flange_path: str) -> bool:
-    """True if both XML groups exist in the flange folder."""
-    return all((discover_xmls(flange_path, "first"),
-                discover_xmls(flange_path, "second")))
-
-
 def existing_report_flags(flange_path: str, project: str, tower: str, flange: str):
     """Return booleans for PDF and XLSX presence for this flange."""
     base = f"Report-{project}_{tower}_{flange}-*"
@@ -162,13 +182,13 @@ def ask_conflict_action(project: str, tower: str, flange: str,
     return "skip"
 
 
-def latest_pdf_in_folder(folder: str, pattern: str = "Report-*.pdf"):
-    """Return path to latest PDF in a folder, or None."""
-    pdfs = list(glob.iglob(os.path.join(folder, pattern)))
-    if not pdfs:
-        return None
-    pdfs.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return pdfs[0]
+def iter_project_flanges(parent_path: str, project: str):
+    """Yield (tower, flange, flange_path) for every flange folder in a project."""
+    project_path = os.path.join(parent_path, project)
+    for tower in discover_folders(project_path, tower_patterns):
+        tower_path = os.path.join(project_path, tower)
+        for flange in discover_folders(tower_path, flange_patterns):
+            yield tower, flange, os.path.join(tower_path, flange)
 
 
 # ----------------------------
@@ -181,6 +201,8 @@ class DuplicateFinder(QWidget):
         super().__init__()
         self.parent_path = parent_path
         self.duplicate_groups = []
+        # Files and hashes of earlier scans, so a re-scan only reads changes
+        self.index = DuplicateIndex()
         self.setWindowTitle("Find Duplicate XML Files")
         self.setMinimumSize(900, 600)
         
@@ -208,6 +230,12 @@ class DuplicateFinder(QWidget):
             "- File Size Only: Files with the same size (any name)"
         )
         
+        self.checkbox_full = QCheckBox("Full rescan")
+        self.checkbox_full.setToolTip(
+            "Unchecked: Only list folders changed since the last scan\n"
+            "Checked: List every folder, e.g. after files were edited in place"
+        )
+
         self.pushb_scan = QPushButton("Scan for Duplicates")
         self.pushb_scan.setFixedWidth(150)
         
@@ -216,6 +244,7 @@ class DuplicateFinder(QWidget):
         options_layout.addWidget(self.label_criteria)
         options_layout.addWidget(self.combo_criteria)
         options_layout.addStretch()
+        options_layout.addWidget(self.checkbox_full)
         options_layout.addWidget(self.pushb_scan)
         
         # Results tree
@@ -288,7 +317,9 @@ class DuplicateFinder(QWidget):
             # Find duplicates
             search_subfolders = self.checkbox_subfolders.isChecked()
             criteria = self.combo_criteria.currentText()
-            self.duplicate_groups = find_duplicate_xmls(self.parent_path, search_subfolders, criteria)
+            self.duplicate_groups = self.index.find(self.parent_path, search_subfolders, criteria,
+                                                    full=self.checkbox_full.isChecked())
+            self.checkbox_full.setChecked(False)
             
             # Update tree
             self.populate_tree()
@@ -421,13 +452,26 @@ class DuplicateFinder(QWidget):
         if msg.exec() == QMessageBox.Yes:
             deleted_count = 0
             failed_files = []
+            deleted_files = []
             
+            # Check the content again, a file may have changed since the scan
+            identical = set()
+            for group in self.duplicate_groups:
+                if any(filepath in group for filepath in files_to_delete):
+                    identical |= identical_paths(group)
+
             for filepath in files_to_delete:
+                if filepath not in identical:
+                    failed_files.append(f"{os.path.basename(filepath)}: "
+                                        "no longer identical to another file of its group")
+                    continue
                 try:
                     os.remove(filepath)
                     deleted_count += 1
+                    deleted_files.append(filepath)
                 except Exception as e:
                     failed_files.append(f"{os.path.basename(filepath)}: {str(e)}")
+            self.index.forget(deleted_files)
             
             # Show result
             if deleted_count > 0:
@@ -497,19 +541,232 @@ class DuplicateFinder(QWidget):
         self.pushb_open_file.setEnabled(file_items_selected)
         self.pushb_open_location.setEnabled(file_items_selected)
 
+    def closeEvent(self, event):
+        """Close the duplicate index."""
+        self.index.close()
+        super().closeEvent(event)
+
+
+# ----------------------------
+# Criteria what-if window
+# ----------------------------
+
+class WhatIfWindow(QWidget):
+    """Re-apply edited failure criteria to a project without re-running reports."""
+    def __init__(self, parent_path, project, caches):
+        super().__init__()
+        self.parent_path = parent_path
+        self.project = project
+        self.caches = caches
+        self.setWindowTitle(f"Criteria What-If - {project}")
+        self.setMinimumSize(900, 600)
+
+        layout = QVBoxLayout()
+
+        # Options section
+        options_layout = QHBoxLayout()
+        self.checkbox_changed = QCheckBox("Only show changed flanges")
+        self.checkbox_changed.setChecked(True)
+        self.pushb_rebuild = QPushButton("Re-read Xml Data")
+        self.pushb_evaluate = QPushButton("Evaluate Template Criteria")
+        self.pushb_evaluate.setFixedWidth(180)
+        options_layout.addWidget(self.checkbox_changed)
+        options_layout.addStretch()
+        options_layout.addWidget(self.pushb_rebuild)
+        options_layout.addWidget(self.pushb_evaluate)
+
+        # Results tree
+        self.tree_results = QTreeWidget()
+        self.tree_results.setHeaderLabels(["Tower / Flange", "Pass", "Alert", "Fail",
+                                           "Mean Alert", "SD Alert"])
+        self.tree_results.setAlternatingRowColors(True)
+        header = self.tree_results.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        for i in range(1, 4):
+            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(4, QHeaderView.Stretch)
+        header.setSectionResizeMode(5, QHeaderView.Stretch)
+
+        self.label_info = QLabel("Edit the 'Failure Criteria' sheet of the template, "
+                                 "then click 'Evaluate Template Criteria'.")
+        self.label_info.setStyleSheet("QLabel { color: #666; padding: 5px; }")
+
+        layout.addLayout(options_layout)
+        layout.addWidget(self.tree_results)
+        layout.addWidget(self.label_info)
+        self.setLayout(layout)
+        self.setWindowIcon(QIcon(icon_path))
+
+        self.pushb_evaluate.clicked.connect(self.evaluate)
+        self.pushb_rebuild.clicked.connect(self.rebuild)
+        self.checkbox_changed.toggled.connect(self.evaluate)
+
+    def get_cache(self):
+        """Cached project data, parsed once with the current criteria as baseline."""
+        if self.project not in self.caches:
+            flanges = [(dict(project=self.project, tower=tower, flange=flange), path)
+                       for tower, flange, path in iter_project_flanges(self.parent_path, self.project)
+                       if has_required_xmls(path)]
+
+            progress = QProgressDialog("Reading Xml data...", None, 0, len(flanges), self)
+            progress.setWindowTitle("Criteria What-If")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setWindowIcon(QIcon(icon_path))
+            progress.setMinimumDuration(0)
+
+            def step(location):
+                progress.setLabelText(f"Reading: {location['tower']} / {location['flange']}")
+                progress.setValue(progress.value() + 1)
+                QApplication.processEvents()
+
+            try:
+                self.caches[self.project] = build_cache(flanges, load_criteria(), step)
+            finally:
+                progress.close()
+        return self.caches[self.project]
+
+    def rebuild(self):
+        """Drop the cached data and read the Xml files again."""
+        self.caches.pop(self.project, None)
+        self.evaluate()
+
+    def evaluate(self):
+        """Compare the template criteria to the criteria the data was read with."""
+        try:
+            cache = self.get_cache()
+            flanges, projects = cache.compare(load_criteria())
+        except Exception as e:
+            show_warn("Error", f"Error evaluating criteria:\n{str(e)}")
+            return
+
+        self.tree_results.clear()
+        only_changed = self.checkbox_changed.isChecked()
+        for _, row in flanges.iterrows():
+            if only_changed and not row["Changed"]:
+                continue
+            item = QTreeWidgetItem(self.tree_results)
+            item.setText(0, f"{row['Tower']} / {row['Flange']}")
+            for i, name in enumerate(["Pass", "Alert", "Fail"], 1):
+                before, after = row[f"{name} Before"], row[f"{name} After"]
+                item.setText(i, f"{before}" if before == after else f"{before} -> {after}")
+            for i, name in enumerate(["Mean Alert", "SD Alert"], 4):
+                before, after = row[f"{name} Before"], row[f"{name} After"]
+                item.setText(i, before if before == after else f"{before or 'None'} -> {after or 'None'}")
+
+        if projects.empty:
+            self.label_info.setText("No flanges with Xml data found in this project.")
+            return
+        total = projects.iloc[0]
+        self.label_info.setText(
+            f"{len(cache)} flanges, {int(total['Flanges Changed'])} changed.  "
+            f"Pass {total['Pass Before']} -> {total['Pass After']},  "
+            f"Alert {total['Alert Before']} -> {total['Alert After']},  "
+            f"Fail {total['Fail Before']} -> {total['Fail After']}"
+        )
+
+
+# ----------------------------
+# Equipment history window
+# ----------------------------
+
+class EquipmentWindow(QWidget):
+    """Mean rotation and SD over time per tensioner, pump and operator."""
+    def __init__(self, history):
+        super().__init__()
+        self.history = history
+        self.setWindowTitle("Equipment History")
+        self.setMinimumSize(900, 600)
+
+        layout = QVBoxLayout()
+
+        # Options section
+        options_layout = QHBoxLayout()
+        self.combo_field = QComboBox()
+        self.combo_field.addItems([field.capitalize() for field in DEVICE_FIELDS])
+        self.pushb_refresh = QPushButton("Refresh")
+        options_layout.addWidget(QLabel("Device:"))
+        options_layout.addWidget(self.combo_field)
+        options_layout.addStretch()
+        options_layout.addWidget(self.pushb_refresh)
+
+        # Devices and the rounds of the selected device
+        self.tree_devices = QTreeWidget()
+        self.tree_devices.setHeaderLabels(["Device", "Rounds", "Bolts", "First Round %",
+                                           "Second Round %", "Mean SD", "First", "Last",
+                                           "Trend per 30 Days"])
+        self.tree_devices.setAlternatingRowColors(True)
+        self.tree_devices.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tree_rounds = QTreeWidget()
+        self.tree_rounds.setHeaderLabels(["Date", "Project / Tower / Flange", "Round",
+                                          "Bolt Size", "Bolts", "Mean", "SD"])
+        self.tree_rounds.setAlternatingRowColors(True)
+        self.tree_rounds.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        self.label_info = QLabel("Rounds are recorded each time a flange is analysed. "
+                                 "Round rotations are in % of the required rotation.")
+        self.label_info.setStyleSheet("QLabel { color: #666; padding: 5px; }")
+
+        layout.addLayout(options_layout)
+        layout.addWidget(self.tree_devices)
+        layout.addWidget(self.tree_rounds)
+        layout.addWidget(self.label_info)
+        self.setLayout(layout)
+        self.setWindowIcon(QIcon(icon_path))
+
+        self.combo_field.currentIndexChanged.connect(self.show_devices)
+        self.pushb_refresh.clicked.connect(self.show_devices)
+        self.tree_devices.itemSelectionChanged.connect(self.show_rounds)
+        self.show_devices()
+
+    def field(self) -> str:
+        return self.combo_field.currentText().lower()
+
+    def show_devices(self):
+        """List the devices of the selected field."""
+        self.tree_devices.clear()
+        self.tree_rounds.clear()
+        devices = self.history.devices(self.field())
+        for _, row in devices.iterrows():
+            item = QTreeWidgetItem(self.tree_devices)
+            trend = self.history.trend(self.field(), row["Device"])
+            values = [row["Device"], row["Rounds"], row["Bolts"], row["First Round %"],
+                      row["Second Round %"], row["Mean SD"],
+                      (row["First"] or "")[:10], (row["Last"] or "")[:10],
+                      "" if trend != trend else f"{trend:+.1f} %"]
+            for i, value in enumerate(values):
+                item.setText(i, "" if value is None else str(value))
+        self.label_info.setText(f"{len(devices)} devices, {len(self.history)} rounds recorded.")
+
+    def show_rounds(self):
+        """List the rounds of the selected device."""
+        self.tree_rounds.clear()
+        items = self.tree_devices.selectedItems()
+        if not items:
+            return
+        for _, row in self.history.history(self.field(), items[0].text(0)).iterrows():
+            item = QTreeWidgetItem(self.tree_rounds)
+            values = [(row["date"] or "")[:16].replace("T", " "),
+                      f"{row['project']} / {row['tower']} / {row['flange']}",
+                      row["round"], row["bolt_size"], row["bolts"],
+                      "" if row["mean"] is None else f"{row['mean']:.1f}",
+                      "" if row["std"] is None else f"{row['std']:.1f}"]
+            for i, value in enumerate(values):
+                item.setText(i, "" if value is None else str(value))
+
 
 # ----------------------------
 # Folder builder window
 # ----------------------------
 
 class FolderBuilder(QWidget):
-    """Small tool to create a project tree."""
+    """Small tool to create project trees, typed in or from a manifest."""
     def __init__(self):
         super().__init__()
         self.run_path = SCRIPT_DIR
         self.parent_path = SCRIPT_DIR
         self.project_name = ""
         self.tower_names = []
+        self.manifest_path = ""
         self.setWindowTitle("Project Directory Builder")
         self.N_segments = 4
 
@@ -517,6 +774,10 @@ class FolderBuilder(QWidget):
         self.pushb_select_parent = QPushButton("Select the Project Folder Location")
         self.line_project_name = QLineEdit()
         self.line_tower_names = QLineEdit()
+        self.pushb_load_manifest = QPushButton("Load Manifest (CSV/JSON)")
+        self.pushb_clear_manifest = QPushButton("Clear")
+        self.label_manifest = QLabel("No manifest, the project typed above is built.")
+        self.pushb_preview = QPushButton("Preview")
         self.pushb_build_directory = QPushButton("Build Directory")
         self.spinb_segments = QSpinBox()
 
@@ -526,20 +787,29 @@ class FolderBuilder(QWidget):
         layout.addWidget(QLabel("Input Project Name"), 1, 0)
         layout.addWidget(QLabel("Input Tower Names Separated by Commas"), 2, 0)
         layout.addWidget(QLabel("Input Number of Tower Segments"), 3, 0)
+        layout.addWidget(QLabel("Or Projects, Towers and Segments from a File"), 4, 0)
 
         layout.addWidget(self.pushb_select_parent, 0, 1, 1, 2)
         layout.addWidget(self.line_project_name, 1, 1, 1, 2)
         layout.addWidget(self.line_tower_names, 2, 1, 1, 2)
         layout.addWidget(self.spinb_segments, 3, 1, 1, 2)
-        layout.addWidget(self.pushb_build_directory, 4, 0, 1, 3)
+        layout.addWidget(self.pushb_load_manifest, 4, 1)
+        layout.addWidget(self.pushb_clear_manifest, 4, 2)
+        layout.addWidget(self.label_manifest, 5, 0, 1, 3)
+        layout.addWidget(self.pushb_preview, 6, 0)
+        layout.addWidget(self.pushb_build_directory, 6, 1, 1, 2)
         self.setLayout(layout)
 
         # Spinbox rules
         self.spinb_segments.setRange(2, 10)
         self.spinb_segments.setValue(self.N_segments)
+        self.label_manifest.setStyleSheet("QLabel { color: #666; padding: 5px; }")
 
         # Wire up
         self.pushb_select_parent.clicked.connect(self.cb_pushb_select_parent)
+        self.pushb_load_manifest.clicked.connect(self.cb_pushb_load_manifest)
+        self.pushb_clear_manifest.clicked.connect(self.cb_pushb_clear_manifest)
+        self.pushb_preview.clicked.connect(self.cb_pushb_preview)
         self.pushb_build_directory.clicked.connect(self.cb_pushb_build_directory)
         self.setWindowIcon(QIcon(icon_path))
 
@@ -551,42 +821,106 @@ class FolderBuilder(QWidget):
         except Exception:
             self.parent_path = ""
 
-    def cb_pushb_build_directory(self):
-        """Create project/tower/flange folders."""
-        self.project_name = self.line_project_name.text().strip()
-        self.tower_names = [t for t in self.line_tower_names.text().replace(" ", "").split(",") if t]
-
+    def cb_pushb_load_manifest(self):
+        """Pick a CSV or JSON manifest of projects, towers and segments."""
+        try:
+            Tk().withdraw()
+            path = filedialog.askopenfilename(
+                initialdir=self.parent_path,
+                filetypes=[("Manifest", "*.csv *.json"), ("All files", "*.*")])
+        except Exception:
+            path = ""
+        if not path:
+            return
+        try:
+            entries = read_manifest(path, int(self.spinb_segments.value()))
+        except (OSError, ValueError) as e:
+            show_warn("Manifest", f"Unable to read {path}:\n{e}")
+            return
+        self.manifest_path = path
+        towers = sum(len(entry["towers"]) for entry in entries)
+        self.label_manifest.setText(f"{os.path.basename(path)}: "
+                                    f"{len({entry['project'] for entry in entries})} projects, "
+                                    f"{towers} towers.")
+
+    def cb_pushb_clear_manifest(self):
+        self.manifest_path = ""
+        self.label_manifest.setText("No manifest, the project typed above is built.")
+
+    def plan(self):
+        """
+        FolderPlan of the manifest, or of the typed project, scanned against
+        the parent folder. None with a message if the input is incomplete.
+        """
         if not self.parent_path:
             show_info("Error", "Parent folder location not selected.")
+            return None
+
+        # Towers without a segment count in the manifest get the spinbox value
+        self.N_segments = int(self.spinb_segments.value())
+        if self.manifest_path:
+            try:
+                entries = read_manifest(self.manifest_path, self.N_segments)
+            except (OSError, ValueError) as e:
+                show_warn("Manifest", f"Unable to read {self.manifest_path}:\n{e}")
+                return None
+        else:
+            self.project_name = self.line_project_name.text().strip()
+            self.tower_names = [t for t in self.line_tower_names.text().replace(" ", "").split(",") if t]
+            if not self.project_name:
+                show_info("Error", "No project name detected.")
+                return None
+            if not self.tower_names:
+                show_info("Error", "No tower names detected.")
+                return None
+            entries = [{"project": self.project_name, "towers": self.tower_names,
+                        "segments": self.N_segments}]
+
+        plan = FolderPlan(self.parent_path, entries)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            plan.scan()
+        finally:
+            QApplication.restoreOverrideCursor()
+        return plan
+
+    def cb_pushb_preview(self):
+        """Dry run: list the folders Build Directory would create."""
+        plan = self.plan()
+        if plan is not None:
+            show_info("Preview", plan.preview())
+
+    def cb_pushb_build_directory(self):
+        """Create the missing project/tower/flange folders."""
+        plan = self.plan()
+        if plan is None:
             return
-        if not self.project_name:
-            show_info("Error", "No project name detected.")
-            return
-        if not self.tower_names:
-            show_info("Error", "No tower names detected.")
+        if not plan.missing:
+            show_info("Build Directory", "All folders exist already.")
             return
 
-        project_path = os.path.join(self.parent_path, self.project_name)
-
-        # Make flange names for N segments
-        self.N_segments = int(self.spinb_segments.value())
-        flange_names = []
-        for i in range(self.N_segments):
-            seg1 = "Base" if i == 0 else f"M{i}"
-            seg2 = "Top" if i == self.N_segments - 1 else f"M{i+1}"
-            flange_names.append(f"{seg1}-{seg2}")
+        progress = QProgressDialog("Creating folders...", "Cancel", 0, len(plan.missing), self)
+        progress.setWindowTitle("Building Project Folders")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setWindowIcon(QIcon(icon_path))
+        progress.setMinimumDuration(0)
 
-        if not os.path.isdir(project_path):
-            os.mkdir(project_path)
+        def update(created, total):
+            progress.setValue(created)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
 
-        for tower_name in self.tower_names:
-            tower_path = os.path.join(project_path, tower_name)
-            if not os.path.isdir(tower_path):
-                os.mkdir(tower_path)
-            for flange_name in flange_names:
-                flange_path = os.path.join(tower_path, flange_name)
-                if not os.path.isdir(flange_path):
-                    os.mkdir(flange_path)
+        errors = plan.build(progress=update)
+        cancelled = progress.wasCanceled()
+        progress.close()
+        if errors:
+            show_warn("Build Directory",
+                      f"{len(errors)} folders could not be created:\n" +
+                      "\n".join(f"{folder}: {message}" for folder, message in errors[:20]))
+        elif cancelled:
+            show_info("Build Directory", "Cancelled, some folders were not created.")
+        else:
+            show_info("Build Directory", f"Created {len(plan.missing)} folders.")
 
 
 # ----------------------------
@@ -595,6 +929,11 @@ class FolderBuilder(QWidget):
 
 class MyWindow(QWidget):
     """Main UI and actions."""
+    # Emitted from the status index threads with a FlangeStatus
+    status_ready = pyqtSignal(object)
+    # Emitted from the watch poll thread with the location and path of a ready flange
+    watch_ready = pyqtSignal(object, str)
+
     def __init__(self):
         super().__init__()
         self.run_path = SCRIPT_DIR
@@ -605,6 +944,27 @@ class MyWindow(QWidget):
         if not self.parent_path:
             self.parent_path = SCRIPT_DIR
         self.output_location = ""
+        # Parsed bolt data per project for criteria what-if runs
+        self.whatif_caches = {}
+        # Watch mode state, see cb_menu_file_watch
+        self.watcher = None
+        self.watch_pool = None
+        self.watch_jobs = {}
+        self.watch_options = None
+        self.watch_polling = None
+        self.watch_lock = threading.Lock()
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(self.cb_watch_poll)
+        self.watch_ready.connect(self.cb_watch_ready)
+        # Results dashboard server, see cb_menu_file_dashboard
+        self.dashboard = None
+        # Flange folder states for the flange row, read in the background
+        self.status_index = FlangeStatusIndex()
+        self.status_ready.connect(self.cb_status_ready)
+        # Concurrent file access for slow synced parent folders
+        self.fs = AsyncFS()
+        # Round rotations per tensioner, pump and operator
+        self.history = EquipmentHistory()
         self.setWindowTitle("Vestas Flange Reporting Tool")
 
         # Menus
@@ -614,6 +974,40 @@ class MyWindow(QWidget):
         self.menu_file_build = menu_file.addAction("Build Project Folder Tree")
         menu_file.addSeparator()
         self.menu_file_duplicates = menu_file.addAction("Find Duplicate XML Files")
+        self.menu_file_whatif = menu_file.addAction("Criteria What-If for Project")
+        self.menu_file_watch = menu_file.addAction("Watch Parent Folder for New XMLs")
+        self.menu_file_watch.setCheckable(True)
+        self.menu_file_rerender = menu_file.addAction("Re-render Project Reports from Stored Analysis")
+        self.menu_file_rerender_failed = menu_file.addAction(
+            "Full Reports for Failed Flanges from Stored Analysis")
+        self.menu_file_rerender_failed.setToolTip("Full PDF reports of the project's flanges "
+                                                  "with failed bolts, e.g. after a summary run.")
+        self.menu_file_equipment = menu_file.addAction("Equipment History")
+        self.menu_file_dashboard = menu_file.addAction("Serve Results Dashboard")
+        self.menu_file_dashboard.setCheckable(True)
+        self.menu_file_dashboard.setToolTip("Browse the analysed flanges of the parent folder "
+                                            "in a web browser.")
+        self.menu_file_profile = menu_file.addAction("Profile Single Flange Runs")
+        self.menu_file_profile.setCheckable(True)
+        self.menu_file_profile.setToolTip("Save cProfile/tracemalloc data of each "
+                                          "'Run Flange Reports' next to its reports.")
+        # PDF render profile, see reporting.PDF_PROFILES
+        menu_pdf = menu_file.addMenu("PDF Pages")
+        menu_pdf.setToolTipsVisible(True)
+        self.menu_pdf_group = QActionGroup(self)
+        self.menu_pdf_profiles = {}
+        for profile, text, tip in zip(
+                PDF_PROFILES,
+                ("Full Report", "Summary Page Only", "Failed Bolts Page Only"),
+                ("Report page and failed bolts page.",
+                 "One low resolution page for triage.",
+                 "Failed bolts page, no PDF for flanges without failures.")):
+            action = menu_pdf.addAction(text)
+            action.setCheckable(True)
+            action.setToolTip(tip)
+            self.menu_pdf_group.addAction(action)
+            self.menu_pdf_profiles[profile] = action
+        self.menu_pdf_profiles["full"].setChecked(True)
         menu_file.addSeparator()
         self.menu_file_reset = menu_file.addAction("Reset Options")
         self.menu_file_exit = menu_file.addAction("Exit Program")
@@ -708,6 +1102,12 @@ class MyWindow(QWidget):
         self.menu_file_parent.triggered.connect(self.cb_menu_file_parent)
         self.menu_file_build.triggered.connect(self.cb_menu_file_build)
         self.menu_file_duplicates.triggered.connect(self.cb_menu_file_duplicates)
+        self.menu_file_whatif.triggered.connect(self.cb_menu_file_whatif)
+        self.menu_file_watch.triggered.connect(self.cb_menu_file_watch)
+        self.menu_file_rerender.triggered.connect(self.cb_menu_file_rerender)
+        self.menu_file_rerender_failed.triggered.connect(self.cb_menu_file_rerender_failed)
+        self.menu_file_equipment.triggered.connect(self.cb_menu_file_equipment)
+        self.menu_file_dashboard.triggered.connect(self.cb_menu_file_dashboard)
         self.menu_file_reset.triggered.connect(self.cb_menu_file_reset)
         self.menu_file_exit.triggered.connect(self.cb_menu_file_exit)
         self.menu_help_readme.triggered.connect(self.cb_menu_help_readme)
@@ -775,6 +1175,7 @@ class MyWindow(QWidget):
         flanges = discover_folders(tower_path, flange_patterns)
         self.combo_flange.addItems(flanges)
         self.combo_flange.setEnabled(True)
+        self.request_flange_statuses(tower_path, flanges)
         self.pushb_open_tower_pdfs.setEnabled(bool(flanges))
         self.pushb_tower.setEnabled(bool(flanges))
         if not flanges:
@@ -799,12 +1200,47 @@ class MyWindow(QWidget):
             self.pushb_open_flange_pdf.setEnabled(False)
             return
         
-        has_xmls = has_required_xmls(flange_path)
-        self.pushb_flange.setEnabled(has_xmls)
-        
-        # Enable open button if any PDF exists
-        has_pdf = latest_pdf_in_folder(flange_path) is not None
-        self.pushb_open_flange_pdf.setEnabled(has_pdf)
+        # Use the cached folder state, read it in the background if out of date
+        status = self.status_index.get(flange_path)
+        if status is None:
+            self.pushb_flange.setEnabled(False)
+            self.pushb_open_flange_pdf.setEnabled(False)
+            self.status_index.request([flange_path], self.status_ready.emit)
+            return
+        self.show_flange_status(status)
+
+    def request_flange_statuses(self, tower_path: str, flanges: list):
+        """Read the states of a tower's flanges for the combo box badges."""
+        paths = [os.path.join(tower_path, flange) for flange in flanges]
+        for flange, path in zip(flanges, paths):
+            status = self.status_index.get(path)
+            if status is not None:
+                self.show_flange_status(status)
+        self.status_index.request(paths, self.status_ready.emit)
+
+    def cb_status_ready(self, status):
+        """A flange state was read in the background."""
+        self.show_flange_status(status)
+
+    def show_flange_status(self, status):
+        """Show a flange state as a combo box badge and in the button states."""
+        tower_path = os.path.join(self.parent_path, self.combo_project.currentText(),
+                                  self.combo_tower.currentText())
+        if os.path.normpath(os.path.dirname(status.path)) != os.path.normpath(tower_path):
+            return
+        index = self.combo_flange.findText(os.path.basename(status.path))
+        if index < 0:
+            return
+        if status.level:
+            color = status_colors[status.level]
+        else:
+            color = status_colors["ready" if status.has_xmls else "missing"]
+        self.combo_flange.setItemData(index, QColor(color), Qt.DecorationRole)
+        self.combo_flange.setItemData(index, status.summary(), Qt.ToolTipRole)
+        if index == self.combo_flange.currentIndex():
+            self.pushb_flange.setEnabled(status.has_xmls)
+            # Enable open button if any PDF exists
+            self.pushb_open_flange_pdf.setEnabled(status.latest_pdf is not None)
 
     # ---- Run buttons ----
 
@@ -814,21 +1250,13 @@ class MyWindow(QWidget):
             return
 
         project = self.combo_project.currentText()
-        project_path = os.path.join(self.parent_path, project)
-        towers = discover_folders(project_path, tower_patterns)
 
-        output_pdf = self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked()
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
         output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
 
-        # Count total flanges for progress bar
-        total_flanges = 0
-        for tower in towers:
-            tower_path = os.path.join(self.parent_path, project, tower)
-            flanges = discover_folders(tower_path, flange_patterns)
-            total_flanges += len(flanges)
-
         # Create progress dialog
-        progress = QProgressDialog("Preparing...", "Cancel", 0, total_flanges, self)
+        progress = QProgressDialog("Finding flanges...", "Cancel", 0, 0, self)
         progress.setWindowTitle("Running Project Reports")
         progress.setWindowModality(Qt.WindowModal)
         progress.setWindowIcon(QIcon(icon_path))
@@ -837,42 +1265,54 @@ class MyWindow(QWidget):
 
         skipped_no_xml = 0
         skipped_existing = 0
-        exported = 0
-        current = 0
-
-        for tower in towers:
-            tower_path = os.path.join(self.parent_path, project, tower)
-            flanges = discover_folders(tower_path, flange_patterns)
-            for flange in flanges:
-                if progress.wasCanceled():
-                    show_info("Cancelled", f"Report generation cancelled.\nCompleted: {exported}")
-                    return
-
-                progress.setLabelText(f"Processing: {tower} / {flange}")
-                progress.setValue(current)
-                QApplication.processEvents()
+        skipped_syncing = 0
+        jobs = []
+
+        # Pass 1: find the flanges to run, all folders are read concurrently
+        flanges = self.wait_for(self.fs.submit(self.fs.scan_flanges(self.parent_path, project)),
+                                progress)
+        if flanges is not None:
+            progress.setLabelText(f"Checking {len(flanges)} flange folders...")
+            ready = self.wait_for(self.fs.submit(self.fs.check_flanges(
+                [flange_path for tower, flange, flange_path in flanges])), progress)
+        if flanges is None or ready is None:
+            show_info("Cancelled", "Report generation cancelled.\nCompleted: 0")
+            return
 
-                flange_path = os.path.join(tower_path, flange)
-                if not has_required_xmls(flange_path):
-                    skipped_no_xml += 1
-                    current += 1
-                    continue
-                if reports_exist(flange_path, project, tower, flange, output_pdf, output_excel):
-                    skipped_existing += 1
-                    current += 1
-                    continue
-                self.combo_tower.setCurrentText(tower)
-                self.combo_flange.setCurrentText(flange)
-                self.run_flange(ask_on_conflict=False)
-                exported += 1
-                current += 1
+        for tower, flange, flange_path in flanges:
+            if ready[flange_path] is None:
+                skipped_syncing += 1
+                continue
+            if not ready[flange_path]:
+                skipped_no_xml += 1
+                continue
+            if reports_exist(flange_path, project, tower, flange, output_pdf, output_excel):
+                skipped_existing += 1
+                continue
+            jobs.append((flange_path, dict(project=project, tower=tower, flange=flange)))
 
-        progress.setValue(total_flanges)
+        # Pass 2: analyse and render
+        results, pipeline, cancelled = self.run_pipeline(jobs, progress)
         progress.close()
 
+        exported = sum(bool(result["outputs"]) for result in results)
+        if cancelled:
+            show_info("Cancelled", f"Report generation cancelled.\nCompleted: {exported}")
+            return
+
+        failed = len(results) - exported
+
+        # Score the bolts of all stored analyses of the project across flanges
+        out_dir = "" if self.radio_location_flange.isChecked() else self.output_location
+        summary = write_project_summary(os.path.join(self.parent_path, project), out_dir)
+
         show_info(
             "Flange Reports for Project Complete",
             f"Exported: {exported}\nSkipped existing: {skipped_existing}\nSkipped folders missing XML: {skipped_no_xml}"
+            + (f"\nSkipped folders still syncing: {skipped_syncing}" if skipped_syncing else "")
+            + (f"\nFailed: {failed}" if failed else "")
+            + (f"\nProject summary: {os.path.basename(summary)}" if summary else "")
+            + f"\n\n{pipeline.summary()}"
         )
 
     def cb_run_tower(self):
@@ -885,16 +1325,19 @@ class MyWindow(QWidget):
         tower_path = os.path.join(self.parent_path, project, tower)
         flanges = discover_folders(tower_path, flange_patterns)
 
-        output_pdf = self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked()
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
         output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
 
-        # Pass 1: detect XML and conflicts
+        # Pass 1: detect XML and conflicts, the folders are read concurrently
+        ready = self.fs.run(self.fs.check_flanges(
+            [os.path.join(tower_path, flange) for flange in flanges]))
         have_xml = {}
         conflict = {}
         any_conflict = False
         for flange in flanges:
             fp = os.path.join(tower_path, flange)
-            ok_xml = has_required_xmls(fp)
+            ok_xml = bool(ready[fp])
             have_xml[flange] = ok_xml
             if ok_xml:
                 conflict[flange] = reports_exist(fp, project, tower, flange, output_pdf, output_excel)
@@ -929,63 +1372,119 @@ class MyWindow(QWidget):
             else:
                 bulk_choice = "additional"
 
-        # Create progress dialog
-        progress = QProgressDialog("Preparing...", "Cancel", 0, len(flanges), self)
-        progress.setWindowTitle(f"Running Reports for {tower}")
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setWindowIcon(QIcon(icon_path))
-        progress.setMinimumDuration(0)
-        progress.setValue(0)
-
-        # Pass 2: run and build per-line summary
-        lines = []
-        current = 0
+        # Build per-line summary and the flanges to run
+        lines = {}
+        jobs = []
         for flange in flanges:
-            if progress.wasCanceled():
-                show_info("Cancelled", f"Report generation cancelled.\nCompleted: {current}")
-                return
-
-            progress.setLabelText(f"Processing: {flange}")
-            progress.setValue(current)
-            QApplication.processEvents()
-
             fp = os.path.join(tower_path, flange)
 
             if not have_xml[flange]:
-                lines.append(f"{flange}: no XML, skipped")
-                current += 1
+                lines[flange] = f"{flange}: no XML, skipped"
                 continue
 
             if conflict[flange]:
                 if bulk_choice == "skip":
-                    lines.append(f"{flange}: conflict, skipped")
-                    current += 1
+                    lines[flange] = f"{flange}: conflict, skipped"
                     continue
                 if bulk_choice == "overwrite":
                     delete_existing_reports(fp, project, tower, flange,
                                             del_pdf=output_pdf, del_xlsx=output_excel)
-                    self.combo_flange.setCurrentText(flange)
-                    self.run_flange(ask_on_conflict=False)
-                    lines.append(f"{flange}: overwrite, done")
-                    current += 1
-                    continue
-                # additional
-                self.combo_flange.setCurrentText(flange)
-                self.run_flange(ask_on_conflict=False)
-                lines.append(f"{flange}: additional, done")
-                current += 1
-                continue
+                    lines[flange] = f"{flange}: overwrite, done"
+                else:  # additional
+                    lines[flange] = f"{flange}: additional, done"
+            else:
+                lines[flange] = f"{flange}: new, done"
+            jobs.append((fp, dict(project=project, tower=tower, flange=flange)))
 
-            # No conflict
-            self.combo_flange.setCurrentText(flange)
-            self.run_flange(ask_on_conflict=False)
-            lines.append(f"{flange}: new, done")
-            current += 1
+        # Create progress dialog
+        progress = QProgressDialog("Preparing...", "Cancel", 0, len(jobs), self)
+        progress.setWindowTitle(f"Running Reports for {tower}")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setWindowIcon(QIcon(icon_path))
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
 
-        progress.setValue(len(flanges))
+        # Pass 2: analyse and render
+        results, pipeline, cancelled = self.run_pipeline(jobs, progress)
         progress.close()
 
-        show_info("Flange Reports for Tower Complete", "\n".join(lines))
+        if cancelled:
+            show_info("Cancelled", "Report generation cancelled.\nCompleted: "
+                      f"{sum(bool(result['outputs']) for result in results)}")
+            return
+
+        for result in results:
+            if not result["outputs"]:
+                flange = result["location"]["flange"]
+                lines[flange] = f"{flange}: failed"
+        show_info("Flange Reports for Tower Complete",
+                  "\n".join(lines[flange] for flange in flanges) + f"\n\n{pipeline.summary()}")
+
+    def wait_for(self, future, progress: QProgressDialog):
+        """
+        Keep the GUI responsive while waiting on an AsyncFS future.
+
+        Returns
+        -------
+        The result of the future, None if the progress dialog was cancelled.
+        """
+        while not future.done():
+            if progress.wasCanceled():
+                future.cancel()
+                return None
+            QApplication.processEvents()
+            wait([future], timeout=0.05)
+        return future.result()
+
+    def run_pipeline(self, jobs: list, progress: QProgressDialog):
+        """
+        Analyse and render flanges on the report pipeline.
+
+        Parameters
+        ----------
+        jobs : list
+            (flange path, location dict) of each flange.
+        progress : QProgressDialog
+            Progress dialog to update. Its cancel button stops the run.
+
+        Returns
+        -------
+        results : list
+            Result of each finished flange, see batch.analyse_flange.
+        pipeline : ReportPipeline
+            The pipeline, for its throughput summary.
+        cancelled : bool
+            True if the run was cancelled.
+        """
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
+        output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
+        out_dir = "" if self.radio_location_flange.isChecked() else self.output_location
+
+        progress.setMaximum(max(len(jobs), 1))
+        progress.setValue(0)
+        progress.setLabelText("Analysing and rendering...")
+        QApplication.processEvents()
+
+        def update(finished, result):
+            if result is not None:
+                location = result["location"]
+                progress.setLabelText(f"Done: {location['tower']} / {location['flange']}")
+                self.status_index.record_outcome(result["path"], result["outcome"])
+                self.history.record(result["equipment"])
+            progress.setValue(finished)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        pipeline = ReportPipeline(*default_workers(self.config),
+                                  limits=self.resource_limits())
+        results = pipeline.run(jobs, out_dir, output_pdf, output_excel, progress=update,
+                               prefetch=self.fs.prefetch)
+        cancelled = progress.wasCanceled()
+        progress.setValue(progress.maximum())
+        # New reports change the folders, update their badges
+        self.status_index.request([path for path, location in jobs], self.status_ready.emit)
+        return results, pipeline, cancelled
 
     def cb_run_flange(self):
         """Run the selected flange. Ask for conflict if needed."""
@@ -997,7 +1496,8 @@ class MyWindow(QWidget):
         flange = self.combo_flange.currentText()
         flange_path = os.path.join(self.parent_path, project, tower, flange)
 
-        output_pdf = self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked()
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
         output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
 
         if not has_required_xmls(flange_path):
@@ -1138,6 +1638,226 @@ class MyWindow(QWidget):
         df.destroyed.connect(loop.quit)
         loop.exec()
 
+    def cb_menu_file_whatif(self):
+        """Open the criteria what-if tool for the selected project."""
+        project = self.combo_project.currentText()
+        if not project:
+            show_warn("Criteria What-If", "Select a project first.")
+            return
+        wi = WhatIfWindow(self.parent_path, project, self.whatif_caches)
+        wi.show()
+        loop = QEventLoop()
+        wi.destroyed.connect(loop.quit)
+        loop.exec()
+
+    def cb_menu_file_equipment(self):
+        """Open the tensioner, pump and operator history."""
+        ew = EquipmentWindow(self.history)
+        ew.show()
+        loop = QEventLoop()
+        ew.destroyed.connect(loop.quit)
+        loop.exec()
+
+    def cb_menu_file_watch(self, checked):
+        """Start or stop writing reports for flanges that receive new XMLs."""
+        if not checked:
+            self.stop_watch()
+            return
+        if not self.run_alerts():
+            self.menu_file_watch.setChecked(False)
+            return
+
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
+        output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
+        out_dir = "" if self.radio_location_flange.isChecked() else self.output_location
+
+        self.watch_options = (out_dir, output_pdf, output_excel)
+        self.watch_pool = make_pool(limits=self.resource_limits())
+        # The first poll scans the tree, see cb_watch_poll
+        self.watcher = FlangeWatcher(self.parent_path, self.watch_ready.emit)
+        self.cb_watch_poll()
+        self.watch_timer.start(5000)
+        self.setWindowTitle("Vestas Flange Reporting Tool - Watching for new XMLs")
+
+    def cb_watch_poll(self):
+        """
+        Poll the watched folders on the AsyncFS threads, slow shares would
+        block the GUI, and collect the finished reports.
+        """
+        if self.watch_polling is None or self.watch_polling.done():
+            self.watch_polling = self.fs.submit(self.fs.call(self.poll_watcher, self.watcher,
+                                                             timeout=None))
+        for job in [job for job in self.watch_jobs if job.done()]:
+            location = self.watch_jobs.pop(job)
+            try:
+                result = job.result()
+            except Exception as error:
+                print(f"Watch: {location['project']} / {location['tower']} / "
+                      f"{location['flange']}: {type(error).__name__}: {error}")
+                continue
+            self.status_index.record_outcome(result["path"], result["outcome"])
+            self.status_index.request([result["path"]], self.status_ready.emit)
+            self.history.record(result["equipment"])
+            print(f"Watch: {location['project']} / {location['tower']} / {location['flange']}: "
+                  f"{len(result['outputs'])} reports written {result['errors'].strip()}")
+
+    def poll_watcher(self, watcher):
+        """
+        Poll a FlangeWatcher, reporting the errors instead of raising. Skipped
+        while a poll that ran past the AsyncFS timeout is still going.
+        """
+        if not self.watch_lock.acquire(blocking=False):
+            return
+        try:
+            watcher.poll()
+        except Exception as error:
+            print(f"Watch: unable to poll {watcher.parent_path}: {type(error).__name__}: {error}")
+        finally:
+            self.watch_lock.release()
+
+    def cb_watch_ready(self, location, flange_path):
+        """Run the reports of a flange that received both rounds while watching."""
+        if self.watch_pool is None:     # Stopped while polling
+            return
+        args = (run_flange_job, flange_path, location, *self.watch_options)
+        try:
+            job = self.watch_pool.submit(*args)
+        except BrokenProcessPool:
+            # A worker died, the pool takes no more jobs
+            self.watch_pool.shutdown(wait=False)
+            self.watch_pool = make_pool(limits=self.resource_limits())
+            job = self.watch_pool.submit(*args)
+        self.watch_jobs[job] = location
+
+    def stop_watch(self):
+        """Stop watch mode. Jobs that have not started are cancelled."""
+        self.watch_timer.stop()
+        for job in self.watch_jobs:
+            job.cancel()
+        self.watch_jobs = {}
+        if self.watch_pool is not None:
+            self.watch_pool.shutdown(wait=False)
+        self.watch_pool = None
+        self.watcher = None
+        self.watch_polling = None
+        self.menu_file_watch.setChecked(False)
+        self.setWindowTitle("Vestas Flange Reporting Tool")
+
+    def cb_menu_file_dashboard(self, checked):
+        """
+        Start or stop serving the stored analyses of the parent folder to web
+        browsers. Set "dashboard_host" to 0.0.0.0 in the config to share it
+        on the local network, "dashboard_port" to change the port.
+        """
+        if not checked:
+            self.stop_dashboard()
+            return
+        try:
+            self.dashboard = start_dashboard(self.parent_path,
+                                             self.config.get("dashboard_host", "127.0.0.1"),
+                                             int(self.config.get("dashboard_port", DASHBOARD_PORT)))
+        except OSError as error:
+            self.menu_file_dashboard.setChecked(False)
+            show_warn("Dashboard", f"Unable to start the dashboard server:\n{error}")
+            return
+        webbrowser.open(self.dashboard.url)
+        show_info("Dashboard", f"Serving the analysed flanges of {self.parent_path} on "
+                               f"{self.dashboard.url}\n\nUncheck File > Serve Results "
+                               f"Dashboard to stop.")
+
+    def stop_dashboard(self):
+        """Stop the dashboard server."""
+        if self.dashboard is not None:
+            self.dashboard.shutdown()
+            self.dashboard.server_close()
+        self.dashboard = None
+        self.menu_file_dashboard.setChecked(False)
+
+    def closeEvent(self, event):
+        """Stop watch mode, the dashboard and the status threads before closing."""
+        self.stop_watch()
+        self.stop_dashboard()
+        self.status_index.shutdown()
+        self.fs.close()
+        self.history.close()
+        super().closeEvent(event)
+
+    def resource_limits(self):
+        """Worker limits from the config, None if they are invalid."""
+        try:
+            return ResourceLimits.from_config(self.config)
+        except (TypeError, ValueError) as error:
+            show_warn("Resource Limits", f"Ignoring the worker limits in tension_config.json:\n{error}")
+            return None
+
+    def pdf_profile(self) -> str:
+        """PDF render profile checked in File > PDF Pages."""
+        for profile, action in self.menu_pdf_profiles.items():
+            if action.isChecked():
+                return profile
+        return "full"
+
+    def cb_menu_file_rerender(self):
+        """Write the reports of the project again from the stored analyses, no XMLs are read."""
+        self.rerender_project()
+
+    def cb_menu_file_rerender_failed(self):
+        """Full PDF reports of the project's flanges with failed bolts, from the stored analyses."""
+        self.rerender_project(failed_only=True)
+
+    def rerender_project(self, failed_only: bool = False):
+        """
+        Render the reports of the selected project from the stored analyses.
+        With failed_only only flanges with failed bolts get reports, always
+        with the full PDF.
+        """
+        project = self.combo_project.currentText()
+        if not project:
+            show_warn("Re-render Reports", "Select a project first.")
+            return
+        if not (self.radio_format_both.isChecked() or
+                self.radio_format_excel.isChecked() or
+                self.radio_format_pdf.isChecked()):
+            show_warn("Report Alert", "No output type selected.")
+            return
+        files = find_analysis_files(os.path.join(self.parent_path, project))
+        if not files:
+            show_warn("Re-render Reports", "No stored analyses found in this project.\n"
+                      "They are written next to the reports from now on.")
+            return
+
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
+        output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
+        if failed_only:
+            output_pdf = "full"
+
+        progress = QProgressDialog("Rendering...", "Cancel", 0, len(files), self)
+        progress.setWindowTitle("Re-rendering Project Reports")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setWindowIcon(QIcon(icon_path))
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def update(finished, result):
+            progress.setValue(finished)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        results = rerender(files, default_workers(self.config)[1], output_pdf, output_excel,
+                           progress=update, failed_only=failed_only,
+                           limits=self.resource_limits())
+        progress.close()
+
+        failed = [result["path"] for result in results if result["errors"]]
+        skipped = sum(not result["outputs"] and not result["errors"] for result in results)
+        show_info("Re-render Reports Complete",
+                  f"Rendered: {len(results) - len(failed) - skipped}\n"
+                  + (f"Without failed bolts: {skipped}\n" if skipped else "")
+                  + f"Failed: {len(failed)}"
+                  + "".join(f"\n{path}" for path in failed))
+
     def cb_menu_file_reset(self):
         """Reset selectors and options."""
         self.parent_path = SCRIPT_DIR
@@ -1164,6 +1884,7 @@ class MyWindow(QWidget):
             self.cb_select_project()
 
         self.radio_format_both.setChecked(True)
+        self.menu_pdf_profiles["full"].setChecked(True)
         self.radio_location_flange.setChecked(True)
         self.radio_location_select.setChecked(False)
 
@@ -1231,6 +1952,7 @@ class MyWindow(QWidget):
                 self.combo_flange.clear()
                 self.combo_flange.addItems(flanges)
                 self.combo_flange.setEnabled(True)
+                self.request_flange_statuses(tower_path, flanges)
                 
                 # Always select first flange after refresh
                 if flanges:
@@ -1263,14 +1985,15 @@ class MyWindow(QWidget):
     def run_flange(self, ask_on_conflict: bool = False):
         """Run report for the selected flange. Optionally prompt on conflicts."""
         # Load criteria once per call
-        criteria = pd.read_excel(template_path, "Failure Criteria", index_col=0, engine='openpyxl')
+        criteria = load_criteria()
 
         project = self.combo_project.currentText()
         tower = self.combo_tower.currentText()
         flange = self.combo_flange.currentText()
         flange_path = os.path.join(self.parent_path, project, tower, flange)
 
-        output_pdf = self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked()
+        output_pdf = ((self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked())
+                      and self.pdf_profile())
         output_excel = self.radio_format_excel.isChecked() or self.radio_format_both.isChecked()
 
         if not has_required_xmls(flange_path):
@@ -1289,9 +2012,19 @@ class MyWindow(QWidget):
                                             del_pdf=output_pdf, del_xlsx=output_excel)
                 # "additional" writes a new timestamped file
 
+        # Optionally profile each stage, see File > Profile Single Flange Runs
+        location = dict(project=project, tower=tower, flange=flange)
+        profiler = FlangeProfiler(location) if self.menu_file_profile.isChecked() else None
+
+        def stage(name):
+            return profiler.stage(name) if profiler is not None else nullcontext()
+
         # Run analysis and write outputs
-        f = Flange(flange_path, dict(project=project, tower=tower, flange=flange), criteria)
-        f.run()
+        with stage("Analysis"):
+            f = Flange(flange_path, location, criteria)
+            f.run()
+        self.status_index.record_outcome(flange_path, outcome_of(f))
+        self.history.add(f)
         ts = dt.strftime(dt.today(), "%Y%m%d_%H%M%S")
         filename = f"Report-{project}_{tower}_{flange}-{ts}"
 
@@ -1299,9 +2032,19 @@ class MyWindow(QWidget):
         output_path = os.path.join(out_dir, filename)
 
         if self.radio_format_excel.isChecked() or self.radio_format_both.isChecked():
-            write_to_excel(f, template_path, f"{output_path}.xlsx")
+            with stage("Excel"):
+                write_to_excel(f, template_path, f"{output_path}.xlsx")
         if self.radio_format_pdf.isChecked() or self.radio_format_both.isChecked():
-            generate_pdf(f, f"{output_path}.pdf")
+            with stage("PDF"):
+                generate_pdf(f, f"{output_path}.pdf", self.pdf_profile())
+        save_analysis(f, os.path.join(out_dir, analysis_filename(f.location)))
+        if profiler is not None:
+            profiler.stop()
+            paths = profiler.save(out_dir)
+            show_info("Flange Run Profile",
+                      f"{profiler.summary()}\n\nSaved:\n" + "\n".join(paths))
+        # New reports change the folder, update its badge
+        self.status_index.request([flange_path], self.status_ready.emit)
 
     def run_alerts(self):
         """Validate required choices before running."""
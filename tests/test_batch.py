@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:04:52 2026
+
+@author: BECHY
+
+Report pipeline runs that lose a worker process.
+"""
+import os
+
+from tower_bolt_package import batch
+
+
+def dying_analysis(flange_path, location):
+    # Stands in for a worker killed mid job, e.g. out of memory
+    if flange_path == "dies":
+        os._exit(1)
+    result = {"location": location, "path": flange_path, "outputs": [], "errors": "",
+              "outcome": None, "equipment": [], "analysis_seconds": 0.0,
+              "render_seconds": 0.0}
+    return None, result
+
+
+def test_dead_worker_gives_failed_result(monkeypatch):
+    # Forked workers see the patched analysis
+    monkeypatch.setattr(batch, "analyse_flange", dying_analysis)
+    jobs = [(f"flange {index}", {"flange": str(index)}) for index in range(6)]
+    jobs.insert(2, ("dies", {"flange": "dies"}))
+    results = batch.ReportPipeline(1, 1, queue_size=2).run(jobs)
+    assert sorted(result["path"] for result in results) == sorted(path for path, location in jobs)
+    failed = [result for result in results if result["errors"]]
+    assert [result["path"] for result in failed] == ["dies"]
+    assert failed[0]["errors"].startswith("BrokenProcessPool")
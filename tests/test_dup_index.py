@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:12:31 2026
+
+@author: BECHY
+
+Duplicate index: files changed since the last scan must not be reported as
+duplicates.
+"""
+import os
+
+from tower_bolt_package.dup_index import DuplicateIndex, identical_paths
+
+
+def write(path, text, mtime_ns=None):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_file_edited_in_place_is_hashed_again(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        write(str(tmp_path / folder / "round.xml"), "<x>AAAA</x>")
+    index = DuplicateIndex(str(tmp_path / "index.sqlite"))
+    assert len(index.find(str(tmp_path))) == 1
+
+    # Same size, folder time kept, so scan does not list the folder again
+    folder_mtime = os.stat(str(tmp_path / "b")).st_mtime_ns
+    write(str(tmp_path / "b" / "round.xml"), "<x>BBBB</x>",
+          os.stat(str(tmp_path / "b" / "round.xml")).st_mtime_ns + 10 ** 9)
+    os.utime(str(tmp_path / "b"), ns=(folder_mtime, folder_mtime))
+
+    assert index.find(str(tmp_path)) == []
+    assert index.stats["dirs_skipped"] == 3
+    assert index.stats["hashed"] == 1
+    index.close()
+
+
+def test_identical_paths_reads_content_now(tmp_path):
+    paths = [str(tmp_path / name) for name in ("a.xml", "b.xml", "c.xml")]
+    write(paths[0], "<x>AAAA</x>")
+    write(paths[1], "<x>AAAA</x>")
+    write(paths[2], "<x>BBBB</x>")
+    assert identical_paths(paths) == set(paths[:2])
+    os.remove(paths[1])
+    assert identical_paths(paths) == set()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:12:40 2026
+
+@author: BECHY
+
+Golden output check of the flange analysis. tests/golden holds the synthetic
+corpus (golden.py synthetic, seed 0) and its snapshots recorded with the code
+before the record and parser rewrites (golden.py record --baseline).
+"""
+import os
+import shutil
+
+from tower_bolt_package import golden
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def test_synthetic_corpus_is_current(tmp_path):
+    # The committed corpus is what write_synthetic_corpus writes today
+    golden.write_synthetic_corpus(str(tmp_path), seed=0)
+    for path in golden.find_cases(str(tmp_path)):
+        case = os.path.relpath(path, str(tmp_path))
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), "rb") as f, \
+                    open(os.path.join(GOLDEN_DIR, case, name), "rb") as g:
+                assert f.read() == g.read(), os.path.join(case, name)
+
+
+def test_golden_check_has_no_diffs(tmp_path, monkeypatch):
+    # Failed analyses write Error.txt into the case folder, so run on a copy
+    monkeypatch.setenv("TOWER_BOLT_CACHE", str(tmp_path / "cache"))
+    corpus = str(tmp_path / "corpus")
+    shutil.copytree(GOLDEN_DIR, corpus)
+    results = golden.check(corpus, os.path.join(GOLDEN_DIR, golden.GOLDEN_NAME), repeat=1)
+    assert len(results) == len(golden.SYNTHETIC_CASES)
+    assert [result for result in results if result["status"] != "ok"] == []
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:31:05 2026
+
+@author: BECHY
+
+Differential check of the Xml parser backends. tests/xml_corpus holds small
+files with the constructs the backends could read differently, the golden
+corpus adds full synthetic rounds.
+"""
+import json
+import os
+
+from tower_bolt_package import xml_backends
+
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_backends_match_reference():
+    corpus = (xml_backends.find_xml_files(os.path.join(TESTS_DIR, "xml_corpus"))
+              + xml_backends.find_xml_files(os.path.join(TESTS_DIR, "golden")))
+    assert len(corpus) > 12
+    assert xml_backends.compare_backends(corpus) == []
+
+
+def test_default_backend_is_selected_and_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("TOWER_BOLT_CACHE", str(tmp_path))
+    monkeypatch.setattr(xml_backends, "_default", None)
+    backend = xml_backends.get_backend()
+    with open(xml_backends.selection_path(), "r", encoding="utf-8") as f:
+        selection = json.load(f)
+    assert selection["environment"] == xml_backends.environment_key()
+    assert selection["backend"] == backend.name
+    assert set(selection["timings"]) == set(xml_backends.available_backends())
+
+    # The cached choice is used without timing the backends again
+    monkeypatch.setattr(xml_backends, "_default", None)
+    monkeypatch.setattr(xml_backends, "benchmark_backends", None)
+    assert xml_backends.get_backend().name == backend.name
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:48:19 2026
+
+@author: BECHY
+
+Concurrent file system access for parent paths on OneDrive/SharePoint synced
+or network folders, where each listdir, stat or open can block while files
+are downloaded. Blocking calls run on a thread pool behind an asyncio loop,
+so many of them wait on the network at the same time.
+"""
+import asyncio
+import os
+import stat as st
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tower_bolt_package.funcs import (discover_folders, has_required_xmls,
+                                      tower_patterns, flange_patterns)
+
+
+# Windows file attributes of cloud files that are not downloaded yet
+PLACEHOLDER_ATTRIBUTES = (getattr(st, "FILE_ATTRIBUTE_OFFLINE", 0x1000) |
+                          getattr(st, "FILE_ATTRIBUTE_RECALL_ON_OPEN", 0x40000) |
+                          getattr(st, "FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS", 0x400000))
+READ_CHUNK = 1 << 20
+
+
+def is_placeholder(stat_result) -> bool:
+    """True if a stat result is of a cloud file that is not downloaded yet."""
+    return bool(getattr(stat_result, "st_file_attributes", 0) & PLACEHOLDER_ATTRIBUTES)
+
+
+def _read_through(path: str) -> int:
+    """Read a whole file and drop the data, so a synced file is downloaded."""
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return size
+            size += len(chunk)
+
+
+def _xml_entries(folderpath: str) -> list:
+    """
+    (path, stat result) of the Xml files in a folder. On Windows the stat
+    results come with the directory listing, without opening the files.
+    """
+    with os.scandir(folderpath) as entries:
+        return [(entry.path, entry.stat()) for entry in entries
+                if entry.is_file() and '.xml' in entry.name.lower()]
+
+
+def _check_folder(folderpath: str):
+    """
+    has_required_xmls of a flange folder, None while any of its Xml files
+    is a placeholder, as reading it would wait for the download.
+    """
+    if any(is_placeholder(stat_result) for path, stat_result in _xml_entries(folderpath)):
+        return None
+    return has_required_xmls(folderpath)
+
+
+def _files_to_fetch(folderpath: str) -> list:
+    """
+    Xml files of a folder to read through. Only the placeholders where the
+    file attributes tell them apart, else all of them.
+    """
+    entries = _xml_entries(folderpath)
+    if all(hasattr(stat_result, "st_file_attributes") for path, stat_result in entries):
+        return [path for path, stat_result in entries if is_placeholder(stat_result)]
+    return [path for path, stat_result in entries]
+
+
+class AsyncFS:
+
+    def __init__(self, workers: int = 16, timeout: float = 30.0):
+        """
+        Thread pool backed asyncio layer for slow folders. The event loop runs
+        in its own thread, so it can be used from the GUI thread and from
+        plain functions through the blocking run method.
+
+        Attributes
+        ----------
+        workers : int
+            Threads waiting on the file system at the same time.
+        timeout : float
+            Seconds before a single call is given up. The call keeps running
+            in its thread, a file that is still downloading is only reported
+            as not ready.
+
+        Methods
+        -------
+        submit(coro), run(coro)
+            Start a coroutine on the loop, or run it and wait for its result.
+        call(func, *args, timeout=None)
+            Await a blocking function on the thread pool, with a timeout.
+        scan_flanges(parent_path:str, project:str)
+            (tower, flange, path) of every flange folder in a project.
+        check_flanges(paths:list)
+            has_required_xmls of many flange folders at once, folders with
+            files not downloaded yet are prefetched instead of read.
+        prefetch(paths:list)
+            Download the Xml files of flange folders in the background.
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._prefetched = set()
+
+    def submit(self, coro):
+        """Start a coroutine on the loop thread, returns a concurrent future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout: float = None):
+        """Run a coroutine on the loop thread and wait for its result."""
+        return self.submit(coro).result(timeout)
+
+    async def call(self, func, *args, timeout: float = None):
+        """
+        Await a blocking function on the thread pool.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If the call takes longer than the timeout.
+        """
+        future = self._loop.run_in_executor(self._pool, func, *args)
+        return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+
+    async def gather(self, func, items, timeout: float = None) -> list:
+        """
+        Call a blocking function for each item concurrently. Failed or timed
+        out calls give their exception instead of a result.
+        """
+        return await asyncio.gather(*[self.call(func, item, timeout=timeout) for item in items],
+                                    return_exceptions=True)
+
+    async def scan_flanges(self, parent_path: str, project: str) -> list:
+        """
+        Find the flange folders of a project, listing all tower folders at
+        the same time.
+
+        Returns
+        -------
+        flanges : list
+            (tower, flange, flange path) in tower and flange folder order.
+        """
+        project_path = os.path.join(parent_path, project)
+        towers = await self.call(discover_folders, project_path, tower_patterns)
+        tower_paths = [os.path.join(project_path, tower) for tower in towers]
+        listings = await asyncio.gather(*[self.call(discover_folders, path, flange_patterns)
+                                          for path in tower_paths], return_exceptions=True)
+        flanges = []
+        for tower, tower_path, listing in zip(towers, tower_paths, listings):
+            if isinstance(listing, BaseException):
+                print(f"Unable to list {tower_path}: {listing}")
+                continue
+            flanges += [(tower, flange, os.path.join(tower_path, flange)) for flange in listing]
+        return flanges
+
+    async def check_flanges(self, paths: list) -> dict:
+        """
+        has_required_xmls of many flange folders at once.
+
+        Returns
+        -------
+        ready : dict
+            True/False by flange path, None if the folder has Xml files that
+            are not downloaded yet or could not be read in time. The download
+            of those folders is started.
+        """
+        results = await self.gather(_check_folder, paths)
+        ready = {path: None if isinstance(result, BaseException) else result
+                 for path, result in zip(paths, results)}
+        self.prefetch([path for path, result in ready.items() if result is None])
+        return ready
+
+    async def _prefetch_folder(self, folderpath: str):
+        try:
+            paths = await self.call(_files_to_fetch, folderpath)
+            await self.gather(_read_through, paths)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            # Files evicted or replaced later are fetched again
+            self._prefetched.discard(folderpath)
+
+    def prefetch(self, paths):
+        """
+        Start downloading the Xml files of flange folders without waiting,
+        so they are local by the time the flanges are analysed. A folder
+        already being fetched is skipped.
+        """
+        for path in paths:
+            if path not in self._prefetched:
+                self._prefetched.add(path)
+                self.submit(self._prefetch_folder(path))
+
+    def close(self):
+        """Stop the loop and the threads."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._pool.shutdown(wait=False)
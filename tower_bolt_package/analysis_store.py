@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:02:35 2026
+
+@author: BECHY
+
+Stores the analysis results of a flange next to its reports so the reports
+can be rendered again without the Xml files.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package.diagnostics import DiagnosticsCollector
+from tower_bolt_package.records import RoundRecords
+from tower_bolt_package.stats import FlangeStats
+
+
+STORE_VERSION = 1
+STATS_FIELDS = ("count", "n", "mean", "std", "min", "max", "percentiles")
+
+
+class StoredFlange:
+
+    def __init__(self, path, location, headers, records, stats, errors,
+                 required_rotation, xml_data, diagnostics=None):
+        """
+        Analysis results of a flange loaded from an analysis file. Has the
+        attributes of Flange that generate_pdf and write_to_excel use.
+
+        Attributes
+        ----------
+        path : str
+            Flange folder the analysis was run on.
+        location : dict
+            Project, tower and flange names.
+        headers : Pandas DataFrame
+            Evaluated header data.
+        records : Pandas DataFrame
+            Evaluated bolt records.
+        stats : FlangeStats
+            Rotation statistics.
+        errors : str
+            Errors and alerts found in the analysis.
+        required_rotation : float
+            Required rotation of the flange.
+        xml_data : dict
+            "first" and "second" round dicts with the Xml "path" and the bolt
+            "records".
+        diagnostics : DiagnosticsCollector
+            Structured errors and alerts. Empty for files stored before they
+            were kept.
+        """
+        self.path = path
+        self.location = location
+        self.headers = headers
+        self.records = records
+        self.stats = stats
+        self.errors = errors
+        self.required_rotation = required_rotation
+        self.xml_data = xml_data
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticsCollector()
+        self.has_run = 1
+
+
+def analysis_filename(location: dict) -> str:
+    """File name of the analysis file of a flange."""
+    return f"Analysis-{location['project']}_{location['tower']}_{location['flange']}.npz"
+
+
+def _json_value(value):
+    """Convert the numpy scalars json does not know."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _frame_parts(frame: pd.DataFrame, name: str, arrays: dict) -> dict:
+    """
+    Split a dataframe into numeric arrays, added to arrays, and a json
+    description with the labels and the object columns.
+    """
+    columns = []
+    for i, (column, values) in enumerate(frame.items()):
+        spec = {"label": list(column) if isinstance(column, tuple) else column}
+        if values.dtype == object:
+            spec["values"] = values.tolist()
+        else:
+            arrays[f"{name}_{i}"] = values.to_numpy()
+        columns.append(spec)
+    return {"index": frame.index.tolist(), "columns": columns,
+            "multi": isinstance(frame.columns, pd.MultiIndex)}
+
+
+def _frame_from_parts(parts: dict, name: str, data) -> pd.DataFrame:
+    """Rebuild a dataframe split with _frame_parts."""
+    values = {}
+    for i, spec in enumerate(parts["columns"]):
+        label = tuple(spec["label"]) if parts["multi"] else spec["label"]
+        if "values" in spec:
+            values[label] = pd.Series(spec["values"], dtype=object)
+        else:
+            values[label] = pd.Series(data[f"{name}_{i}"])
+    frame = pd.DataFrame(values)
+    frame.index = pd.Index(parts["index"])
+    if parts["multi"]:
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns)
+    return frame
+
+
+def _round_parts(round_records: RoundRecords, name: str, arrays: dict) -> dict:
+    """Split the parsed bolt records of a round like _frame_parts."""
+    for field in ("bolt_no", "total", "angles", "cycles", "timestamp"):
+        arrays[f"{name}_{field}"] = getattr(round_records, field)
+    for i, values in enumerate(round_records.fields.values()):
+        arrays[f"{name}_field_{i}"] = values
+    return {"fields": list(round_records.fields),
+            "text": {key: values.tolist() for key, values in round_records.text.items()},
+            "columns": list(round_records.columns),
+            "max_cycle": round_records.max_cycle}
+
+
+def _round_from_parts(parts: dict, name: str, data) -> RoundRecords:
+    """Rebuild the parsed bolt records of a round."""
+    return RoundRecords(
+        bolt_no=data[f"{name}_bolt_no"], total=data[f"{name}_total"],
+        angles=data[f"{name}_angles"], cycles=data[f"{name}_cycles"],
+        timestamp=data[f"{name}_timestamp"],
+        fields={key: data[f"{name}_field_{i}"] for i, key in enumerate(parts["fields"])},
+        text={key: np.array(values, dtype=object) for key, values in parts["text"].items()},
+        columns=tuple(parts["columns"]), max_cycle=parts["max_cycle"])
+
+
+def save_analysis(flange_obj, filepath: str):
+    """
+    Store the analysis results of a flange that has run in one compressed
+    .npz file. Numbers are kept as arrays, text as json.
+
+    Parameters
+    ----------
+    flange_obj : Flange
+        Analysed flange.
+    filepath : str
+        File to write, see analysis_filename.
+
+    Returns
+    -------
+    str
+        The file path, 0 if the flange has not run or the file could not be
+        written.
+    """
+    from tower_bolt_package.status import outcome_of
+
+    if not getattr(flange_obj, "has_run", False):
+        return 0
+    try:
+        arrays = {f"stats_{field}": getattr(flange_obj.stats, field) for field in STATS_FIELDS}
+        meta = {
+            "version": STORE_VERSION,
+            "path": flange_obj.path,
+            "location": flange_obj.location,
+            "errors": flange_obj.errors,
+            "diagnostics": [item.to_dict() for item in flange_obj.diagnostics],
+            "outcome": outcome_of(flange_obj),
+            "required_rotation": flange_obj.required_rotation,
+            "headers": _frame_parts(flange_obj.headers, "headers", arrays),
+            "records": _frame_parts(flange_obj.records, "records", arrays),
+            "rounds": {key: {"path": flange_obj.xml_data[key]["path"],
+                             "records": _round_parts(flange_obj.xml_data[key]["records"],
+                                                     f"{key}_round", arrays)}
+                       for key in ("first", "second")},
+        }
+        with open(filepath, "wb") as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta, default=_json_value)),
+                                **arrays)
+        return filepath
+    except Exception as error:
+        print(error)
+        return 0
+
+
+def load_analysis(filepath: str) -> StoredFlange:
+    """
+    Load an analysis file written by save_analysis.
+
+    Parameters
+    ----------
+    filepath : str
+        Analysis file.
+
+    Returns
+    -------
+    StoredFlange
+        Analysis results ready for generate_pdf and write_to_excel.
+    """
+    with np.load(filepath, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta["version"] != STORE_VERSION:
+            raise ValueError(f"Unsupported analysis file version {meta['version']}: {filepath}")
+        stats = FlangeStats(**{field: data[f"stats_{field}"] for field in STATS_FIELDS})
+        headers = _frame_from_parts(meta["headers"], "headers", data)
+        records = _frame_from_parts(meta["records"], "records", data)
+        xml_data = {key: {"path": part["path"],
+                          "records": _round_from_parts(part["records"], f"{key}_round", data)}
+                    for key, part in meta["rounds"].items()}
+    return StoredFlange(meta["path"], meta["location"], headers, records, stats,
+                        meta["errors"], meta["required_rotation"], xml_data,
+                        DiagnosticsCollector.from_dicts(meta.get("diagnostics", [])))
+
+
+def load_diagnostics(filepath: str) -> tuple:
+    """
+    Location and diagnostics of an analysis file, without loading the
+    stored tables.
+
+    Returns
+    -------
+    (location, diagnostics) : tuple
+        Location dict and DiagnosticsCollector.
+    """
+    with np.load(filepath, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+    if meta["version"] != STORE_VERSION:
+        raise ValueError(f"Unsupported analysis file version {meta['version']}: {filepath}")
+    return meta["location"], DiagnosticsCollector.from_dicts(meta.get("diagnostics", []))
+
+
+def load_outcome(filepath: str) -> dict:
+    """
+    Pass/Alert/Fail bolt counts of an analysis file, see status.outcome_of.
+    Counted from the stored records for files stored before they were kept.
+    """
+    from tower_bolt_package.status import outcome_of
+
+    with np.load(filepath, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+    if meta["version"] != STORE_VERSION:
+        raise ValueError(f"Unsupported analysis file version {meta['version']}: {filepath}")
+    if "outcome" in meta:
+        return meta["outcome"]
+    return outcome_of(load_analysis(filepath))
+
+
+def find_analysis_files(folderpath: str) -> list:
+    """All analysis files below a folder."""
+    return sorted(os.path.join(root, name)
+                  for root, dirs, files in os.walk(folderpath)
+                  for name in files
+                  if name.startswith("Analysis-") and name.endswith(".npz"))
+
+
+def rerender_job(filepath: str, output_pdf: bool = True, output_excel: bool = True,
+                 failed_only: bool = False) -> dict:
+    """
+    Write the reports of a stored analysis next to its analysis file. Runs in
+    a worker process, see batch.render_flange for the result. With failed_only
+    nothing is written for flanges without failed bolts.
+    """
+    from tower_bolt_package.batch import render_flange
+    from tower_bolt_package.status import outcome_of
+
+    try:
+        flange_obj = load_analysis(filepath)
+    except Exception as error:
+        return {"location": None, "path": filepath, "outputs": [],
+                "errors": f"{type(error).__name__}: {error}"}
+    result = {"location": flange_obj.location, "path": flange_obj.path, "outputs": [],
+              "errors": ""}
+    if failed_only and not (outcome_of(flange_obj) or {}).get("Fail"):
+        return result
+    return render_flange(flange_obj, result, os.path.dirname(filepath),
+                         output_pdf, output_excel, store=False)
+
+
+def rerender(filepaths, workers: int = None, output_pdf: bool = True,
+             output_excel: bool = True, progress=None, failed_only: bool = False,
+             limits=None) -> list:
+    """
+    Render the reports of stored analyses again on a process pool, without
+    reading any Xml file.
+
+    Parameters
+    ----------
+    filepaths : list
+        Analysis files.
+    workers : int, optional
+        Worker processes. Defaults to the number of CPUs.
+    output_pdf, output_excel : bool
+        Report types to write. output_pdf may also be a reporting.PDF_PROFILES
+        name, True is "full".
+    progress : callable, optional
+        Called with (finished jobs, result) after each flange. Return False to
+        cancel the jobs that have not started.
+    failed_only : bool
+        Only write the reports of flanges with failed bolts, e.g. the full
+        reports of the flanges a summary run flagged.
+    limits : governor.ResourceLimits, optional
+        Worker limits.
+
+    Returns
+    -------
+    results : list
+        Result dict of each finished flange.
+    """
+    from tower_bolt_package.batch import make_pool
+
+    results = []
+    with make_pool(workers, limits) as pool:
+        jobs = [pool.submit(rerender_job, filepath, output_pdf, output_excel, failed_only)
+                for filepath in filepaths]
+        for job in as_completed(jobs):
+            results.append(job.result())
+            if progress is not None and progress(len(results), results[-1]) is False:
+                for pending in jobs:
+                    pending.cancel()
+    return results
+
+
+if __name__ == "__main__":
+    from tower_bolt_package import governor
+    from tower_bolt_package.reporting import PDF_PROFILES
+
+    parser = argparse.ArgumentParser(
+        description="Render the reports of every stored flange analysis below a folder again.")
+    parser.add_argument("folder", help="Parent, project, tower or flange folder.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes. Defaults to the number of CPUs.")
+    parser.add_argument("--format", choices=["pdf", "excel", "both"], default="both")
+    parser.add_argument("--profile", choices=PDF_PROFILES, default="full",
+                        help="PDF pages to render.")
+    parser.add_argument("--failed-only", action="store_true",
+                        help="Only render flanges with failed bolts.")
+    governor.add_arguments(parser)
+    args = parser.parse_args()
+
+    files = find_analysis_files(args.folder)
+    print(f"{len(files)} stored analyses")
+
+    def show(done, result):
+        status = (f"{len(result['outputs'])} reports" if result["outputs"]
+                  else result["errors"] or "no reports")
+        print(f"{done}/{len(files)} {result['path']}: {status}")
+
+    rerender(files, args.workers, args.format in ("pdf", "both") and args.profile,
+             args.format in ("excel", "both"), progress=show, failed_only=args.failed_only,
+             limits=governor.from_args(args))
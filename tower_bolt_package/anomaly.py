@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:34:08 2026
+
+@author: BECHY
+
+Project level bolt analytics. The bolts of all flanges of a project are held
+in one set of arrays and scored with robust z-scores against the bolts of the
+same tower segment (flange name, e.g. all M2-M3 flanges) and of the same bolt
+size, and the round rotations of each tensioner and pump are compared to the
+rest of the project to find drifting equipment.
+"""
+import argparse
+from datetime import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package.diagnostics import write_jsonl
+from tower_bolt_package.records import parse_header_date
+
+
+# Modified z-score of Iglewicz and Hoaglin: 0.6745 * (x - median) / MAD
+MAD_SCALE = 0.6745
+# Mean absolute deviation scale, used when more than half the values are equal
+MEAN_AD_SCALE = 0.7979
+# Absolute z-score above which a bolt is an outlier
+OUTLIER_Z = 3.5
+# Absolute median z-score of a tensioner or pump above which it is drifting
+DRIFT_Z = 2.0
+# Fewest values in a group for its scores to be used
+MIN_GROUP = 8
+# Fewest rounds of one tensioner or pump for a drift call
+MIN_ROUNDS = 3
+
+EQUIPMENT_FIELDS = ("TensionerVUI", "PumpVUI")
+ROUNDS = ("First Round", "Second Round")
+
+
+def group_median(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Median of the values of each group in one sort.
+
+    Parameters
+    ----------
+    values : numpy array
+        Finite float values.
+    groups : numpy array
+        Group number of each value, 0 to n_groups - 1.
+    n_groups : int
+        Number of groups.
+
+    Returns
+    -------
+    numpy array
+        Median of each group, NaN for empty groups.
+    """
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n_groups, np.nan)
+    filled = counts > 0
+    low = starts[filled] + (counts[filled] - 1) // 2
+    high = starts[filled] + counts[filled] // 2
+    medians[filled] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def robust_z(values: np.ndarray, groups: np.ndarray, min_group: int = MIN_GROUP) -> np.ndarray:
+    """
+    Robust z-score of each value against the values of its group, from the
+    group median and median absolute deviation.
+
+    Parameters
+    ----------
+    values : numpy array
+        Float values, NaN values are not scored.
+    groups : numpy array
+        Group number of each value.
+    min_group : int
+        Groups with fewer scored values get NaN scores.
+
+    Returns
+    -------
+    numpy array
+        z-score of each value, NaN where not scored.
+    """
+    z = np.full(len(values), np.nan)
+    scored = np.isfinite(values)
+    if not scored.any():
+        return z
+    x = values[scored]
+    g = groups[scored]
+    n_groups = int(g.max()) + 1
+    median = group_median(x, g, n_groups)
+    deviation = np.abs(x - median[g])
+    mad = group_median(deviation, g, n_groups) / MAD_SCALE
+    # Fall back to the mean absolute deviation where the MAD is 0
+    counts = np.bincount(g, minlength=n_groups)
+    mean_ad = np.bincount(g, weights=deviation, minlength=n_groups) / np.maximum(counts, 1)
+    scale = np.where(mad > 0, mad, mean_ad / MEAN_AD_SCALE)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (x - median[g]) / scale[g]
+    scores[scale[g] == 0] = 0.0
+    scores[counts[g] < min_group] = np.nan
+    z[scored] = scores
+    return z
+
+
+def _codes(keys) -> np.ndarray:
+    """Group number of each key."""
+    return np.unique(np.asarray(keys, dtype=str), return_inverse=True)[1].ravel()
+
+
+def _header(headers, field: str, column: str) -> str:
+    if headers is None or field not in headers.index:
+        return ""
+    value = headers.loc[field, column]
+    return "" if value is None or value != value else str(value)
+
+
+class ProjectAnomalies:
+
+    def __init__(self):
+        """
+        Bolt rotations of many analysed flanges in flat arrays, scored across
+        flanges.
+
+        Attributes
+        ----------
+        locations : list
+            (project, tower, flange) of each flange.
+        bolt_size, required_rotation : list
+            Bolt size and required rotation of each flange.
+        equipment : dict
+            Per round, the TensionerVUI and PumpVUI of each flange.
+        dates : dict
+            Per round, the date of each flange round.
+
+        Methods
+        -------
+        add(flange_obj)
+            Add an analysed Flange or StoredFlange.
+        bolt_scores()
+            z-scores and outlier flags of every bolt.
+        equipment_drift()
+            Rotation shift of each tensioner and pump against the project.
+        write_summary(filepath:str)
+            Write the project summary workbook.
+        """
+        self.locations = []
+        self.bolt_size = []
+        self.required_rotation = []
+        self.equipment = {name: {field: [] for field in EQUIPMENT_FIELDS} for name in ROUNDS}
+        self.dates = {name: [] for name in ROUNDS}
+        self._parts = []
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    def add(self, flange_obj):
+        """Add an analysed flange. Flanges that have not run are ignored."""
+        if not getattr(flange_obj, "has_run", False):
+            return
+        location = flange_obj.location
+        headers = flange_obj.headers
+        records = flange_obj.records
+        self.locations.append((location["project"], location["tower"], location["flange"]))
+        self.bolt_size.append(_header(headers, "BoltSize", "First Round"))
+        self.required_rotation.append(float(flange_obj.required_rotation or np.nan))
+        for name in ROUNDS:
+            for field in EQUIPMENT_FIELDS:
+                self.equipment[name][field].append(_header(headers, field, name))
+            self.dates[name].append(parse_header_date(_header(headers, "Date", name)))
+        self._parts.append((records["BoltNo"].to_numpy(dtype=np.int64),
+                            records["First Round"]["Round Total"].to_numpy(dtype=float),
+                            records["Second Round"]["Round Total"].to_numpy(dtype=float),
+                            records["Total Rotation"].to_numpy(dtype=float)))
+        self._arrays = None
+
+    def arrays(self) -> dict:
+        """
+        One array per bolt value over all flanges: flange (index into
+        locations), bolt_no, round1, round2 and total rotation.
+        """
+        if self._arrays is None:
+            parts = list(zip(*self._parts)) if self._parts else [[np.zeros(0)]] * 4
+            self._arrays = {
+                "flange": np.repeat(np.arange(len(self._parts)),
+                                    [len(part[0]) for part in self._parts]).astype(np.int64),
+                "bolt_no": np.concatenate(parts[0]).astype(np.int64),
+                "round1": np.concatenate(parts[1]),
+                "round2": np.concatenate(parts[2]),
+                "total": np.concatenate(parts[3])}
+        return self._arrays
+
+    def bolt_scores(self) -> pd.DataFrame:
+        """
+        Score every bolt's total rotation, relative to its required rotation,
+        against the bolts of the same tower segment and of the same bolt
+        size in the loaded flanges.
+
+        Returns
+        -------
+        scores : Pandas DataFrame
+            One row per bolt with the segment and size z-scores and an
+            Outlier column of "High", "Low" or "".
+        """
+        arrays = self.arrays()
+        flange = arrays["flange"]
+        locations = np.array(self.locations, dtype=str).reshape(-1, 3)
+        required = np.array(self.required_rotation, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = arrays["total"] / required[flange]
+
+        segment = _codes([f"{project}|{name}" for project, tower, name in self.locations])
+        size = _codes(self.bolt_size)
+        segment_z = robust_z(relative, segment[flange])
+        size_z = robust_z(relative, size[flange])
+
+        extreme = np.fmax(np.abs(np.nan_to_num(segment_z)), np.abs(np.nan_to_num(size_z)))
+        signed = np.where(np.abs(np.nan_to_num(segment_z)) >= np.abs(np.nan_to_num(size_z)),
+                          segment_z, size_z)
+        outlier = np.where(extreme < OUTLIER_Z, "", np.where(signed > 0, "High", "Low"))
+
+        return pd.DataFrame({
+            "Project": locations[flange, 0] if len(flange) else [],
+            "Tower": locations[flange, 1] if len(flange) else [],
+            "Flange": locations[flange, 2] if len(flange) else [],
+            "Bolt Size": np.array(self.bolt_size, dtype=str)[flange],
+            "BoltNo": arrays["bolt_no"],
+            "Total Rotation": arrays["total"],
+            "Required Rotation": required[flange],
+            "Segment Z": np.round(segment_z, 2),
+            "Size Z": np.round(size_z, 2),
+            "Outlier": outlier})
+
+    def equipment_drift(self) -> pd.DataFrame:
+        """
+        Compare the round rotations of each tensioner and pump to the project.
+        Each flange round is scored on its mean round rotation, relative to
+        the required rotation, against the same round of the flanges with the
+        same bolt size. The scores are then summarised per device, with the
+        trend of the scores over the round dates.
+
+        Returns
+        -------
+        drift : Pandas DataFrame
+            One row per device with its rounds, median z-score, z-score trend
+            per 30 days and a Drifting flag.
+        """
+        arrays = self.arrays()
+        flange = arrays["flange"]
+        n = len(self)
+        counts = np.bincount(flange, minlength=n)
+        required = np.array(self.required_rotation, dtype=float)
+
+        frames = []
+        for i, name in enumerate(ROUNDS):
+            values = arrays[f"round{i + 1}"]
+            present = np.isfinite(values)
+            sums = np.bincount(flange[present], weights=values[present], minlength=n)
+            bolts = np.bincount(flange[present], minlength=n)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = sums / bolts / required
+            z = robust_z(mean, _codes(self.bolt_size), min_group=MIN_ROUNDS)
+            days = np.array([date.value / 8.64e13 if date is not pd.NaT else np.nan
+                             for date in self.dates[name]])
+            for field in EQUIPMENT_FIELDS:
+                frames.append(pd.DataFrame({"Field": field,
+                                            "Device": self.equipment[name][field],
+                                            "z": z, "days": days}))
+        if not frames or not n:
+            return pd.DataFrame(columns=["Field", "Device", "Rounds", "Median Z",
+                                         "Trend Z per 30 Days", "Drifting"])
+        rounds = pd.concat(frames, ignore_index=True)
+        rounds = rounds[(rounds["Device"] != "") & rounds["z"].notna()]
+
+        # Least squares slope of z over the round dates, per device
+        dated = rounds[rounds["days"].notna()].copy()
+        dated["days"] -= dated.groupby(["Field", "Device"])["days"].transform("mean")
+        dated["dz"] = dated["days"] * dated["z"]
+        dated["dd"] = dated["days"] ** 2
+        sums = dated.groupby(["Field", "Device"])[["dz", "dd"]].sum()
+        slope = (sums["dz"] / sums["dd"].where(sums["dd"] > 0)) * 30
+
+        drift = rounds.groupby(["Field", "Device"])["z"].agg(["count", "median"])
+        drift.columns = ["Rounds", "Median Z"]
+        drift["Trend Z per 30 Days"] = slope.reindex(drift.index)
+        drift["Drifting"] = (drift["Rounds"] >= MIN_ROUNDS) & (drift["Median Z"].abs() >= DRIFT_Z)
+        return drift.round(2).reset_index()
+
+    def flange_summary(self, scores: pd.DataFrame) -> pd.DataFrame:
+        """Bolts, outliers and largest z-score per flange."""
+        summary = pd.DataFrame(self.locations, columns=["Project", "Tower", "Flange"])
+        summary["Bolt Size"] = self.bolt_size
+        for field in EQUIPMENT_FIELDS:
+            summary[field] = self.equipment["First Round"][field]
+        flange = self.arrays()["flange"]
+        n = len(self)
+        summary["Bolts"] = np.bincount(flange, minlength=n)
+        for label in ("High", "Low"):
+            summary[f"{label} Outliers"] = np.bincount(
+                flange, weights=(scores["Outlier"] == label).to_numpy(), minlength=n).astype(int)
+        extreme = np.fmax(scores["Segment Z"].abs().fillna(0), scores["Size Z"].abs().fillna(0))
+        summary["Max |Z|"] = pd.Series(extreme.to_numpy()).groupby(flange).max().reindex(
+            range(n)).to_numpy()
+        return summary
+
+    def write_summary(self, filepath: str):
+        """
+        Write the project summary workbook: flange overview, outlier bolts
+        and equipment drift.
+
+        Returns
+        -------
+        str
+            The file path, 0 if it could not be written.
+        """
+        try:
+            scores = self.bolt_scores()
+            with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
+                self.flange_summary(scores).to_excel(writer, sheet_name="Flanges", index=False)
+                scores[scores["Outlier"] != ""].to_excel(writer, sheet_name="Outlier Bolts",
+                                                         index=False)
+                self.equipment_drift().to_excel(writer, sheet_name="Equipment Drift",
+                                                index=False)
+            return filepath
+        except Exception as error:
+            print(error)
+            return 0
+
+
+def summary_filename(project: str) -> str:
+    """Timestamped project summary file name."""
+    ts = dt.strftime(dt.today(), "%Y%m%d_%H%M%S")
+    return f"Summary-{project}-{ts}.xlsx"
+
+
+def diagnostics_filename(summary_path: str) -> str:
+    """Diagnostics export written with a project summary, same name and time."""
+    folder, name = os.path.split(summary_path)
+    return os.path.join(folder, "Diagnostics-" + os.path.splitext(name)[0][len("Summary-"):]
+                        + ".jsonl")
+
+
+def from_analysis_files(filepaths) -> ProjectAnomalies:
+    """Load stored flange analyses, see analysis_store, into a ProjectAnomalies."""
+    from tower_bolt_package.analysis_store import load_analysis
+
+    anomalies = ProjectAnomalies()
+    for filepath in filepaths:
+        try:
+            anomalies.add(load_analysis(filepath))
+        except Exception as error:
+            print(f"Unable to load {filepath}: {error}")
+    return anomalies
+
+
+def latest_per_flange(filepaths) -> list:
+    """
+    Newest analysis file, by modification time, of each project, tower and
+    flange. The same flange is stored twice when its analyses are both next
+    to the flanges and in a report folder, or the report folder is inside
+    the project. Files whose location cannot be read are kept as they are.
+    """
+    from tower_bolt_package.analysis_store import load_diagnostics
+
+    latest = {}
+    for filepath in filepaths:
+        try:
+            location, diagnostics = load_diagnostics(filepath)
+            key = (location["project"], location["tower"], location["flange"])
+            mtime = os.stat(filepath).st_mtime_ns
+        except Exception:
+            key, mtime = os.path.normcase(os.path.abspath(filepath)), 0
+        if key not in latest or mtime > latest[key][0]:
+            latest[key] = (mtime, filepath)
+    return [filepath for mtime, filepath in latest.values()]
+
+
+def write_project_summary(project_path: str, out_dir: str = "") -> str:
+    """
+    Score the stored analyses of a project and write its summary workbook,
+    with the diagnostics of all its flanges in a JSON lines file next to it.
+
+    Parameters
+    ----------
+    project_path : str
+        Project folder.
+    out_dir : str, optional
+        Report folder if reports are not written next to the flanges. Its
+        analyses of the project are included too, the newest analysis of a
+        flange is used if it is stored in both places.
+
+    Returns
+    -------
+    str
+        Path of the summary, 0 if there is nothing to summarise or it could
+        not be written.
+    """
+    from tower_bolt_package.analysis_store import find_analysis_files
+
+    project = os.path.basename(os.path.normpath(project_path))
+    files = find_analysis_files(project_path)
+    if out_dir and os.path.isdir(out_dir):
+        files += [path for path in find_analysis_files(out_dir)
+                  if os.path.basename(path).startswith(f"Analysis-{project}_")]
+    files = latest_per_flange(files)
+    anomalies = from_analysis_files(files)
+    if not len(anomalies):
+        return 0
+    summary = anomalies.write_summary(os.path.join(out_dir or project_path,
+                                                   summary_filename(project)))
+    if summary:
+        try:
+            write_jsonl(files, diagnostics_filename(summary))
+        except OSError as error:
+            print(f"Unable to write the project diagnostics: {error}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score the bolts of a project's stored analyses across flanges and "
+                    "write the project summary.")
+    parser.add_argument("project_path", help="Project folder.")
+    parser.add_argument("--output", default="",
+                        help="Report folder, if reports are not next to the flanges.")
+    args = parser.parse_args()
+
+    path = write_project_summary(args.project_path, args.output)
+    print(f"Summary written: {path}" if path else "No stored analyses to summarise.")
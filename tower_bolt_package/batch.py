@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:12:40 2026
+
+@author: BECHY
+"""
+from collections import deque
+from contextlib import ExitStack
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime as dt
+import os
+import time
+
+import pandas as pd
+
+from tower_bolt_package.governor import GovernedPool, ResourceLimits
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(PACKAGE_DIR, "report_template.xlsx")
+
+# Criteria of this process, loaded on the first job
+_criteria = None
+
+
+def load_criteria(template_path: str = TEMPLATE_PATH) -> pd.DataFrame:
+    """Load the failure criteria from the report template."""
+    return pd.read_excel(template_path, "Failure Criteria", index_col=0, engine='openpyxl')
+
+
+def report_filename(location: dict) -> str:
+    """Timestamped report file name of a flange, without extension."""
+    ts = dt.strftime(dt.today(), "%Y%m%d_%H%M%S")
+    return f"Report-{location['project']}_{location['tower']}_{location['flange']}-{ts}"
+
+
+def default_workers(config: dict = None):
+    """
+    Analysis and rendering worker counts. Taken from the "analysis_workers"
+    and "render_workers" config values if set. Rendering is the slow stage so
+    it gets most of the CPUs by default.
+    """
+    config = config or {}
+    cpus = os.cpu_count() or 1
+    analysis = int(config.get("analysis_workers") or 1 + cpus // 8)
+    render = int(config.get("render_workers") or max(1, cpus - analysis))
+    return analysis, render
+
+
+def init_worker():
+    """Set up a worker process. Reports are drawn without a display."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def make_pool(workers: int = None, limits: ResourceLimits = None, sizing=None):
+    """
+    Process pool for flange report jobs.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    limits : ResourceLimits, optional
+        Worker limits. workers is capped at the limits' max_workers, and a
+        GovernedPool is used if the workers get a lower priority, are
+        recycled or the limits change with the day hours.
+    sizing : callable, optional
+        Worker count for the limits that apply, see GovernedPool.
+    """
+    if limits is not None:
+        active = limits.active()
+        if limits.recycles or active.nice or limits.scheduled:
+            return GovernedPool(workers, limits, init_worker, sizing=sizing)
+        workers = sizing(active) if sizing is not None else active.workers(workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+
+def analyse_flange(flange_path: str, location: dict):
+    """
+    Analyse one flange. First stage of a report job.
+
+    Parameters
+    ----------
+    flange_path : str
+        Flange folder with the round Xml files.
+    location : dict
+        Project, tower and flange names.
+
+    Returns
+    -------
+    flange_obj : Flange
+        The analysed flange, None if it could not be analysed.
+    result : dict
+        location, path, outputs (written files), errors, outcome (Pass/Alert/Fail
+        bolt counts), equipment (history rows, see equipment.equipment_rows)
+        and analysis_seconds.
+    """
+    # Imported here so the pool can start before the report modules load
+    from tower_bolt_package.flange import Flange
+    from tower_bolt_package.status import outcome_of
+    from tower_bolt_package.equipment import equipment_rows
+
+    global _criteria
+    start = time.perf_counter()
+    result = {"location": location, "path": flange_path, "outputs": [], "errors": "",
+              "outcome": None, "equipment": [], "analysis_seconds": 0.0,
+              "render_seconds": 0.0}
+    flange_obj = None
+    try:
+        if _criteria is None:
+            _criteria = load_criteria()
+        f = Flange(flange_path, location, _criteria)
+        f.run()
+        if not f.has_run:
+            result["errors"] = f.errors or "Flange could not be analysed."
+        else:
+            result["errors"] = f.errors
+            result["outcome"] = outcome_of(f)
+            result["equipment"] = equipment_rows(f)
+            flange_obj = f
+    except Exception as error:
+        result["errors"] += f"{type(error).__name__}: {error}"
+    result["analysis_seconds"] = time.perf_counter() - start
+    return flange_obj, result
+
+
+def failed_result(flange_path: str, location: dict, error: BaseException) -> dict:
+    """
+    Result of a flange whose job did not return, e.g. because its worker
+    process died. Same keys as the result of run_flange_job.
+    """
+    return {"location": location, "path": flange_path, "outputs": [],
+            "errors": f"{type(error).__name__}: {error}", "outcome": None, "equipment": [],
+            "analysis_seconds": 0.0, "render_seconds": 0.0, "seconds": 0.0}
+
+
+def render_flange(flange_obj, result: dict, out_dir: str = "",
+                  output_pdf: bool = True, output_excel: bool = True,
+                  store: bool = True) -> dict:
+    """
+    Write the reports of an analysed flange. Second stage of a report job.
+
+    Parameters
+    ----------
+    flange_obj : Flange
+        Flange analysed with analyse_flange.
+    result : dict
+        Result of analyse_flange, updated with the written files.
+    out_dir : str, optional
+        Folder to write the reports to. Defaults to the flange folder.
+    output_pdf, output_excel : bool
+        Report types to write. output_pdf may also be a reporting.PDF_PROFILES
+        name, True is "full".
+    store : bool
+        Also store the analysis results next to the reports, so they can be
+        rendered again without the Xml files.
+    """
+    from tower_bolt_package.reporting import generate_pdf, pdf_profile, write_to_excel
+    from tower_bolt_package.analysis_store import analysis_filename, save_analysis
+
+    start = time.perf_counter()
+    try:
+        output_path = os.path.join(out_dir or result["path"], report_filename(result["location"]))
+        if output_excel:
+            write_to_excel(flange_obj, TEMPLATE_PATH, f"{output_path}.xlsx")
+            result["outputs"].append(f"{output_path}.xlsx")
+        if output_pdf:
+            # Nothing is written if the profile has no page for the flange
+            if generate_pdf(flange_obj, f"{output_path}.pdf", pdf_profile(output_pdf)):
+                result["outputs"].append(f"{output_path}.pdf")
+        if store:
+            save_analysis(flange_obj, os.path.join(out_dir or result["path"],
+                                                   analysis_filename(result["location"])))
+    except Exception as error:
+        result["errors"] += f"{type(error).__name__}: {error}"
+    result["render_seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_flange_job(flange_path: str, location: dict, out_dir: str = "",
+                   output_pdf: bool = True, output_excel: bool = True) -> dict:
+    """
+    Analyse one flange and write its reports in one process. Only plain values
+    are passed in and out, see analyse_flange for the result.
+    """
+    flange_obj, result = analyse_flange(flange_path, location)
+    if flange_obj is not None:
+        render_flange(flange_obj, result, out_dir, output_pdf, output_excel)
+    result["seconds"] = result["analysis_seconds"] + result["render_seconds"]
+    return result
+
+
+class StageStats:
+    """Jobs, worker time and wall time of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.jobs = 0
+        self.busy = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def started(self):
+        if self.first_start is None:
+            self.first_start = time.perf_counter()
+
+    def finished(self, seconds: float):
+        self.jobs += 1
+        self.busy += seconds
+        self.last_end = time.perf_counter()
+
+    @property
+    def wall(self) -> float:
+        """Seconds from the first job start to the last job end."""
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def summary(self) -> str:
+        """One line throughput summary."""
+        if not self.jobs:
+            return f"{self.name}: no flanges ({self.workers} workers)"
+        rate = self.jobs / self.wall * 60 if self.wall else float("inf")
+        return (f"{self.name}: {self.jobs} flanges in {self.wall:.1f} s, {rate:.1f} flanges/min "
+                f"({self.workers} workers, {self.busy / self.jobs:.1f} s per flange, "
+                f"{self.busy / (self.wall * self.workers) if self.wall else 0:.0%} busy)")
+
+
+class ReportPipeline:
+
+    def __init__(self, analysis_workers: int = None, render_workers: int = None,
+                 queue_size: int = None, limits: ResourceLimits = None):
+        """
+        Two stage report pipeline. Flanges are analysed on one process pool,
+        the analysed flanges wait on a bounded queue and are rendered to PDF
+        and Excel on a second pool.
+
+        Attributes
+        ----------
+        analysis_workers, render_workers : int
+            Worker processes of each stage. See default_workers.
+        queue_size : int
+            Most analysed flanges held in memory waiting for a renderer.
+            Analysis pauses while the queue is full. Defaults to twice the
+            render workers.
+        limits : ResourceLimits
+            Worker limits, None for none. The worker counts are capped at
+            its max_workers together, and both stages share one pool if it
+            is below 2. Pools with limits that change with the day hours
+            are resized while running.
+        shared : bool
+            Both stages run on one pool.
+        analysis, render : StageStats
+            Throughput of each stage of the last run.
+
+        Methods
+        -------
+        run(jobs:list, out_dir="", output_pdf=True, output_excel=True, progress=None)
+            Run the jobs and return their results.
+        """
+        default_analysis, default_render = default_workers()
+        self.analysis_workers = analysis_workers or default_analysis
+        self.render_workers = render_workers or default_render
+        self.limits = limits
+        # Worker counts asked for, limits that change with the day hours are
+        # applied to them again while running
+        self.requested = (self.analysis_workers, self.render_workers)
+        self.shared = bool(limits is not None and limits.max_workers
+                           and limits.max_workers < 2)
+        if limits is not None:
+            self.analysis_workers, self.render_workers = limits.active().split(*self.requested)
+        self.pools = []
+        self.queue_size = queue_size or 2 * self.render_workers
+        self.analysis = StageStats("Analysis", self.analysis_workers)
+        self.render = StageStats("Rendering", self.render_workers)
+
+    def run(self, jobs, out_dir: str = "", output_pdf: bool = True,
+            output_excel: bool = True, progress=None, prefetch=None) -> list:
+        """
+        Analyse and render flanges.
+
+        Parameters
+        ----------
+        jobs : list
+            (flange path, location dict) of each flange.
+        out_dir : str, optional
+            Folder to write the reports to. Defaults to each flange folder.
+        output_pdf, output_excel : bool
+            Report types to write.
+        progress : callable, optional
+            Called with (finished jobs, result or None) while running. Return
+            False to cancel; the jobs already started are finished.
+            A job whose worker process dies gives a failed result, see
+            failed_result, and the run goes on with new workers.
+        prefetch : callable, optional
+            Called with the flange paths of the next jobs, to fetch their
+            files while the current ones are analysed, e.g. AsyncFS.prefetch.
+
+        Returns
+        -------
+        results : list
+            Result dict of each finished flange, see analyse_flange.
+        """
+        self.analysis = StageStats("Analysis", self.analysis_workers)
+        self.render = StageStats("Rendering", self.render_workers)
+        todo = deque(jobs)
+        waiting = deque()       # Analysed flanges waiting for a renderer
+        analysing = {}          # Future: (flange path, location)
+        rendering = {}          # Future: analysis result
+        results = []
+        cancelled = False
+
+        with ExitStack() as stack:
+            self.pools = [stack.enter_context(pool) for pool in self._make_pools()]
+
+            def submit(stage, fn, *args):
+                # A pool whose worker died refuses new jobs, it is replaced
+                index = 0 if self.shared else stage
+                try:
+                    return self.pools[index].submit(fn, *args)
+                except BrokenProcessPool:
+                    self.pools[index].shutdown(wait=False)
+                    self.pools[index] = stack.enter_context(self._make_pool(stage))
+                    return self.pools[index].submit(fn, *args)
+
+            while todo or waiting or analysing or rendering:
+                # Keep both pools busy, analysis only while the queue has room
+                while (todo and not cancelled
+                       and len(analysing) < getattr(self.pools[0], "workers",
+                                                    self.analysis_workers)
+                       and len(analysing) + len(waiting) < self.queue_size):
+                    job = todo.popleft()
+                    analysing[submit(0, analyse_flange, *job)] = job
+                    self.analysis.started()
+                    if prefetch is not None:
+                        prefetch([path for path, location in islice(todo, self.queue_size)])
+                while waiting and len(rendering) < getattr(self.pools[-1], "workers",
+                                                           self.render_workers):
+                    flange_obj, result = waiting.popleft()
+                    rendering[submit(1, render_flange, flange_obj, result,
+                                     out_dir, output_pdf, output_excel)] = result
+                    self.render.started()
+                if cancelled:
+                    todo.clear()
+
+                done, _ = wait(set(analysing) | set(rendering), timeout=0.1,
+                               return_when=FIRST_COMPLETED)
+                finished = None
+                for future in done:
+                    if future in analysing:
+                        job = analysing.pop(future)
+                        try:
+                            flange_obj, result = future.result()
+                        except Exception as error:
+                            flange_obj, result = None, failed_result(*job, error)
+                        else:
+                            self.analysis.finished(result["analysis_seconds"])
+                        if flange_obj is None:
+                            result["seconds"] = result["analysis_seconds"]
+                            finished = result
+                            results.append(result)
+                        else:
+                            waiting.append((flange_obj, result))
+                    else:
+                        analysed = rendering.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as error:
+                            result = analysed
+                            result["errors"] += f"{type(error).__name__}: {error}"
+                        else:
+                            self.render.finished(result["render_seconds"])
+                        result["seconds"] = result["analysis_seconds"] + result["render_seconds"]
+                        finished = result
+                        results.append(result)
+                if progress is not None and progress(len(results), finished) is False:
+                    cancelled = True
+        return results
+
+    def _make_pools(self) -> list:
+        """The analysis and render pools, or the one shared pool."""
+        return [self._make_pool(0)] if self.shared else [self._make_pool(0), self._make_pool(1)]
+
+    def _make_pool(self, stage: int):
+        """Pool of a stage, 0 for analysis and 1 for rendering, or the shared pool."""
+        if self.limits is None:
+            return make_pool((self.analysis_workers, self.render_workers)[stage])
+        analysis, render = self.requested
+        if self.shared:
+            return make_pool(analysis + render, self.limits)
+        return make_pool(self.requested[stage], self.limits,
+                         lambda active: active.split(analysis, render)[stage])
+
+    def summary(self) -> str:
+        """Throughput of both stages of the last run."""
+        lines = [self.analysis.summary(), self.render.summary()]
+        names = ("Both stages",) if self.shared else ("Analysis", "Rendering")
+        lines += [f"{name}: {pool.summary()}" for name, pool in zip(names, self.pools)
+                  if isinstance(pool, GovernedPool)]
+        return "\n".join(lines)
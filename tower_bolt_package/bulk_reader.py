@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:58:12 2026
+
+@author: BECHY
+
+Reads archives of round Xml files with one read per file. Each file is loaded
+once, small files with a single read of the size already known from the
+folder listing and large files memory-mapped, and the same buffer is used
+for round detection, content hashing and parsing.
+"""
+import argparse
+from collections import defaultdict
+import hashlib
+import mmap
+import os
+import time
+
+from tower_bolt_package.funcs import parse_round, xml_mentions_round
+from tower_bolt_package.xml_backends import get_backend
+
+
+# Files up to this size are read into memory, larger ones are memory-mapped
+MAP_THRESHOLD = 1 << 20
+ROUNDS = ("first", "second")
+
+
+class XmlFile:
+
+    def __init__(self, path: str, size: int, mtime: float):
+        """
+        One Xml file loaded into a buffer. Use as a context manager, or call
+        close, to release the mapping.
+
+        Attributes
+        ----------
+        path : str
+            File path.
+        size : int
+            File size in bytes.
+        mtime : float
+            Modification time.
+        data : bytes or mmap
+            File content, set by load.
+
+        Methods
+        -------
+        load()
+            Read or map the file.
+        round()
+            "first"/"second" from the file name or content, like discover_xmls.
+        digest()
+            MD5 of the content, like verify_duplicates_by_content.
+        parse(backend=None)
+            RoundData of the content, like parse_round.
+        """
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.data = None
+        self._digest = None
+
+    def load(self) -> "XmlFile":
+        """Read the file, or map it if it is larger than MAP_THRESHOLD."""
+        fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            if self.size > MAP_THRESHOLD:
+                self.data = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            else:
+                # One read of the listed size, one byte more shows a file that grew
+                data = os.read(fd, self.size + 1)
+                if len(data) != self.size:
+                    # Short read or changed since listed, read to the end
+                    chunks = [data]
+                    while chunks[-1]:
+                        chunks.append(os.read(fd, MAP_THRESHOLD))
+                    data = b"".join(chunks)
+                self.data = data
+        finally:
+            os.close(fd)
+        return self
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+
+    def __enter__(self):
+        if self.data is None:
+            self.load()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def round(self) -> str:
+        """
+        Round of the file, from the file name or else the program id in the
+        content. None if neither names a round.
+        """
+        name = os.path.basename(self.path).lower()
+        for keyphrase in ROUNDS:
+            if keyphrase in name:
+                return keyphrase
+        for keyphrase in ROUNDS:
+            if xml_mentions_round(self.data, keyphrase):
+                return keyphrase
+        return None
+
+    def digest(self) -> str:
+        """MD5 hex digest of the content."""
+        if self._digest is None:
+            self._digest = hashlib.md5(self.data).hexdigest()
+        return self._digest
+
+    def parse(self, backend=None):
+        """Header and bolt record data of the content, None if it can not be parsed."""
+        return parse_round(self.data, backend, path=self.path)
+
+
+def iter_folder(folderpath: str):
+    """
+    Xml files of one folder, not loaded yet. Sizes come from the folder
+    listing, so loading a file needs no separate stat call.
+    """
+    try:
+        with os.scandir(folderpath) as entries:
+            entries = [entry for entry in entries
+                       if entry.is_file() and '.xml' in entry.name.lower()]
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            info = entry.stat()
+        except OSError:
+            continue
+        yield XmlFile(entry.path, info.st_size, info.st_mtime)
+
+
+def iter_archive(root_path: str):
+    """Xml files below a folder, folder by folder, not loaded yet."""
+    for folderpath, dirs, files in os.walk(root_path):
+        dirs.sort()
+        if any('.xml' in name.lower() for name in files):
+            yield from iter_folder(folderpath)
+
+
+class BulkReader:
+
+    def __init__(self, backend=None, parse: bool = True):
+        """
+        Processes an archive of round Xml files reading each file once.
+
+        Attributes
+        ----------
+        backend : optional
+            Xml parser backend, see xml_backends.get_backend.
+        parse : bool
+            Parse the files. Otherwise only the round and digest are found.
+        files, bytes, mapped : int
+            Files and bytes read and files memory-mapped in the last scan.
+
+        Methods
+        -------
+        scan(root_path:str)
+            Round, digest and parsed data of every Xml file below a folder.
+        duplicates(entries:list)
+            Groups of files with identical content.
+        """
+        self.backend = backend if backend is not None else get_backend()
+        self.parse = parse
+        self.files = 0
+        self.bytes = 0
+        self.mapped = 0
+
+    def read(self, xml_file: XmlFile) -> dict:
+        """Round, digest and parsed data of one file from one read."""
+        with xml_file:
+            self.files += 1
+            self.bytes += len(xml_file.data)
+            self.mapped += isinstance(xml_file.data, mmap.mmap)
+            return {"path": xml_file.path,
+                    "size": xml_file.size,
+                    "mtime": xml_file.mtime,
+                    "round": xml_file.round(),
+                    "md5": xml_file.digest(),
+                    "data": xml_file.parse(self.backend) if self.parse else None}
+
+    def scan(self, root_path: str) -> list:
+        """
+        Read every Xml file below a folder once.
+
+        Returns
+        -------
+        entries : list
+            Dict per file with path, size, mtime, round ("first", "second" or
+            None), md5 and data (RoundData, None if not parsed or unparsable).
+        """
+        self.files = self.bytes = self.mapped = 0
+        entries = []
+        for xml_file in iter_archive(root_path):
+            try:
+                entries.append(self.read(xml_file))
+            except OSError as error:
+                print(f"Unable to read {xml_file.path}: {error}")
+        return entries
+
+    @staticmethod
+    def duplicates(entries: list) -> list:
+        """Groups of two or more file paths with identical content."""
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[(entry["size"], entry["md5"])].append(entry["path"])
+        return [paths for paths in groups.values() if len(paths) > 1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Read an archive of round Xml files once each and summarise it.")
+    parser.add_argument("folder", help="Archive folder.")
+    parser.add_argument("--backend", default=None, help="Xml parser backend.")
+    parser.add_argument("--no-parse", action="store_true",
+                        help="Only find rounds and duplicates.")
+    args = parser.parse_args()
+
+    reader = BulkReader(get_backend(args.backend), parse=not args.no_parse)
+    start = time.perf_counter()
+    entries = reader.scan(args.folder)
+    seconds = time.perf_counter() - start
+    rounds = defaultdict(int)
+    for entry in entries:
+        rounds[entry["round"]] += 1
+    print(f"{reader.files} files, {reader.bytes / 1e6:.1f} MB ({reader.mapped} mapped) "
+          f"in {seconds:.2f} s")
+    print(f"First round: {rounds['first']}, second round: {rounds['second']}, "
+          f"unknown: {rounds[None]}")
+    if not args.no_parse:
+        print(f"Unparsable: {sum(entry['data'] is None for entry in entries)}")
+    for group in reader.duplicates(entries):
+        print("Duplicates:", ", ".join(group))
@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:31:12 2026
+
+@author: BECHY
+
+Append-only binary store of the cycle level bolt data. Every record of every
+round Xml file is kept, including the records superseded by a later one of
+the same bolt, with each of its BoltRotationAngleCycleN values, so the cycle
+history of thousands of flanges can be read back without parsing Xml.
+
+The store is a folder with
+    records.bin   packed RECORD_DTYPE rows, one per bolt record
+    angles.bin    float64 cycle angles, angle_count per record from angle_start
+    catalog.jsonl one line per stored Xml file with its row ranges
+    index.npz     records sorted by flange and bolt, rebuilt when stale
+A file stored again is appended and its catalog line replaces the old one.
+"""
+import argparse
+from datetime import datetime as dt
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package.bulk_reader import iter_archive
+from tower_bolt_package.funcs import cache_dir, latest_rows, read_round_rows
+from tower_bolt_package.records import CYCLE_PATTERN, to_timestamps
+
+
+RECORD_DTYPE = np.dtype([("flange", "<i4"),         # Flange id, see CycleStore.flange_id
+                         ("round", "i1"),           # 1 first, 2 second, 0 unknown
+                         ("seq", "<i4"),            # Record number in the Xml file
+                         ("bolt_no", "<i2"),
+                         ("latest", "?"),           # Record parse_round keeps for the bolt
+                         ("timestamp", "<i8"),      # Record Date in ns, NO_TIMESTAMP if unparsed
+                         ("total", "<f8"),          # BoltRotationAngle
+                         ("cycles", "<i2"),         # Highest cycle number of the record
+                         ("angle_start", "<i8"),
+                         ("angle_count", "<i2")])
+CYCLE_DTYPE = np.dtype([("flange", "<i4"), ("round", "i1"), ("seq", "<i4"),
+                        ("bolt_no", "<i2"), ("latest", "?"), ("cycle", "<i2"),
+                        ("angle", "<f8")])
+ROUNDS = {"first": 1, "second": 2}
+RECORDS_FILE = "records.bin"
+ANGLES_FILE = "angles.bin"
+CATALOG_FILE = "catalog.jsonl"
+INDEX_FILE = "index.npz"
+
+
+def default_store_path() -> str:
+    return os.path.join(cache_dir(), "cycle_store")
+
+
+def _float(value) -> float:
+    """Record value as float, NaN for missing values."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def round_arrays(rows: list, flange: int, round_number: int, angle_offset: int):
+    """
+    Packed records and cycle angles of the rows of one round file.
+
+    Parameters
+    ----------
+    rows : list
+        Record dicts from funcs.read_round_rows.
+    flange, round_number : int
+        Flange id and round number stored with every record.
+    angle_offset : int
+        Angles already in the store, the start of this file's angles.
+
+    Returns
+    -------
+    records : numpy structured array
+        RECORD_DTYPE row per record with a bolt number. A Cycles value that
+        is not a number is taken from the cycle angle columns.
+    angles : numpy array
+        float64 cycle angles of the records, NaN where a cycle is missing.
+    """
+    timestamps = to_timestamps([row.get("Date") for row in rows])
+    latest = set(latest_rows(rows, timestamps).values())
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    angles = []
+    n = 0
+    for seq, row in enumerate(rows):
+        try:
+            bolt_no = int(row["BoltNo"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        numbers = [int(match.group(1)) for name in row
+                   for match in [CYCLE_PATTERN.match(name)] if match]
+        count = max(numbers, default=0)
+        try:
+            cycles = int(row["Cycles"])
+        except (KeyError, TypeError, ValueError):
+            cycles = count
+        cycle_angles = [np.nan] * count
+        for number in numbers:
+            cycle_angles[number - 1] = _float(row[f"BoltRotationAngleCycle{number}"])
+        records[n] = (flange, round_number, seq, bolt_no, seq in latest, timestamps[seq],
+                      _float(row.get("BoltRotationAngle")), cycles,
+                      angle_offset + len(angles), count)
+        angles += cycle_angles
+        n += 1
+    return records[:n], np.array(angles, dtype=np.float64)
+
+
+class CycleStore:
+
+    def __init__(self, folder: str = None):
+        """
+        Append-only store of every bolt record and cycle angle of the
+        stored round Xml files.
+
+        Attributes
+        ----------
+        folder : str
+            Store folder. Defaults to cycle_store/ in the tool's cache folder.
+        catalog : list
+            Dict per stored file with project, tower, flange, flange id,
+            round, path, size, mtime, header date and its row ranges. Only
+            the latest entry of each path is current.
+
+        Methods
+        -------
+        add_file(location:dict, path:str, round:str, data=None)
+            Store the records of one round Xml file.
+        add_folder(root_path:str)
+            Store the changed round Xml files below a folder.
+        files()
+            The current catalog as a dataframe.
+        records(project=None, tower=None, flange=None, bolt=None, ...)
+            Matching records, see RECORD_DTYPE.
+        cycles(...)
+            The same records with one row per cycle, see CYCLE_DTYPE.
+        iter_flanges(...)
+            (location, records, cycles) one flange at a time.
+        """
+        self.folder = folder or default_store_path()
+        os.makedirs(self.folder, exist_ok=True)
+        self.catalog = []
+        self.flange_ids = {}
+        self._current = {}      # path -> index of its current catalog entry
+        self.n_records = 0      # Rows covered by the catalog, rows after them
+        self.n_angles = 0       # are from an interrupted add
+        self._catalog_bytes = 0
+        catalog_path = os.path.join(self.folder, CATALOG_FILE)
+        if os.path.exists(catalog_path):
+            with open(catalog_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        entry = json.loads(line)
+                    except ValueError:
+                        break       # Line cut short by an interrupted write
+                    self._catalog_add(entry)
+                    self._catalog_bytes += len(line)
+        self._records = None
+        self._angles = None
+        self._index = None
+
+    def _catalog_add(self, entry: dict):
+        key = (entry["project"], entry["tower"], entry["flange"])
+        self.flange_ids.setdefault(key, entry["id"])
+        self._current[entry["path"]] = len(self.catalog)
+        self.catalog.append(entry)
+        self.n_records = max(self.n_records, entry["records"][1])
+        self.n_angles = max(self.n_angles, entry["angles"][1])
+
+    def __len__(self) -> int:
+        return self.n_records
+
+    def flange_id(self, location: dict) -> int:
+        """Id of a flange, a new one for a flange not stored yet."""
+        key = (location["project"], location["tower"], location["flange"])
+        if key not in self.flange_ids:
+            self.flange_ids[key] = len(self.flange_ids)
+        return self.flange_ids[key]
+
+    def is_current(self, path: str, size: int, mtime: float) -> bool:
+        """True if the file is stored with this size and modification time."""
+        index = self._current.get(path)
+        return (index is not None and self.catalog[index]["size"] == size and
+                self.catalog[index]["mtime"] == mtime)
+
+    def _append(self, filename: str, data, size: int):
+        """Append to a store file, dropping the bytes of an interrupted add first."""
+        path = os.path.join(self.folder, filename)
+        with open(path, "ab") as f:
+            if f.tell() != size:
+                f.truncate(size)
+                f.seek(size)
+            f.write(data if isinstance(data, bytes) else data.tobytes())
+
+    def add_file(self, location: dict, path: str, round: str, data=None,
+                 backend=None) -> int:
+        """
+        Store the records of one round Xml file.
+
+        Parameters
+        ----------
+        location : dict
+            Project, tower and flange of the file.
+        path : str
+            Xml file path, the key of the file in the catalog.
+        round : str
+            "first", "second" or None if not known.
+        data : bytes-like, optional
+            File content already read, e.g. by bulk_reader.
+        backend : optional
+            Xml parser backend.
+
+        Returns
+        -------
+        int
+            Records stored.
+        """
+        info = os.stat(path)
+        header_pairs, rows, columns = read_round_rows(path if data is None else data, backend)
+        flange = self.flange_id(location)
+        records, angles = round_arrays(rows, flange, ROUNDS.get(round, 0), self.n_angles)
+        start, angle_start = self.n_records, self.n_angles
+        self._append(RECORDS_FILE, records, start * RECORD_DTYPE.itemsize)
+        self._append(ANGLES_FILE, angles, angle_start * angles.itemsize)
+        entry = {"id": flange, "project": location["project"], "tower": location["tower"],
+                 "flange": location["flange"], "round": round, "path": path,
+                 "size": info.st_size, "mtime": info.st_mtime,
+                 "date": dict(header_pairs).get("Date"),
+                 "records": [start, start + len(records)],
+                 "angles": [angle_start, angle_start + len(angles)],
+                 "added": dt.now().isoformat(timespec="seconds")}
+        # The catalog line commits the rows written above
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        self._append(CATALOG_FILE, line, self._catalog_bytes)
+        self._catalog_bytes += len(line)
+        self._catalog_add(entry)
+        self._records = self._angles = self._index = None
+        return len(records)
+
+    def add_folder(self, root_path: str, backend=None) -> int:
+        """
+        Store the round Xml files below a folder that are new or changed
+        since they were stored. The project, tower and flange are the last
+        three folder names of each file.
+
+        Returns
+        -------
+        int
+            Records stored.
+        """
+        count = 0
+        for xml_file in iter_archive(root_path):
+            if self.is_current(xml_file.path, xml_file.size, xml_file.mtime):
+                continue
+            parts = os.path.normpath(os.path.dirname(os.path.abspath(xml_file.path))).split(os.sep)
+            location = dict(zip(("project", "tower", "flange"), ([""] * 3 + parts)[-3:]))
+            try:
+                with xml_file:
+                    count += self.add_file(location, xml_file.path, xml_file.round(),
+                                           xml_file.data, backend)
+            except Exception as error:
+                print(f"Unable to store {xml_file.path}: {error}")
+        return count
+
+    def _data(self):
+        """Memory-mapped records and angles covered by the catalog."""
+        if self._records is None:
+            self._records = self._map(RECORDS_FILE, RECORD_DTYPE, self.n_records)
+            self._angles = self._map(ANGLES_FILE, np.dtype(np.float64), self.n_angles)
+        return self._records, self._angles
+
+    def _map(self, filename: str, dtype: np.dtype, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.folder, filename), dtype=dtype, mode="r",
+                         shape=(count,))
+
+    def current_mask(self) -> np.ndarray:
+        """Records of the current catalog entries, not replaced by a later add."""
+        mask = np.zeros(self.n_records, dtype=bool)
+        for index in self._current.values():
+            start, stop = self.catalog[index]["records"]
+            mask[start:stop] = True
+        return mask
+
+    def index(self):
+        """
+        Current records sorted by flange, bolt, round and record number.
+
+        Returns
+        -------
+        keys : numpy array
+            Sorted int64 flange << 16 | bolt keys, for searchsorted.
+        order : numpy array
+            Record rows in key order.
+        """
+        if self._index is None:
+            path = os.path.join(self.folder, INDEX_FILE)
+            n = self.n_records
+            try:
+                with np.load(path) as saved:
+                    if int(saved["n_records"]) == n and int(saved["n_files"]) == len(self.catalog):
+                        self._index = (saved["keys"], saved["order"])
+            except (OSError, KeyError, ValueError):
+                pass
+            if self._index is None:
+                records = self._data()[0]
+                rows = np.flatnonzero(self.current_mask())
+                current = records[rows]
+                keys = self._keys(current["flange"], current["bolt_no"])
+                sort = np.lexsort((current["seq"], current["round"], keys))
+                keys, order = keys[sort], rows[sort]
+                self._index = (keys, order)
+                np.savez(path, keys=keys, order=order, n_records=n, n_files=len(self.catalog))
+        return self._index
+
+    @staticmethod
+    def _keys(flange, bolt_no) -> np.ndarray:
+        return (np.asarray(flange, dtype=np.int64) << 16) | (np.asarray(bolt_no, dtype=np.int64) & 0xFFFF)
+
+    def _flange_ids(self, project=None, tower=None, flange=None) -> list:
+        return [flange_id for (p, t, f), flange_id in self.flange_ids.items()
+                if (project is None or p == project) and (tower is None or t == tower) and
+                (flange is None or f == flange)]
+
+    def rows(self, project: str = None, tower: str = None, flange: str = None,
+             bolt: int = None, round: str = None, latest_only: bool = False) -> np.ndarray:
+        """Record rows of the matching current records, in index order."""
+        keys, order = self.index()
+        parts = []
+        for flange_id in sorted(self._flange_ids(project, tower, flange)):
+            if bolt is None:
+                lo, hi = self._keys(flange_id, 0), self._keys(flange_id + 1, 0)
+            else:
+                lo = self._keys(flange_id, bolt)
+                hi = lo + 1
+            parts.append(order[np.searchsorted(keys, lo):np.searchsorted(keys, hi)])
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        records = self._data()[0]
+        if round is not None:
+            rows = rows[records["round"][rows] == ROUNDS.get(round, 0)]
+        if latest_only:
+            rows = rows[records["latest"][rows]]
+        return rows
+
+    def records(self, **criteria) -> np.ndarray:
+        """
+        Matching records, see rows for the criteria.
+
+        Returns
+        -------
+        numpy structured array
+            RECORD_DTYPE rows sorted by flange, bolt, round and record number.
+        """
+        return np.array(self._data()[0][self.rows(**criteria)])
+
+    def cycles(self, **criteria) -> np.ndarray:
+        """
+        Cycle angles of the matching records, one CYCLE_DTYPE row per
+        cycle, see rows for the criteria.
+        """
+        records, angles = self._data()
+        return self._expand(np.array(records[self.rows(**criteria)]), angles)
+
+    @staticmethod
+    def _expand(records: np.ndarray, angles: np.ndarray) -> np.ndarray:
+        counts = records["angle_count"].astype(np.int64)
+        out = np.zeros(int(counts.sum()), dtype=CYCLE_DTYPE)
+        owner = np.repeat(np.arange(len(records)), counts)
+        starts = np.cumsum(counts) - counts
+        cycle = np.arange(len(out)) - starts[owner]
+        for name in ("flange", "round", "seq", "bolt_no", "latest"):
+            out[name] = records[name][owner]
+        out["cycle"] = cycle + 1
+        out["angle"] = angles[records["angle_start"][owner] + cycle]
+        return out
+
+    def iter_flanges(self, project: str = None, tower: str = None, latest_only: bool = False):
+        """
+        Stream the stored flanges one at a time.
+
+        Yields
+        ------
+        location : dict
+            Project, tower and flange.
+        records : numpy structured array
+            RECORD_DTYPE records of the flange.
+        cycles : numpy structured array
+            CYCLE_DTYPE cycle angles of the flange.
+        """
+        names = {flange_id: key for key, flange_id in self.flange_ids.items()}
+        records, angles = self._data()
+        for flange_id in sorted(self._flange_ids(project, tower)):
+            rows = self.rows(*names[flange_id], latest_only=latest_only)
+            selected = np.array(records[rows])
+            yield (dict(zip(("project", "tower", "flange"), names[flange_id])),
+                   selected, self._expand(selected, angles))
+
+    def files(self) -> pd.DataFrame:
+        """Current catalog entries, one row per stored file."""
+        entries = [self.catalog[index] for index in sorted(self._current.values())]
+        frame = pd.DataFrame(entries, columns=["id", "project", "tower", "flange", "round",
+                                               "path", "size", "mtime", "date", "records",
+                                               "angles", "added"])
+        frame["records"] = [stop - start for start, stop in frame["records"]]
+        frame["angles"] = [stop - start for start, stop in frame["angles"]]
+        return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cycle level store of every bolt record of the round Xml files.")
+    parser.add_argument("--store", default=None, help="Store folder. Defaults to the cache folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Store the new and changed Xml files below a folder.")
+    add.add_argument("folder")
+    show = commands.add_parser("show", help="List the stored files, or the cycles of a flange.")
+    show.add_argument("project", nargs="?", default=None)
+    show.add_argument("tower", nargs="?", default=None)
+    show.add_argument("flange", nargs="?", default=None)
+    show.add_argument("--bolt", type=int, default=None)
+    show.add_argument("--latest", action="store_true", help="Only the records parse_round keeps.")
+    args = parser.parse_args()
+
+    store = CycleStore(args.store)
+    if args.command == "add":
+        count = store.add_folder(args.folder)
+        print(f"{count} records stored, {len(store)} records of {len(store.flange_ids)} "
+              f"flanges in {store.folder}")
+    elif args.flange is None:
+        print(store.files().drop(columns=["path", "mtime"]).to_string(index=False))
+    else:
+        cycles = pd.DataFrame(store.cycles(project=args.project, tower=args.tower,
+                                           flange=args.flange, bolt=args.bolt,
+                                           latest_only=args.latest))
+        print(cycles.drop(columns=["flange"]).to_string(index=False))
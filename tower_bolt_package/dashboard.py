@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:24:37 2026
+
+@author: BECHY
+
+Results dashboard served over HTTP from a local process. The analysis files
+below the parent folder are loaded once into an in-memory index and served
+as compact JSON; the browser pages through projects, towers and flanges and
+draws the bolt rotation chart itself, so a flange is reviewed without
+opening its PDF. Only the standard library is used.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import os
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from tower_bolt_package.analysis_store import find_analysis_files, load_analysis
+from tower_bolt_package.diagnostics import SEVERITIES
+from tower_bolt_package.funcs import latest_pdf_in_folder
+from tower_bolt_package.status import OUTCOME_LEVELS, outcome_of
+
+
+PORT = 8765
+PAGE_SIZE = 100
+# Seconds between checks of the parent folder for new or changed analyses
+REFRESH_INTERVAL = 10.0
+WORKERS = 4
+# Responses smaller than this are not compressed
+GZIP_MIN_BYTES = 1024
+
+CYCLE_COLUMNS = [("First Round", "Cycle 1"), ("First Round", "Cycle 2"),
+                 ("First Round", "Cycle 3+"), ("Second Round", "Cycle 1"),
+                 ("Second Round", "Cycle 2"), ("Second Round", "Cycle 3+")]
+
+
+def flange_id(filepath: str) -> str:
+    """Short stable id of an analysis file, used in the urls."""
+    return hashlib.md5(os.path.normcase(filepath).encode("utf-8")).hexdigest()[:12]
+
+
+def _number(value, digits: int = 1):
+    """Rounded float for JSON, None for NaN."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else round(value, digits)
+
+
+def _text(value):
+    return None if value is None or value != value else str(value)
+
+
+def flange_summary(flange_obj, filepath: str) -> dict:
+    """One row of the flange list: location, totals and approval counts."""
+    outcome = outcome_of(flange_obj) or {}
+    level = next((name for name in reversed(OUTCOME_LEVELS) if outcome.get(name)), "Pass")
+    severities = [item.severity for item in flange_obj.diagnostics]
+    location = flange_obj.location
+    return {"id": flange_id(filepath),
+            "project": location["project"], "tower": location["tower"],
+            "flange": location["flange"],
+            "level": level,
+            "outcome": outcome,
+            "mean": _number(flange_obj.stats.total_mean),
+            "std": _number(flange_obj.stats.total_std),
+            "required": _number(flange_obj.required_rotation),
+            "worst": max(severities, key=SEVERITIES.index) if severities else None,
+            "issues": len(severities),
+            "report": latest_pdf_in_folder(os.path.dirname(filepath)) is not None}
+
+
+def flange_detail(flange_obj, filepath: str) -> dict:
+    """
+    Everything the flange page shows, column-wise: one list per record
+    column instead of one object per bolt, rotations to 0.1 degrees.
+    """
+    records = flange_obj.records.sort_values(by=["BoltNo"])
+    headers = flange_obj.headers
+    return {
+        "summary": flange_summary(flange_obj, filepath),
+        "bolts": [int(bolt_no) for bolt_no in records[("BoltNo", "")]],
+        "cycles": [[_number(value) for value in records[column]] for column in CYCLE_COLUMNS],
+        "round1": [_number(value) for value in records[("First Round", "Round Total")]],
+        "round2": [_number(value) for value in records[("Second Round", "Round Total")]],
+        "total": [_number(value) for value in records[("Total Rotation", "")]],
+        "approval": [_text(value) for value in records[("Approval", "")]],
+        "stats": {"mean": [_number(value) for value in flange_obj.stats.mean],
+                  "std": [_number(value) for value in flange_obj.stats.std]},
+        "headers": [[name] + [_text(value) for value in row]
+                    for name, row in zip(headers.index, headers.to_numpy().tolist())],
+        "header_columns": [str(column) for column in headers.columns],
+        "diagnostics": [item.to_dict() for item in flange_obj.diagnostics],
+    }
+
+
+class ResultsIndex:
+
+    def __init__(self, parent_path: str, workers: int = WORKERS,
+                 refresh_interval: float = REFRESH_INTERVAL):
+        """
+        In-memory index of the analysis files below the parent folder. Files
+        are loaded once and again only when their modification time changes.
+
+        Attributes
+        ----------
+        parent_path : str
+            Folder searched for analysis files.
+        workers : int
+            Analysis files loaded at the same time.
+        refresh_interval : float
+            Seconds between two searches of the parent folder by the server.
+        version : int
+            Increased whenever a flange is added, changed or removed.
+
+        Methods
+        -------
+        refresh()
+            Load new and changed analysis files.
+        projects()
+            Flange and approval counts per project.
+        flanges(project=None, tower=None, offset=0, limit=PAGE_SIZE)
+            One page of flange summaries.
+        detail(flange_id:str)
+            Chart and table data of one flange.
+        """
+        self.parent_path = parent_path
+        self.workers = workers
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.errors = {}
+        self._entries = {}          # flange id: (filepath, mtime_ns, summary, detail)
+        self._order = []            # flange ids by project, tower, flange
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _load(self, filepath: str, mtime_ns: int):
+        try:
+            flange_obj = load_analysis(filepath)
+            return (filepath, mtime_ns, flange_summary(flange_obj, filepath),
+                    flange_detail(flange_obj, filepath)), None
+        except Exception as error:
+            return None, f"{type(error).__name__}: {error}"
+
+    def refresh(self) -> int:
+        """
+        Search the parent folder and load the analysis files that are new or
+        changed. Requests arriving during a refresh are served from the
+        current index.
+
+        Returns
+        -------
+        int
+            Number of files loaded.
+        """
+        with self._refresh_lock:
+            found = {}
+            for filepath in find_analysis_files(self.parent_path):
+                try:
+                    found[flange_id(filepath)] = (filepath, os.stat(filepath).st_mtime_ns)
+                except OSError:
+                    pass
+            stale = [(key, filepath, mtime_ns) for key, (filepath, mtime_ns) in found.items()
+                     if key not in self._entries or self._entries[key][1] != mtime_ns]
+            loaded = []
+            if stale:
+                with ThreadPoolExecutor(self.workers) as pool:
+                    loaded = list(pool.map(lambda item: (item[0],) + self._load(*item[1:]), stale))
+
+            with self._lock:
+                changed = bool(stale) or set(self._entries) != set(found)
+                for key in set(self._entries) - set(found):
+                    del self._entries[key]
+                for key, entry, error in loaded:
+                    if entry is None:
+                        self.errors[found[key][0]] = error
+                        self._entries.pop(key, None)
+                    else:
+                        self.errors.pop(entry[0], None)
+                        self._entries[key] = entry
+                if changed:
+                    self._order = sorted(
+                        self._entries,
+                        key=lambda key: tuple(self._entries[key][2][name].lower()
+                                              for name in ("project", "tower", "flange")))
+                    self.version += 1
+            return len(stale)
+
+    def projects(self) -> list:
+        """Flange count and approval level counts of each project."""
+        projects = {}
+        with self._lock:
+            for key in self._order:
+                summary = self._entries[key][2]
+                project = projects.setdefault(summary["project"], {
+                    "project": summary["project"], "towers": set(), "flanges": 0,
+                    **{name: 0 for name in OUTCOME_LEVELS}})
+                project["towers"].add(summary["tower"])
+                project["flanges"] += 1
+                project[summary["level"]] += 1
+        return [dict(project, towers=sorted(project["towers"])) for project in projects.values()]
+
+    def flanges(self, project: str = None, tower: str = None, level: str = None,
+                offset: int = 0, limit: int = PAGE_SIZE) -> dict:
+        """
+        One page of flange summaries, in project, tower and flange order.
+
+        Returns
+        -------
+        dict
+            total matching flanges, offset and the items of the page.
+        """
+        with self._lock:
+            summaries = [self._entries[key][2] for key in self._order]
+        summaries = [summary for summary in summaries
+                     if (project is None or summary["project"] == project)
+                     and (tower is None or summary["tower"] == tower)
+                     and (level is None or summary["level"] == level)]
+        return {"total": len(summaries), "offset": offset,
+                "items": summaries[offset:offset + limit]}
+
+    def detail(self, key: str) -> dict:
+        """Chart and table data of a flange, None if not in the index."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry[3]
+
+    def report(self, key: str) -> str:
+        """Latest report PDF of a flange, None if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else latest_pdf_in_folder(os.path.dirname(entry[0]))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Serves the page, the JSON api and the report PDFs of the server's index."""
+    server_version = "TowerBoltDashboard/1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        index = self.server.index
+        try:
+            if url.path == "/":
+                self.send_body(PAGE.encode("utf-8"), "text/html; charset=utf-8")
+            elif url.path == "/api/projects":
+                self.send_json(index.projects(), etag=f"p{index.version}")
+            elif url.path == "/api/flanges":
+                offset = max(int(query.get("offset", 0)), 0)
+                limit = min(max(int(query.get("limit", PAGE_SIZE)), 1), 1000)
+                self.send_json(index.flanges(query.get("project"), query.get("tower"),
+                                             query.get("level"), offset, limit),
+                               etag=f"f{index.version}-{hashlib.md5(url.query.encode()).hexdigest()}")
+            elif url.path.startswith("/api/flange/"):
+                detail = index.detail(url.path.rsplit("/", 1)[-1])
+                if detail is None:
+                    self.send_error(404, "Flange not found")
+                else:
+                    self.send_json(detail)
+            elif url.path.startswith("/report/"):
+                self.send_report(index.report(url.path.rsplit("/", 1)[-1]))
+            else:
+                self.send_error(404)
+        except ValueError:
+            self.send_error(400, "Invalid offset or limit")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_json(self, data, etag: str = None):
+        if etag is not None:
+            etag = f'"{etag}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.send_body(body, "application/json", etag)
+
+    def send_body(self, body: bytes, content_type: str, etag: str = None):
+        gzipped = (len(body) >= GZIP_MIN_BYTES
+                   and "gzip" in self.headers.get("Accept-Encoding", ""))
+        if gzipped:
+            body = gzip.compress(body, 5)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_report(self, filepath: str):
+        if filepath is None:
+            self.send_error(404, "No report for this flange")
+            return
+        with open(filepath, "rb") as f:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Content-Disposition",
+                             f'inline; filename="{os.path.basename(filepath)}"')
+            self.end_headers()
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                self.wfile.write(chunk)
+
+
+class DashboardServer(ThreadingHTTPServer):
+    """
+    HTTP server of a ResultsIndex, one thread per request. The index is
+    refreshed in a background thread, never while a request waits.
+    """
+    daemon_threads = True
+
+    def __init__(self, index: ResultsIndex, host: str = "127.0.0.1", port: int = PORT,
+                 verbose: bool = False):
+        super().__init__((host, port), DashboardHandler)
+        self.index = index
+        self.verbose = verbose
+        self._stop = threading.Event()
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.index.refresh()
+            except OSError as error:
+                print(f"Unable to refresh the dashboard index: {error}")
+            if self._stop.wait(self.index.refresh_interval):
+                return
+
+    def server_close(self):
+        self._stop.set()
+        super().server_close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if host in ("0.0.0.0", ""):
+            import socket
+            host = socket.gethostname()
+        return f"http://{host}:{port}/"
+
+
+def start_dashboard(parent_path: str, host: str = "127.0.0.1", port: int = PORT) -> DashboardServer:
+    """
+    Serve the analyses below a folder from a background thread. Returns at
+    once, flanges show up as the index loads them. Stop with
+    server.shutdown() and server.server_close().
+    """
+    server = DashboardServer(ResultsIndex(parent_path), host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Single page browser. The chart follows the report: first round cycles in
+# Blue Sky 01, second round in Earth Orange, round 1 total white, total black.
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Flange Results</title>
+<style>
+body{font-family:Segoe UI,Arial,sans-serif;margin:0;color:#231F20;font-size:14px}
+header{background:#1D3144;color:#fff;padding:8px 16px}
+main{display:flex;height:calc(100vh - 40px)}
+nav{width:420px;overflow:auto;border-right:1px solid #E3E5E8}
+section{flex:1;overflow:auto;padding:12px 16px}
+select{margin:8px 4px}
+table{border-collapse:collapse}
+td,th{padding:2px 6px;border-bottom:1px solid #E3E5E8;text-align:left;white-space:nowrap}
+nav tr{cursor:pointer} nav tr:hover{background:#E3E5E8}
+.Pass{color:#19736E}.Alert{color:#E17D28}.Fail,.Error{color:#772219;font-weight:bold}
+button{margin:8px}
+</style></head><body>
+<header><b>Flange Results</b> <span id="count"></span></header>
+<main><nav>
+<select id="project"><option value="">All projects</option></select>
+<select id="level"><option value="">All</option><option>Fail</option><option>Alert</option><option>Pass</option></select>
+<table><thead><tr><th>Tower</th><th>Flange</th><th>Result</th><th>Mean</th><th>SD</th></tr></thead>
+<tbody id="list"></tbody></table>
+<button id="more">Load more</button>
+</nav><section id="detail">Select a flange.</section></main>
+<script>
+const PAGE_SIZE = 100;
+let offset = 0, total = 0;
+const $ = id => document.getElementById(id);
+const esc = s => String(s == null ? "" : s).replace(/[&<>"]/g, c => ({"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;"})[c]);
+async function get(url) { const r = await fetch(url); if (!r.ok) throw new Error(r.status); return r.json(); }
+async function loadProjects() {
+  const projects = await get("/api/projects");
+  $("project").innerHTML = '<option value="">All projects</option>' + projects.map(p =>
+    `<option value="${esc(p.project)}">${esc(p.project)} (${p.flanges}, ${p.Fail} fail)</option>`).join("");
+}
+async function loadFlanges(reset) {
+  if (reset) { offset = 0; $("list").innerHTML = ""; }
+  const q = new URLSearchParams({offset, limit: PAGE_SIZE});
+  if ($("project").value) q.set("project", $("project").value);
+  if ($("level").value) q.set("level", $("level").value);
+  const page = await get("/api/flanges?" + q);
+  total = page.total; offset += page.items.length;
+  $("list").insertAdjacentHTML("beforeend", page.items.map(f =>
+    `<tr data-id="${f.id}" title="${esc(f.project)}"><td>${esc(f.tower)}</td><td>${esc(f.flange)}</td>` +
+    `<td class="${f.level}">${f.level}</td><td>${f.mean ?? ""}</td><td>${f.std ?? ""}</td></tr>`).join(""));
+  $("count").textContent = `${offset} of ${total} flanges`;
+  $("more").style.display = offset < total ? "" : "none";
+}
+function chart(d) {
+  const W = 900, H = 320, L = 45, B = 30, T = 10, n = d.bolts.length;
+  if (!n) return "";
+  const stack = d.bolts.map((_, i) => d.cycles.reduce((s, c) => s + (c[i] || 0), 0));
+  const top = Math.max(d.summary.required || 0, ...stack, ...d.total.map(v => v || 0)) * 1.1 || 1;
+  const x0 = Math.min(...d.bolts) - 0.5, x1 = Math.max(...d.bolts) + 0.5;
+  const x = b => L + (b - x0) / (x1 - x0) * (W - L - 10), y = v => T + (1 - v / top) * (H - T - B);
+  const colors = ["#005AFF", "#005AFF", "#005AFF", "#E17D28", "#E17D28", "#E17D28"];
+  let svg = `<svg width="${W}" height="${H}" style="font-size:11px">`;
+  const unit = Math.pow(10, Math.floor(Math.log10(top / 5)));
+  const tick = unit * ([1, 2, 5, 10].find(m => top / (unit * m) <= 8) || 10);
+  for (let v = 0; v <= top; v += tick) {
+    svg += `<line x1="${L}" x2="${W - 10}" y1="${y(v)}" y2="${y(v)}" stroke="#E3E5E8"/><text x="${L - 4}" y="${y(v) + 4}" text-anchor="end">${Math.round(v)}</text>`;
+  }
+  d.bolts.forEach((b, i) => {
+    let base = 0;
+    d.cycles.forEach((c, k) => {
+      const v = c[i] || 0;
+      if (v > 0) svg += `<rect x="${x(b - 0.5)}" width="${x(b + 0.5) - x(b - 0.5)}" y="${y(base + v)}" height="${y(base) - y(base + v)}" fill="${colors[k]}" stroke="#A2A9B1" stroke-width="0.5"/>`;
+      base += v;
+    });
+    if (b % 5 === 0) svg += `<text x="${x(b)}" y="${H - B + 14}" text-anchor="middle">${b}</text>`;
+  });
+  const step = (vals, color) => `<path fill="none" stroke="${color}" stroke-width="1.5" d="` + d.bolts.map((b, i) =>
+    `${i ? "L" : "M"}${x(b - 0.5)},${y(vals[i] || 0)}H${x(b + 0.5)}`).join("") + `"/>`;
+  svg += step(d.round1, "#FFFFFF") + step(d.total, "#000000");
+  if (d.summary.required) svg += `<line x1="${L}" x2="${W - 10}" y1="${y(d.summary.required)}" y2="${y(d.summary.required)}" stroke="#000" stroke-dasharray="6,4"/>`;
+  return svg + `<text x="${W / 2}" y="${H - 2}" text-anchor="middle">Bolt #</text></svg>`;
+}
+async function showFlange(id) {
+  const d = await get("/api/flange/" + id), s = d.summary;
+  const bolts = d.bolts.map((b, i) => `<tr><td>${b}</td><td>${d.round1[i] ?? ""}</td><td>${d.round2[i] ?? ""}</td>` +
+    `<td>${d.total[i] ?? ""}</td><td class="${d.approval[i]}">${esc(d.approval[i])}</td></tr>`).join("");
+  $("detail").innerHTML =
+    `<h3>${esc(s.project)} / ${esc(s.tower)} / ${esc(s.flange)} <span class="${s.level}">${s.level}</span></h3>` +
+    `<p>Required rotation ${s.required} | Mean ${s.mean} | SD ${s.std}` +
+    (s.report ? ` | <a href="/report/${s.id}" target="_blank">Report PDF</a>` : "") + `</p>` +
+    chart(d) +
+    (d.diagnostics.length ? "<h4>Errors and alerts</h4><table>" + d.diagnostics.map(x =>
+      `<tr><td class="${x.severity}">${x.severity}</td><td>${esc(x.message)}</td></tr>`).join("") + "</table>" : "") +
+    "<h4>Headers</h4><table><tr><th></th>" + d.header_columns.map(c => `<th>${esc(c)}</th>`).join("") + "</tr>" +
+    d.headers.map(h => `<tr><td>${esc(h[0])}</td>` + h.slice(1).map((v, k) =>
+      `<td class="${k === h.length - 2 ? esc(v) : ""}">${esc(v)}</td>`).join("") + "</tr>").join("") + "</table>" +
+    "<h4>Bolts</h4><table><tr><th>Bolt</th><th>Round 1</th><th>Round 2</th><th>Total</th><th>Result</th></tr>" + bolts + "</table>";
+}
+$("list").onclick = e => { const tr = e.target.closest("tr"); if (tr) showFlange(tr.dataset.id); };
+$("project").onchange = $("level").onchange = () => loadFlanges(true);
+$("more").onclick = () => loadFlanges(false);
+loadProjects().then(() => loadFlanges(true));
+</script></body></html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a browser dashboard of the analysed flanges below a folder.")
+    parser.add_argument("parent_path", help="Parent folder with the project folders.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on, 0.0.0.0 to share on the local network.")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args()
+
+    index = ResultsIndex(args.parent_path)
+    start = time.perf_counter()
+    index.refresh()
+    print(f"{len(index)} flanges loaded in {time.perf_counter() - start:.1f} s")
+    for filepath, error in index.errors.items():
+        print(f"Unable to load {filepath}: {error}")
+    server = DashboardServer(index, args.host, args.port, args.verbose)
+    print(f"Serving on {server.url}, Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:21:47 2026
+
+@author: BECHY
+
+Structured errors and alerts of a flange analysis. Each finding is a
+Diagnostic with a code, severity and the header field, round or bolt it is
+about, so findings can be filtered and exported without parsing text.
+"""
+import argparse
+from dataclasses import dataclass
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# Severities, in increasing order
+SEVERITIES = ("Info", "Alert", "Fail", "Error")
+
+# Diagnostic codes
+XML_MISSING = "XML_MISSING"                 # No Xml file found for a round
+XML_AMBIGUOUS = "XML_AMBIGUOUS"             # More than one Xml file for a round
+XML_DUPLICATE = "XML_DUPLICATE"             # Identical copies of a round Xml file
+XML_UNPARSED = "XML_UNPARSED"               # Xml file could not be parsed
+DATA_MISSING = "DATA_MISSING"               # Header or record data empty
+DATE_UNREADABLE = "DATE_UNREADABLE"         # Round dates could not be compared
+DATE_LATE = "DATE_LATE"                     # Second round more than 72 h after first
+DATE_ORDER = "DATE_ORDER"                   # Second round before the first
+HEADER_MISMATCH = "HEADER_MISMATCH"         # Header value differs between rounds
+PROGRAM_ID = "PROGRAM_ID"                   # Program Ids not first/second
+SUM_MISMATCH = "SUM_MISMATCH"               # Cycles do not sum to the round total
+MEAN_LOW = "MEAN_LOW"
+MEAN_HIGH = "MEAN_HIGH"
+MEAN_VERY_HIGH = "MEAN_VERY_HIGH"
+SD_HIGH = "SD_HIGH"
+SD_VERY_HIGH = "SD_VERY_HIGH"
+EXCEPTION = "EXCEPTION"                     # Analysis stopped by an exception
+# Bolts flagged with a bolt code use bolt_code(code), e.g. "BOLT_-1"
+
+# Flange alert codes by level, see flange.stats_alert_levels
+MEAN_CODES = {-1: MEAN_LOW, 1: MEAN_HIGH, 2: MEAN_VERY_HIGH}
+SD_CODES = {1: SD_HIGH, 2: SD_VERY_HIGH}
+
+
+def bolt_code(code: int) -> str:
+    """Diagnostic code of a bolt code, see flange.BOLT_CODES."""
+    return f"BOLT_{code}"
+
+
+FIELDS = ("code", "severity", "message", "field", "round", "bolt")
+
+
+@dataclass
+class Diagnostic:
+    """
+    One error or alert found while analysing a flange.
+
+    Attributes
+    ----------
+    code : str
+        Diagnostic code, one of the module constants.
+    severity : str
+        One of SEVERITIES.
+    message : str
+        Text shown to the user.
+    field : str
+        Header field the finding is about, None if not a header finding.
+    round : str
+        "first" or "second", None if about both rounds.
+    bolt : int
+        Bolt number, None if not about a single bolt.
+    """
+    __slots__ = FIELDS
+
+    code: str
+    severity: str
+    message: str
+    field: str
+    round: str
+    bolt: int
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in FIELDS}
+
+
+class DiagnosticsCollector:
+
+    def __init__(self, capacity: int = 32):
+        """
+        Diagnostics of one flange, appended to a preallocated list that
+        doubles when full.
+
+        Attributes
+        ----------
+        capacity : int
+            Initial size of the list.
+
+        Methods
+        -------
+        add(code:str, severity:str, message:str, field=None, round=None, bolt=None)
+            Record a diagnostic.
+        text
+            The messages of the flange findings, one per line, without Info.
+        codes(), severities()
+            Numpy arrays for fast filtering.
+        to_records(), to_frame(), to_jsonl(filepath)
+            Bulk export.
+        """
+        self._items = [None] * capacity
+        self._size = 0
+
+    def add(self, code: str, severity: str, message: str, field: str = None,
+            round: str = None, bolt: int = None) -> Diagnostic:
+        """Record a diagnostic."""
+        if self._size == len(self._items):
+            self._items.extend([None] * max(len(self._items), 1))
+        item = Diagnostic(code, severity, message, field, round, bolt)
+        self._items[self._size] = item
+        self._size += 1
+        return item
+
+    def clear(self):
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        return iter(self._items[:self._size])
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def text(self) -> str:
+        """
+        The messages of the flange findings, one per line. Bolt findings are
+        left out, they are listed with the bolt records, and so are Info
+        notes, which are not errors or alerts.
+        """
+        return "\n".join(item.message for item in self
+                         if item.bolt is None and item.severity != "Info")
+
+    def codes(self) -> np.ndarray:
+        return np.array([item.code for item in self], dtype=object)
+
+    def severities(self) -> np.ndarray:
+        return np.array([item.severity for item in self], dtype=object)
+
+    def has(self, code: str) -> bool:
+        return any(item.code == code for item in self)
+
+    def worst(self) -> str:
+        """Highest severity found, None if there are no diagnostics."""
+        if not self._size:
+            return None
+        return SEVERITIES[max(SEVERITIES.index(item.severity) for item in self)]
+
+    def to_records(self, **columns) -> list:
+        """
+        Tuples of (*columns values, code, severity, message, field, round,
+        bolt), e.g. for executemany into a database table.
+        """
+        prefix = tuple(columns.values())
+        return [prefix + tuple(getattr(item, name) for name in FIELDS) for item in self]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([tuple(getattr(item, name) for name in FIELDS) for item in self],
+                            columns=list(FIELDS))
+
+    def to_jsonl(self, filepath: str, mode: str = "a", **columns) -> int:
+        """
+        Append the diagnostics as JSON lines, with extra columns such as the
+        flange location on every line.
+
+        Returns
+        -------
+        int
+            Number of lines written.
+        """
+        lines = [json.dumps(dict(columns, **item.to_dict())) + "\n" for item in self]
+        with open(filepath, mode, encoding="utf-8") as f:
+            f.writelines(lines)
+        return len(lines)
+
+    @classmethod
+    def from_dicts(cls, items) -> "DiagnosticsCollector":
+        items = list(items)
+        collector = cls(max(len(items), 1))
+        for item in items:
+            collector.add(**{name: item.get(name) for name in FIELDS})
+        return collector
+
+
+class DiagnosticsTable:
+
+    def __init__(self):
+        """
+        Diagnostics of many flanges in column arrays, to find e.g. all
+        flanges with a very high standard deviation in one vectorised
+        comparison.
+
+        Methods
+        -------
+        add(key, collector:DiagnosticsCollector)
+            Add the diagnostics of one flange.
+        select(code=None, severity=None, field=None, round=None)
+            Row mask of the matching diagnostics.
+        flanges(code=None, severity=None, ...)
+            Keys of the flanges with matching diagnostics.
+        """
+        self.keys = []
+        self._parts = {name: [] for name in ("flange",) + FIELDS}
+        self._columns = None
+
+    def add(self, key, collector: DiagnosticsCollector):
+        """Add the diagnostics of one flange, key is e.g. its location tuple."""
+        index = len(self.keys)
+        self.keys.append(key)
+        items = list(collector)
+        self._parts["flange"].append(np.full(len(items), index, dtype=np.int64))
+        for name in FIELDS:
+            self._parts[name].append(np.array([getattr(item, name) for item in items],
+                                              dtype=object))
+        self._columns = None
+
+    @property
+    def columns(self) -> dict:
+        """Concatenated column arrays, built once after adding flanges."""
+        if self._columns is None:
+            self._columns = {name: np.concatenate(parts) if parts else np.empty(0, dtype=object)
+                             for name, parts in self._parts.items()}
+        return self._columns
+
+    def __len__(self) -> int:
+        return len(self.columns["flange"])
+
+    def select(self, code: str = None, severity: str = None, field: str = None,
+               round: str = None) -> np.ndarray:
+        """Boolean mask of the diagnostics matching all the given values."""
+        columns = self.columns
+        mask = np.ones(len(columns["flange"]), dtype=bool)
+        for name, value in (("code", code), ("severity", severity),
+                            ("field", field), ("round", round)):
+            if value is not None:
+                mask &= columns[name] == value
+        return mask
+
+    def flanges(self, **criteria) -> list:
+        """Keys of the flanges with at least one diagnostic matching select."""
+        indices = np.unique(self.columns["flange"][self.select(**criteria)])
+        return [self.keys[i] for i in indices]
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = self.columns
+        frame = pd.DataFrame({name: columns[name] for name in FIELDS})
+        frame.insert(0, "flange", [self.keys[i] for i in columns["flange"]])
+        return frame
+
+
+def table_from_analysis_files(filepaths) -> DiagnosticsTable:
+    """
+    Diagnostics of stored flange analyses, see analysis_store, keyed by
+    (project, tower, flange).
+    """
+    from tower_bolt_package.analysis_store import load_diagnostics
+
+    table = DiagnosticsTable()
+    for filepath in filepaths:
+        try:
+            location, collector = load_diagnostics(filepath)
+        except Exception as error:
+            print(f"Unable to load {filepath}: {error}")
+            continue
+        table.add((location["project"], location["tower"], location["flange"]), collector)
+    return table
+
+
+def write_jsonl(filepaths, jsonl_path: str) -> int:
+    """
+    Write the diagnostics of stored flange analyses into one JSON lines
+    file, with the project, tower and flange on every line.
+
+    Returns
+    -------
+    int
+        Number of lines written.
+    """
+    from tower_bolt_package.analysis_store import load_diagnostics
+
+    count = 0
+    with open(jsonl_path, "w", encoding="utf-8"):
+        pass
+    for filepath in filepaths:
+        try:
+            location, collector = load_diagnostics(filepath)
+        except Exception as error:
+            print(f"Unable to load {filepath}: {error}")
+            continue
+        count += collector.to_jsonl(jsonl_path, **location)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find the flanges of stored analyses with matching diagnostics, "
+                    "e.g. --code SD_VERY_HIGH.")
+    parser.add_argument("folder", help="Parent, project, tower or flange folder.")
+    parser.add_argument("--code", default=None, help="Diagnostic code.")
+    parser.add_argument("--severity", choices=SEVERITIES, default=None)
+    parser.add_argument("--field", default=None, help="Header field.")
+    parser.add_argument("--round", choices=["first", "second"], default=None)
+    parser.add_argument("--jsonl", default=None,
+                        help="Also write all diagnostics into this JSON lines file.")
+    args = parser.parse_args()
+
+    from tower_bolt_package.analysis_store import find_analysis_files
+
+    files = find_analysis_files(args.folder)
+    table = table_from_analysis_files(files)
+    criteria = dict(code=args.code, severity=args.severity, field=args.field, round=args.round)
+    matches = table.flanges(**criteria)
+    for key in matches:
+        print("-".join(key))
+    print(f"{len(matches)} of {len(table.keys)} flanges, {int(table.select(**criteria).sum())} "
+          f"of {len(table)} diagnostics match")
+    if args.jsonl:
+        print(f"{write_jsonl(files, args.jsonl)} diagnostics written to {args.jsonl}")
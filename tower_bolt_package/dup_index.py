@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:48:26 2026
+
+@author: BECHY
+
+Persistent index of the Xml files below the parent folder for the duplicate
+finder. Folder and file modification times and the content hashes are kept
+in SQLite, so a new scan only lists the folders that changed since the last
+one and only hashes new or modified files.
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+from tower_bolt_package.funcs import cache_dir
+
+
+DB_NAME = "duplicate_index.sqlite"
+# Bytes hashed first; the whole file is only hashed if these match another file
+PARTIAL_BYTES = 1 << 16
+CRITERIA = ("File Name and Size", "File Name Only", "File Size Only")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+"""
+
+
+def default_db_path() -> str:
+    return os.path.join(cache_dir(), DB_NAME)
+
+
+def _prefix_range(path: str):
+    """Bounds of the paths below a folder, for a range query on the path index."""
+    prefix = os.path.join(path, "")
+    return prefix, prefix + "\U0010ffff"
+
+
+def hash_file(path: str, size: int, full: bool):
+    """
+    MD5 of the first PARTIAL_BYTES of a file and, if full is True or the file
+    is not larger, of the whole file.
+
+    Returns
+    -------
+    (partial, full) : tuple
+        Hex digests, full is None if it was not computed.
+    """
+    with open(path, "rb") as f:
+        head = f.read(PARTIAL_BYTES)
+        partial = hashlib.md5(head).hexdigest()
+        if size <= PARTIAL_BYTES:
+            return partial, partial
+        if not full:
+            return partial, None
+        h = hashlib.md5(head)
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+        return partial, h.hexdigest()
+
+
+def identical_paths(paths) -> set:
+    """
+    Files of a group whose content, read now, is identical to another file
+    of the group. Files that cannot be read are left out. Used to check a
+    group again right before deleting from it.
+    """
+    by_content = {}
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            by_content.setdefault((size,) + hash_file(path, size, full=True), []).append(path)
+        except OSError:
+            continue
+    return {path for group in by_content.values() if len(group) > 1 for path in group}
+
+
+class DuplicateIndex:
+
+    def __init__(self, db_path: str = None):
+        """
+        Xml files, folder modification times and content hashes from earlier
+        scans.
+
+        Attributes
+        ----------
+        db_path : str
+            SQLite database file. Defaults to the tool's cache folder.
+        stats : dict
+            Folders listed and skipped, files added, changed and removed,
+            and files hashed in the last scan and groups call.
+
+        Methods
+        -------
+        scan(root_path:str, full=False)
+            Bring the index up to date with the folders below root_path.
+        groups(root_path:str, search_subfolders=True, criteria="File Name and Size")
+            Groups of identical files, like funcs.find_duplicate_xmls. The
+            files that could be duplicates are stat'ed again first.
+        forget(paths:list)
+            Drop deleted files.
+        """
+        self.db_path = db_path or default_db_path()
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.stats = {}
+
+    def scan(self, root_path: str, full: bool = False) -> dict:
+        """
+        Update the index below a folder. Every folder is stat'ed, but only
+        folders whose modification time changed are listed, files in the
+        others are taken from the index. A file changed in place does not
+        change its folder's time, groups stats such files again; use full to
+        list and stat every folder.
+
+        Returns
+        -------
+        stats : dict
+            dirs_listed, dirs_skipped, added, changed and removed counts.
+        """
+        root_path = os.path.abspath(root_path)
+        stats = dict(dirs_listed=0, dirs_skipped=0, added=0, changed=0, removed=0)
+        known_dirs = dict(self.conn.execute(
+            "SELECT path, mtime_ns FROM dirs WHERE path = ? OR (path > ? AND path < ?)",
+            (root_path,) + _prefix_range(root_path)))
+        seen_dirs = set()
+        todo = [(root_path, None)]
+        with self.conn:
+            while todo:
+                dir_path, parent = todo.pop()
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(dir_path)
+                if not full and known_dirs.get(dir_path) == mtime_ns:
+                    stats["dirs_skipped"] += 1
+                    todo += [(path, dir_path) for (path,) in self.conn.execute(
+                        "SELECT path FROM dirs WHERE parent = ?", (dir_path,))]
+                    continue
+                stats["dirs_listed"] += 1
+                todo += [(path, dir_path) for path in self._list_dir(dir_path, stats)]
+                self.conn.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) "
+                                  "VALUES (?, ?, ?)", (dir_path, parent, mtime_ns))
+
+            # Folders that are gone, with their files
+            for dir_path in set(known_dirs) - seen_dirs:
+                stats["removed"] += self.conn.execute(
+                    "DELETE FROM files WHERE dir = ?", (dir_path,)).rowcount
+                self.conn.execute("DELETE FROM dirs WHERE path = ?", (dir_path,))
+        self.stats = stats
+        return stats
+
+    def _list_dir(self, dir_path: str, stats: dict) -> list:
+        """Update the files of one folder from a listing, returns its subfolders."""
+        subdirs = []
+        listed = {}
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(".xml"):
+                            info = entry.stat()
+                            listed[entry.path] = (entry.name, info.st_size, info.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            return subdirs
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in self.conn.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (dir_path,))}
+        gone = [(path,) for path in known if path not in listed]
+        self.conn.executemany("DELETE FROM files WHERE path = ?", gone)
+        stats["removed"] += len(gone)
+        for path, (name, size, mtime_ns) in listed.items():
+            if known.get(path) == (size, mtime_ns):
+                continue
+            stats["changed" if path in known else "added"] += 1
+            # Hashes are cleared and computed again when needed
+            self.conn.execute("INSERT OR REPLACE INTO files (path, dir, name, size, mtime_ns) "
+                              "VALUES (?, ?, ?, ?, ?)", (path, dir_path, name, size, mtime_ns))
+        return subdirs
+
+    def _verify(self, rows: list) -> list:
+        """
+        Stat the indexed files again and update the rows of files changed in
+        place, whose folder time did not change, clearing their hashes. rows
+        are (path, dir, name, size, partial, full, mtime_ns) and the returned
+        rows the same without mtime_ns; files that are gone are dropped from
+        the index and the returned rows.
+        """
+        verified = []
+        updates = []
+        gone = []
+        for path, dir_path, name, size, partial, full_hash, mtime_ns in rows:
+            try:
+                info = os.stat(path)
+            except OSError:
+                gone.append((path,))
+                continue
+            if (info.st_size, info.st_mtime_ns) != (size, mtime_ns):
+                size, partial, full_hash = info.st_size, None, None
+                updates.append((size, info.st_mtime_ns, path))
+                self.stats["changed"] = self.stats.get("changed", 0) + 1
+            verified.append((path, dir_path, name, size, partial, full_hash))
+        if updates or gone:
+            with self.conn:
+                self.conn.executemany("UPDATE files SET size = ?, mtime_ns = ?, partial = NULL, "
+                                      "full = NULL WHERE path = ?", updates)
+                self.conn.executemany("DELETE FROM files WHERE path = ?", gone)
+        return verified
+
+    def _hash(self, rows: list, full: bool) -> dict:
+        """
+        Hashes of files, computing the missing ones. rows are (path, size,
+        partial, full); unreadable files are left out.
+        """
+        hashes = {}
+        updates = []
+        for path, size, partial, full_hash in rows:
+            if partial is None or (full and full_hash is None):
+                try:
+                    partial, full_hash = hash_file(path, size, full)
+                except OSError:
+                    continue
+                updates.append((partial, full_hash, path))
+                self.stats["hashed"] += 1
+            hashes[path] = (partial, full_hash)
+        if updates:
+            with self.conn:
+                self.conn.executemany("UPDATE files SET partial = ?, full = ? WHERE path = ?",
+                                      updates)
+        return hashes
+
+    def groups(self, root_path: str, search_subfolders: bool = True,
+               criteria: str = "File Name and Size") -> list:
+        """
+        Groups of identical Xml files below a folder, from the index. Files
+        are grouped by the criteria like funcs.find_duplicate_xmls, then by
+        partial and full content hash, hashing only files not hashed since
+        they changed. Files that match another by the criteria are stat'ed
+        again first, so a file edited in place is hashed again even if its
+        folder was not listed by scan.
+
+        Returns
+        -------
+        list
+            Lists of two or more file paths with identical content.
+        """
+        root_path = os.path.abspath(root_path)
+        self.stats["hashed"] = 0
+        rows = self.conn.execute(
+            "SELECT path, dir, name, size, partial, full, mtime_ns FROM files "
+            "WHERE dir = ? OR (dir > ? AND dir < ?) ORDER BY dir, name",
+            (root_path,) + _prefix_range(root_path)).fetchall()
+
+        def key_of(dir_path, name, size):
+            if criteria == "File Name Only":
+                key = (name.lower(),)
+            elif criteria == "File Size Only":
+                key = (size,)
+            else:  # "File Name and Size"
+                key = (name.lower(), size)
+            return key + (dir_path,) if not search_subfolders else key
+
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(key_of(*row[1:4]), []).append(row)
+        # Only the files that could be duplicates are stat'ed again
+        candidates = {}
+        for group in by_key.values():
+            if len(group) < 2:
+                continue
+            for path, dir_path, name, size, partial, full_hash in self._verify(group):
+                candidates.setdefault(key_of(dir_path, name, size), []).append(
+                    (path, size, partial, full_hash))
+
+        duplicate_groups = []
+        seen = set()
+        for files in candidates.values():
+            if len(files) < 2:
+                continue
+            # Identical files have the same size and first bytes
+            hashes = self._hash(files, full=False)
+            by_start = {}
+            for path, (partial, full_hash) in hashes.items():
+                by_start.setdefault(partial, []).append(path)
+            sizes = {file[0]: file[1] for file in files}
+            for paths in by_start.values():
+                if len(paths) < 2:
+                    continue
+                rest = [(path, sizes[path]) + hashes[path] for path in paths]
+                by_content = {}
+                for path, (partial, full_hash) in self._hash(rest, full=True).items():
+                    by_content.setdefault(full_hash, []).append(path)
+                for group in by_content.values():
+                    signature = frozenset(group)
+                    if len(group) > 1 and signature not in seen:
+                        duplicate_groups.append(group)
+                        seen.add(signature)
+        return duplicate_groups
+
+    def find(self, root_path: str, search_subfolders: bool = True,
+             criteria: str = "File Name and Size", full: bool = False) -> list:
+        """Scan and return the duplicate groups, see scan and groups."""
+        self.scan(root_path, full)
+        return self.groups(root_path, search_subfolders, criteria)
+
+    def forget(self, paths):
+        """Drop files from the index, e.g. after deleting them."""
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?",
+                                  [(path,) for path in paths])
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find duplicate Xml files, keeping an index so re-scans only read changes.")
+    parser.add_argument("folder", help="Folder to search.")
+    parser.add_argument("--db", default=None, help="Index database. Defaults to the cache folder.")
+    parser.add_argument("--criteria", choices=CRITERIA, default=CRITERIA[0])
+    parser.add_argument("--same-folder", action="store_true",
+                        help="Only find duplicates within the same folder.")
+    parser.add_argument("--full", action="store_true", help="List and stat every folder.")
+    args = parser.parse_args()
+
+    index = DuplicateIndex(args.db)
+    start = time.perf_counter()
+    groups = index.find(args.folder, not args.same_folder, args.criteria, args.full)
+    print(f"{len(groups)} duplicate groups in {time.perf_counter() - start:.2f} s "
+          f"({', '.join(f'{key} {value}' for key, value in index.stats.items())})")
+    for group in groups:
+        print("Duplicates:", ", ".join(group))
+    index.close()
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:17:33 2026
+
+@author: BECHY
+
+Equipment history. The round rotations of every analysed flange are kept in
+an indexed SQLite database per tensioner, pump and operator, so the drift of
+a device over time can be looked up without reading the archive again.
+"""
+import argparse
+from datetime import datetime as dt
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package.funcs import cache_dir
+from tower_bolt_package.records import parse_header_date
+
+
+DB_NAME = "equipment_history.sqlite"
+# Queryable devices: column name and the header field it is taken from
+DEVICE_FIELDS = {"tensioner": "TensionerVUI",
+                 "pump": "PumpVUI",
+                 "operator": "OperatorID"}
+ROUNDS = {"first": "First Round", "second": "Second Round"}
+COLUMNS = ("project", "tower", "flange", "round", "date", "tensioner", "pump", "operator",
+           "software", "bolt_size", "required_rotation", "bolts", "mean", "std", "updated")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    project TEXT NOT NULL,
+    tower TEXT NOT NULL,
+    flange TEXT NOT NULL,
+    round TEXT NOT NULL,
+    date TEXT,
+    tensioner TEXT,
+    pump TEXT,
+    operator TEXT,
+    software TEXT,
+    bolt_size TEXT,
+    required_rotation REAL,
+    bolts INTEGER,
+    mean REAL,
+    std REAL,
+    updated TEXT,
+    PRIMARY KEY (project, tower, flange, round)
+);
+CREATE INDEX IF NOT EXISTS rounds_tensioner ON rounds (tensioner, date);
+CREATE INDEX IF NOT EXISTS rounds_pump ON rounds (pump, date);
+CREATE INDEX IF NOT EXISTS rounds_operator ON rounds (operator, date);
+"""
+
+
+def default_db_path() -> str:
+    return os.path.join(cache_dir(), DB_NAME)
+
+
+def _header(headers, field: str, column: str):
+    if headers is None or field not in headers.index:
+        return None
+    value = headers.loc[field, column]
+    return None if value is None or value != value else str(value)
+
+
+def equipment_rows(flange_obj) -> list:
+    """
+    History rows of an analysed flange, one per round, as plain tuples in
+    COLUMNS order. Cheap enough to build in a worker process and send back
+    with the job result.
+    """
+    if not getattr(flange_obj, "has_run", False):
+        return []
+    location = flange_obj.location
+    headers = flange_obj.headers
+    updated = dt.now().isoformat(timespec="seconds")
+    rows = []
+    for key, column in ROUNDS.items():
+        totals = flange_obj.records[column]["Round Total"].to_numpy(dtype=float)
+        totals = totals[np.isfinite(totals)]
+        date = parse_header_date(_header(headers, "Date", column))
+        rows.append((location["project"], location["tower"], location["flange"], key,
+                     None if date is pd.NaT else date.isoformat(),
+                     _header(headers, "TensionerVUI", column),
+                     _header(headers, "PumpVUI", column),
+                     _header(headers, "OperatorID", column),
+                     _header(headers, "SoftwareVersion", column),
+                     _header(headers, "BoltSize", column),
+                     float(flange_obj.required_rotation or 0) or None,
+                     int(len(totals)),
+                     float(totals.mean()) if len(totals) else None,
+                     float(totals.std()) if len(totals) else None,
+                     updated))
+    return rows
+
+
+class EquipmentHistory:
+
+    def __init__(self, db_path: str = None):
+        """
+        Indexed history of the round rotations per tensioner, pump and
+        operator. Rows are keyed by flange and round, analysing a flange
+        again replaces its rows.
+
+        Attributes
+        ----------
+        db_path : str
+            SQLite database file. Defaults to the tool's cache folder.
+
+        Methods
+        -------
+        record(rows:list), add(flange_obj)
+            Store the rows of analysed flanges.
+        devices(field:str)
+            Rounds, mean rotation and SD per device.
+        history(field:str, device:str)
+            The rounds of one device in date order.
+        trend(field:str, device:str)
+            Change of the relative mean rotation per 30 days.
+        """
+        self.db_path = db_path or default_db_path()
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def record(self, rows) -> int:
+        """Store history rows from equipment_rows, one transaction."""
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO rounds ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        return len(rows)
+
+    def add(self, flange_obj) -> int:
+        """Store the rounds of an analysed flange."""
+        return self.record(equipment_rows(flange_obj))
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+
+    @staticmethod
+    def _column(field: str) -> str:
+        if field not in DEVICE_FIELDS:
+            raise ValueError(f"Unknown device field {field!r}, use one of {list(DEVICE_FIELDS)}")
+        return field
+
+    def devices(self, field: str) -> pd.DataFrame:
+        """
+        Summary per device of a field.
+
+        Parameters
+        ----------
+        field : str
+            "tensioner", "pump" or "operator".
+
+        Returns
+        -------
+        Pandas DataFrame
+            Device, Rounds, Bolts, mean round rotation of the first and of
+            the second rounds in % of the required rotation, Mean SD, First
+            and Last round date.
+        """
+        column = self._column(field)
+        return pd.read_sql_query(
+            f"SELECT {column} AS Device, COUNT(*) AS Rounds, SUM(bolts) AS Bolts, "
+            f"ROUND(100 * AVG(CASE WHEN round = 'first' THEN mean / required_rotation END), 1) "
+            f"AS \"First Round %\", "
+            f"ROUND(100 * AVG(CASE WHEN round = 'second' THEN mean / required_rotation END), 1) "
+            f"AS \"Second Round %\", "
+            f"ROUND(AVG(std), 1) AS \"Mean SD\", "
+            f"MIN(date) AS First, MAX(date) AS Last "
+            f"FROM rounds WHERE {column} IS NOT NULL "
+            f"GROUP BY {column} ORDER BY {column}", self.conn)
+
+    def history(self, field: str, device: str) -> pd.DataFrame:
+        """All rounds of one device, oldest first."""
+        column = self._column(field)
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM rounds WHERE {column} = ? "
+            f"ORDER BY date, project, tower, flange", self.conn, params=(device,))
+
+    def trend(self, field: str, device: str) -> float:
+        """
+        Least squares change of the device's mean round rotation, in % of
+        the required rotation, per 30 days. First and second rounds share
+        the slope but have their own level. NaN with fewer than two dated
+        rounds.
+        """
+        rounds = self.history(field, device)
+        rounds = rounds[rounds["date"].notna() & rounds["required_rotation"].notna()]
+        if rounds["date"].nunique() < 2:
+            return float("nan")
+        days = pd.to_datetime(rounds["date"]).to_numpy().astype("datetime64[s]").astype(float) / 86400
+        relative = 100 * rounds["mean"].to_numpy(dtype=float) / rounds["required_rotation"].to_numpy()
+        levels = [(rounds["round"] == key).to_numpy(dtype=float) for key in ROUNDS]
+        design = np.column_stack([days - days.mean()] + [level for level in levels if level.any()])
+        return float(np.linalg.lstsq(design, relative, rcond=None)[0][0] * 30)
+
+    def close(self):
+        self.conn.close()
+
+
+def build_from_analyses(folderpath: str, history: EquipmentHistory) -> int:
+    """Record the stored analyses below a folder, see analysis_store."""
+    from tower_bolt_package.analysis_store import find_analysis_files, load_analysis
+
+    count = 0
+    for filepath in find_analysis_files(folderpath):
+        try:
+            count += history.add(load_analysis(filepath))
+        except Exception as error:
+            print(f"Unable to load {filepath}: {error}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tensioner, pump and operator history of the analysed flanges.")
+    parser.add_argument("--db", default=None, help="History database. Defaults to the cache folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Record the stored analyses below a folder.")
+    add.add_argument("folder")
+    show = commands.add_parser("show", help="List the devices, or the rounds of one device.")
+    show.add_argument("field", choices=list(DEVICE_FIELDS))
+    show.add_argument("device", nargs="?", default=None)
+    args = parser.parse_args()
+
+    history = EquipmentHistory(args.db)
+    if args.command == "add":
+        print(f"{build_from_analyses(args.folder, history)} rounds recorded, "
+              f"{len(history)} in {history.db_path}")
+    elif args.device is None:
+        print(history.devices(args.field).to_string(index=False))
+    else:
+        print(history.history(args.field, args.device).to_string(index=False))
+        print(f"Trend: {history.trend(args.field, args.device):+.2f} % of required rotation "
+              f"per 30 days")
+    history.close()
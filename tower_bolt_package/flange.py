@@ -7,10 +7,209 @@ Created on Wed Jan 10 11:11:12 2024
 import pandas as pd
 from datetime import datetime as dt
 from datetime import timedelta
+import os
 import tower_bolt_package.funcs as funcs
+import tower_bolt_package.diagnostics as diag
+from tower_bolt_package.records import infer_date_format
+from tower_bolt_package.stats import compute_stats
+from tower_bolt_package.xml_dedup import choose_xml
 import numpy as np
 
 
+# Record columns holding the per-cycle and total rotations, in stats order
+CYCLE_COLUMNS = [("First Round", "Cycle 1"),
+                 ("First Round", "Cycle 2"),
+                 ("First Round", "Cycle 3+"),
+                 ("Second Round", "Cycle 1"),
+                 ("Second Round", "Cycle 2"),
+                 ("Second Round", "Cycle 3+")]
+TOTAL_COLUMNS = [("First Round", "Round Total"),
+                 ("Second Round", "Round Total"),
+                 ("Total Rotation", "")]
+
+# Bolt codes in the order they are listed in a bolt's "Code" column
+#   1: Too much rotation at cycle 3+ in round 2 (Alert)
+#   2: Too many cycles in either round (Alert)
+#   3: Too much total rotation (Alert)
+#   4: Cycles do not sum to the listed round total (Alert)
+#   5: Bolt is missing from one of the rounds (Alert)
+#  -1: Too little total rotation (Fail)
+BOLT_CODES = (1, 2, 3, 4, 5, -1)
+BOLT_MESSAGES = {1: "Too much rotation at cycle 3+ in round 2.",
+                 2: "Too many cycles.",
+                 3: "Too much total rotation.",
+                 4: "Cycles do not sum to the listed round total.",
+                 5: "Bolt is missing from one of the rounds.",
+                 -1: "Too little total rotation."}
+
+# Flange alert messages by level, see stats_alert_levels
+MEAN_ALERTS = {-1: "Mean rotation is less than required rotation.",
+               1: "Mean rotation is high.",
+               2: "Mean rotation is excessively high."}
+SD_ALERTS = {1: "Standard deviation of rotation is high.",
+             2: "Standard deviation of rotation is excessively high."}
+
+
+def round_rotations(round_records):
+    """
+    Builds the rotation columns of one round used by Flange.__eval_bolts. The
+    rotations of cycles 3 and higher are summed into one column in a single
+    pass over the contiguous cycle angle matrix, whose width is the highest
+    cycle found when parsing.
+
+    Parameters
+    ----------
+    round_records : RoundRecords
+        Parsed bolt records of the round.
+
+    Returns
+    -------
+    Pandas DataFrame
+        BoltNo, BoltRotationAngle, BoltRotationAngleCycle1 to 3 and Cycles
+        columns, one row per bolt.
+
+    """
+    angles = round_records.angles
+    if round_records.max_cycle < 3:
+        # The tool always writes at least three cycle columns
+        raise KeyError("BoltRotationAngleCycle3")
+    return pd.DataFrame({"BoltNo": round_records.bolt_no.astype(int),
+                         "BoltRotationAngle": round_records.total,
+                         "BoltRotationAngleCycle1": angles[:, 0],
+                         "BoltRotationAngleCycle2": angles[:, 1],
+                         # Running sum adds the cycles in order like the Xml
+                         # values were always summed, .sum() may reorder them
+                         "BoltRotationAngleCycle3": angles[:, 2:].cumsum(axis=1)[:, -1],
+                         "Cycles": round_records.cycles.astype(int)})
+
+
+def bolt_arrays(records):
+    """
+    Pulls the per-bolt values used to evaluate the bolts out of the combined
+    records.
+
+    Parameters
+    ----------
+    records : Pandas DataFrame
+        Combined records of a flange with the multi-index columns built in
+        Flange.__eval_bolts.
+
+    Returns
+    -------
+    arrays : dict
+        Dict of float/bool numpy arrays, one value per bolt.
+
+    """
+    rd1 = records["First Round"]
+    rd2 = records["Second Round"]
+    rd1_total = rd1["Round Total"].to_numpy(dtype=float)
+    rd2_total = rd2["Round Total"].to_numpy(dtype=float)
+    rd1_sum = (rd1["Cycle 1"].to_numpy(dtype=float) +
+               rd1["Cycle 2"].to_numpy(dtype=float) +
+               rd1["Cycle 3+"].to_numpy(dtype=float))
+    rd2_sum = (rd2["Cycle 1"].to_numpy(dtype=float) +
+               rd2["Cycle 2"].to_numpy(dtype=float) +
+               rd2["Cycle 3+"].to_numpy(dtype=float))
+    return {"rd2_cyc3": rd2["Cycle 3+"].to_numpy(dtype=float),
+            "cycles1": rd1["# Cycles"].to_numpy(dtype=float),
+            "cycles2": rd2["# Cycles"].to_numpy(dtype=float),
+            "total": records["Total Rotation"].to_numpy(dtype=float),
+            "sum_diff1": np.abs(rd1_sum - rd1_total),
+            "sum_diff2": np.abs(rd2_sum - rd2_total),
+            "missing": np.isnan(rd1_total) | np.isnan(rd2_total)}
+
+
+def bolt_code_flags(arrays, required_rotation, values):
+    """
+    Evaluates the bolt codes for every bolt at once.
+
+    Parameters
+    ----------
+    arrays : dict
+        Per-bolt arrays from bolt_arrays. May hold the bolts of many flanges.
+    required_rotation : float or numpy array
+        Required rotation of the bolts. An array gives one value per bolt.
+    values : dict or Pandas Series
+        Failure criteria values by criteria name.
+
+    Returns
+    -------
+    flags : numpy array
+        (n_bolts, len(BOLT_CODES)) bool array of which codes apply to each bolt.
+
+    """
+    buffer = values["sum_rounding_buffer"]
+    cycles_high = values["cycles_high"]
+    flags = np.empty((len(arrays["total"]), len(BOLT_CODES)), dtype=bool)
+    flags[:, 0] = arrays["rd2_cyc3"] >= values["rd2_cyc3_rotation_high"]
+    flags[:, 1] = (arrays["cycles1"] > cycles_high) | (arrays["cycles2"] > cycles_high)
+    flags[:, 2] = arrays["total"] >= values["perbolt_rotation_high"]*required_rotation
+    flags[:, 3] = (arrays["sum_diff1"] >= buffer) | (arrays["sum_diff2"] >= buffer)
+    flags[:, 4] = arrays["missing"]
+    flags[:, 5] = arrays["total"] < required_rotation
+    return flags
+
+
+def approvals(flags):
+    """
+    Turns the bolt code flags into Pass/Alert/Fail approvals.
+
+    Parameters
+    ----------
+    flags : numpy array
+        Bolt code flags from bolt_code_flags.
+
+    Returns
+    -------
+    numpy array
+        Approval string of each bolt.
+
+    """
+    return np.where(flags[:, -1], "Fail",
+                    np.where(flags[:, :-1].any(axis=1), "Alert", "Pass"))
+
+
+def stats_alert_levels(total_mean, total_std, required_rotation, values):
+    """
+    Determines the flange alert levels of the mean and standard deviation of
+    the total rotation. Works on single values or arrays of many flanges.
+
+    Parameters
+    ----------
+    total_mean : float or numpy array
+        Mean total rotation, rounded as in the report.
+    total_std : float or numpy array
+        Standard deviation of the total rotation, rounded as in the report.
+    required_rotation : float or numpy array
+        Required rotation of the flange bolts.
+    values : dict or Pandas Series
+        Failure criteria values by criteria name.
+
+    Returns
+    -------
+    mean_level : numpy array
+        -1 for too low, 1 for high, 2 for excessively high, else 0. Always 0
+        without a required rotation.
+    sd_level : numpy array
+        1 for high, 2 for excessively high, else 0.
+
+    """
+    total_mean = np.asarray(total_mean, dtype=float)
+    total_std = np.asarray(total_std, dtype=float)
+    required_rotation = np.asarray(required_rotation, dtype=float)
+    mean_level = np.select(
+        [required_rotation == 0,
+         total_mean < required_rotation,
+         total_mean >= values["total_mean_veryhigh"]*required_rotation,
+         total_mean >= values["total_mean_high"]*required_rotation],
+        [0, -1, 2, 1], default=0)
+    sd_level = np.select(
+        [total_std >= values["total_SD_veryhigh"]*required_rotation,
+         total_std >= values["total_SD_high"]*required_rotation],
+        [2, 1], default=0)
+    return mean_level, sd_level
+
+
 class Flange:
 
     def __init__(self, path, location, criteria):
@@ -28,13 +227,16 @@ class Flange:
             Dataframe with the combined header data from the two rounds on the flange.
         records : Pandas DataFrame
             Dataframe with the combined record data from the two rounds on the flange.
-        stats : dict
-            Dict of two dataframes with the count and average/deviance bolt stats.
+        stats : FlangeStats
+            Count, mean, deviation, extremes and percentiles of the bolt rotations.
+        diagnostics : DiagnosticsCollector
+            Errors and alerts found in the analysis, with codes and the
+            header field, round or bolt they are about.
         errors : str
-            String that is added to when known errors are encountered.
+            Text of the flange errors and alerts, one per line.
         xml_data : dict
             Dict including the separated round 1 and round 2 data before being
-            combined.
+            combined. Headers are RoundHeader and records RoundRecords objects.
         rotation_dict : dict
             Dict listing the required rotation levels for each bolt size.
         response : str
@@ -65,9 +267,8 @@ class Flange:
                          "flange":  location["flange"]}
         self.headers = None
         self.records = None
-        self.stats = {"count": None,
-                      "total": None}
-        self.errors = ""
+        self.stats = None
+        self.diagnostics = diag.DiagnosticsCollector()
         self.required_rotation = 0
         self.has_run = 0
         self.xml_data = {
@@ -87,6 +288,11 @@ class Flange:
         self.response = ""
         self.criteria = criteria
 
+    @property
+    def errors(self) -> str:
+        """Text of the flange errors and alerts, one per line."""
+        return self.diagnostics.text
+
     def __get_data(self, file_round: str):
         """
         Fetches and parses the data from an Xml file into the round data.
@@ -103,29 +309,39 @@ class Flange:
             dict of the header and record data parsed from the Xml file.
 
         """
-        # Discover matching Xml files
-        matches = funcs.discover_xmls(self.path, file_round)
-        if len(matches) == 0:
-            self.errors += (
-                f"No {file_round} round Xml file found.")
-        elif len(matches) > 1:
-            self.errors += (
-                f"Unable to determine correct {file_round} round Xml file in folder.")
-
-        # Assumes there is only one of the Xmls found. This overrides the errors
-        # if multiple are found, but the error still shows up.
-        xml_path = matches[0]
+        # Discover matching Xml files, identical copies are collapsed
+        choice = choose_xml(funcs.discover_xmls(self.path, file_round))
+        if choice.path is None:
+            self.diagnostics.add(diag.XML_MISSING, "Error",
+                                 f"No {file_round} round Xml file found.",
+                                 round=file_round)
+        for kept, copies in choice.duplicates.items():
+            self.diagnostics.add(diag.XML_DUPLICATE, "Info",
+                                 f"Ignored {len(copies)} identical "
+                                 f"{'copy' if len(copies) == 1 else 'copies'} of "
+                                 f"{os.path.basename(kept)}.",
+                                 round=file_round)
+        if choice.conflict:
+            self.diagnostics.add(diag.XML_AMBIGUOUS, "Alert",
+                                 f"Unable to determine correct {file_round} round Xml file in folder. "
+                                 f"Using {os.path.basename(choice.path)}, the latest by header Date.",
+                                 round=file_round)
+
+        # With conflicting files the latest is used, but the alert still shows up.
+        # No file stops the analysis here, as before.
+        xml_path = choice.distinct[0]
         # Parse the Xml file
-        xml_data = funcs.parse_round(xml_path)
-        if not xml_data.empty:
+        round_data = funcs.parse_round(xml_path)
+        if round_data is not None:
             data = {"path": xml_path,
-                    "headers": xml_data["headers"],
-                    "records": xml_data["records"]}
+                    "headers": round_data.header,
+                    "records": round_data.records}
             self.xml_data[file_round] = data
             return data
         else:
-            self.errors += (
-                f"Unable to parse from {file_round} round data.")
+            self.diagnostics.add(diag.XML_UNPARSED, "Error",
+                                 f"Unable to parse from {file_round} round data.",
+                                 round=file_round)
             return {}
 
     def __eval_headers(self):
@@ -139,8 +355,8 @@ class Flange:
 
         """
         # Construct combined headers dataframe
-        headers = pd.concat(objs=[self.xml_data["first"]["headers"],
-                                  self.xml_data["second"]["headers"]],
+        headers = pd.concat(objs=[self.xml_data["first"]["headers"].to_frame(),
+                                  self.xml_data["second"]["headers"].to_frame()],
                             axis=1,
                             ignore_index=True)
         headers = headers.rename(columns={0: "First Round", 1: "Second Round"})
@@ -164,29 +380,30 @@ class Flange:
 
             # Date
             # Date of 2nd must be within 72 hours after date of 1st
-            # US Date patterns are tested first
-            date_patterns = ["%m/%d/%Y", "%m/%d/%Y %H:%M:%S",
-                             "%d/%m/%Y", "%d/%m/%Y %H:%M:%S", ]
+            # The format is taken from the 1st, US Date patterns are tested first
             if index == "Date":
-                for pattern in date_patterns:
-                    try:
-                        val1 = dt.strptime(val1, pattern)
-                        val2 = dt.strptime(val2, pattern)
-                        break
-                    except:
-                        pass
+                date_format = infer_date_format(val1)
+                if date_format is not None:
+                    val1 = dt.strptime(val1, date_format)
+                    if infer_date_format(val2, (date_format,)) is not None:
+                        val2 = dt.strptime(val2, date_format)
                 #  Match date times and make sure the second round is after the first round or at least on the same day
                 if (isinstance(val1, str) or isinstance(val2, str)):
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "Unable to detect and compare dates."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.DATE_UNREADABLE, "Alert",
+                                         "Unable to detect and compare dates.", field=index)
                 elif (val2-val1) > timedelta(hours=72):  # 2nd happened more than 72 hrs after 1st
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nSecond round more than 72 hours after first round."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.DATE_LATE, "Fail",
+                                         "Second round more than 72 hours after first round.",
+                                         field=index)
                 elif val1 <= val2:  # 2nd happened before 1st
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nDate: Second round may have ocurred before first round."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.DATE_ORDER, "Fail",
+                                         "Date: Second round may have ocurred before first round.",
+                                         field=index)
 
             # Software Version
             # Software version should match eachother
@@ -194,23 +411,28 @@ class Flange:
                 if val1 == val2:
                     # Set up to allow for later checking against reference updateed software version
                     if True:
-                        headers['Approval'][index] = "Pass"
+                        headers.loc[index, "Approval"] = "Pass"
                     else:
-                        headers['Approval'][index] = "Alert"
+                        headers.loc[index, "Approval"] = "Alert"
                         current_version = ""
-                        self.errors += "\nSoftware version differs most recent listed version: "+current_version
+                        self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                             "Software version differs most recent listed version: "+current_version,
+                                             field=index)
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nSoftware version differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Software version differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Program ID
             # ProgramID must include "first" in 1st and "second" in 2nd
             elif index == "ProgramID":
                 if 'first' in val1.lower() and 'second' in val2.lower():
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nProgram Id's do not match expected values."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.PROGRAM_ID, "Fail",
+                                         "Program Id's do not match expected values.", field=index)
                 pass
 
             # Bolt Type
@@ -227,86 +449,104 @@ class Flange:
             # TowerVUI should match between 1st and 2nd
             elif index == "TowerVUI":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nTower VUI differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Tower VUI differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Bolt VUI
             # BoltVUI must match between 1st and 2nd
             elif index == "BoltVUI":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nBolt VUI differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Fail",
+                                         "Bolt VUI differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Tensioner VUI
             # TensionerVUI should match between 1st and 2nd
             elif index == "TensionerVUI":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nTensioner VUI differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Tensioner VUI differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Pump VUI
             # PumpVUI should match between 1st and 2nd
             elif index == "PumpVUI":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nPump VUI differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Pump VUI differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Operator ID
             # OperatorID should match between 1st and 2nd
             elif index == "OperatorID":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nOperator ID differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Operator ID differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Operator Name
             # OperatorName should match between 1st and 2nd
             elif index == "OperatorName":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nOperator Name differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Operator Name differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Company
             # Company should match between 1st and 2nd
             elif index == "Company":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Alert"
-                    self.errors += "\nCompany differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Alert"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Alert",
+                                         "Company differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Bolt Size
             # BoltSize must match between 1st and 2nd
             elif index == "BoltSize":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                     # Set required rotation when they match
                     self.required_rotation = self.rotation_dict[val1]
                 else:
-                    headers['Approval'][index] = "Fail"
+                    headers.loc[index, "Approval"] = "Fail"
                     # Unable to determine the bolt size for required rotation
                     self.required_rotation = 0
-                    self.errors += "\nBolt size differs between 1st and 2nd round Xml files."
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Fail",
+                                         "Bolt size differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Bolt QTY
             # BoltQTY must match between 1st and 2nd
             elif index == "BoltQTY":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nBolt QTY differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Fail",
+                                         "Bolt QTY differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Clamping Length
             # Not used
@@ -317,10 +557,12 @@ class Flange:
             # FlangeLocation must match between 1st and 2nd
             elif index == "FlangeLocation":
                 if val1 == val2:
-                    headers['Approval'][index] = "Pass"
+                    headers.loc[index, "Approval"] = "Pass"
                 else:
-                    headers['Approval'][index] = "Fail"
-                    self.errors += "\nFlange Location differs between 1st and 2nd round Xml files."
+                    headers.loc[index, "Approval"] = "Fail"
+                    self.diagnostics.add(diag.HEADER_MISMATCH, "Fail",
+                                         "Flange Location differs between 1st and 2nd round Xml files.",
+                                         field=index)
 
             # Angle Sensor Reset Force
             # Not used
@@ -428,51 +670,9 @@ class Flange:
             approval/failure flags
 
         """
-        # First Round
-        # Get relevant data from round
-        records1 = self.xml_data["first"]["records"]
-        cols = [
-            col for col in records1.columns if "BoltRotationAngle" in col and "Target" not in col]
-        cols.insert(0, "BoltNo")
-        cols.insert(-1, "Cycles")
-        records1 = records1[cols]
-        # Sum the bolt rotation angles of any cycles #3 or higher
-        cycle_sums = np.zeros(len(records1["BoltRotationAngleCycle3"]))
-        for col in records1.columns:
-            if "BoltRotationAngleCycle" in col:
-                try:
-                    N = int(col[22:])
-                    if N >= 3:
-                        cycle_sums += records1[col].to_numpy()
-                        records1 = records1.drop(col, axis='columns')
-                except Exception as e:
-                    print(e)
-                    pass
-        # Reinsert summed rotations at position
-        records1.insert(4, 'BoltRotationAngleCycle3', cycle_sums)
-
-        # Secind Round
-        # Get relevant data from round
-        records2 = self.xml_data["second"]["records"]
-        cols = [
-            col for col in records2.columns if "BoltRotationAngle" in col and "Target" not in col]
-        cols.insert(0, "BoltNo")
-        cols.insert(-1, "Cycles")
-        records2 = records2[cols]
-        # Sum the bolt rotation angles of any cycles #3 or higher
-        cycle_sums = np.zeros(len(records2["BoltRotationAngleCycle3"]))
-        for col in records2.columns:
-            if "BoltRotationAngleCycle" in col:
-                try:
-                    N = int(col[22:])
-                    if N >= 3:
-                        cycle_sums += records2[col].to_numpy()
-                        records2 = records2.drop(col, axis='columns')
-                except Exception as e:
-                    print(e)
-                    pass
-        # Reinsert summed rotations at position
-        records2.insert(4, 'BoltRotationAngleCycle3', cycle_sums)
+        # Per-bolt rotations of each round with cycles 3+ folded into one column
+        records1 = round_rotations(self.xml_data["first"]["records"])
+        records2 = round_rotations(self.xml_data["second"]["records"])
 
         # Combine into total records
         records = records1.merge(records2, how='outer', on='BoltNo',)
@@ -503,79 +703,39 @@ class Flange:
             'Cycles_y': '# Cycles',
         })
 
-        # Sum all cycles to compare to listed total round rotations
-        rd1_total = (records["First Round"]["Cycle 1"] +
-                     records["First Round"]["Cycle 2"] +
-                     records["First Round"]["Cycle 3+"])
-        rd2_total = (records["Second Round"]["Cycle 1"] +
-                     records["Second Round"]["Cycle 2"] +
-                     records["Second Round"]["Cycle 3+"])
         # Allow a buffer to compare to total rotations for rounding errors
         buffer = self.criteria["Values"]["sum_rounding_buffer"]
-        if ((rd1_total - records["First Round"]["Round Total"]).abs().max()) > buffer:
-            self.errors += "\nBolt rotation total in round 1 Xml does not match cycles."
-        if ((rd2_total - records["Second Round"]["Round Total"]).abs().max()) > buffer:
-            self.errors += "\nBolt rotation total in round 2 Xml does not match cycles."
-
         records = records[records.columns.drop(
             list(records.filter(regex="BoltRotationAngle")))]
 
         records['Total Rotation'] = (records["First Round"]["Round Total"].fillna(0) +
                                      records["Second Round"]["Round Total"].fillna(0))
 
+        # Compare the sum of all cycles to the listed total round rotations
+        arrays = bolt_arrays(records)
+        if np.nanmax(arrays["sum_diff1"], initial=0) > buffer:
+            self.diagnostics.add(diag.SUM_MISMATCH, "Alert",
+                                 "Bolt rotation total in round 1 Xml does not match cycles.",
+                                 round="first")
+        if np.nanmax(arrays["sum_diff2"], initial=0) > buffer:
+            self.diagnostics.add(diag.SUM_MISMATCH, "Alert",
+                                 "Bolt rotation total in round 2 Xml does not match cycles.",
+                                 round="second")
+
         # If we have a determined required rotation, calculate the alerts/fails
         if self.required_rotation:
-            records['Approval'] = 'Pass'
-            records['Code'] = [[]]*records.shape[0]
-
-            # Alert from too much rotation at cycle 3, rd 2
-            code = 1
-            rd2_cyc3_rotation_high = self.criteria["Values"]["rd2_cyc3_rotation_high"]
-            indicies = (records['Second Round']['Cycle 3+'] >= rd2_cyc3_rotation_high)
-            records.loc[indicies, 'Approval'] = 'Alert'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
-
-            # Alert from too many cycles
-            code = 2
-            cycles_high = self.criteria["Values"]["cycles_high"]
-            indicies = (records['First Round']['# Cycles'] > cycles_high) | (
-                records['Second Round']['# Cycles'] > cycles_high)
-            records.loc[indicies, 'Approval'] = 'Alert'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
-
-            # Alert from too much rotation
-            code = 3
-            perbolt_rotation_high = self.criteria["Values"]["perbolt_rotation_high"]
-            indicies = (records["Total Rotation"] >= perbolt_rotation_high*self.required_rotation)
-            records.loc[indicies, 'Approval'] = 'Alert'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
-
-            # Alert from cycles not matching total
-            code = 4
-            indicies = ((rd1_total - records["First Round"]["Round Total"]).abs() >= buffer) | (
-                (rd2_total - records["Second Round"]["Round Total"]).abs() >= buffer)
-            records.loc[indicies, 'Approval'] = 'Alert'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
-
-            # Alert from missing records in one round
-            code = 5
-            # diff_list = list(set(records1["BoltNo"]).symmetric_difference(records2["BoltNo"]))
-            indicies = records["BoltNo"].isin(
-                set(records1["BoltNo"]).symmetric_difference(records2["BoltNo"]))
-            records.loc[indicies, 'Approval'] = 'Alert'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
-
-            # Fail from too little rotation
-            code = -1
-            indicies = (records['Total Rotation'] < self.required_rotation)
-            records.loc[indicies, 'Approval'] = 'Fail'
-            records.loc[indicies, 'Code'] = records.loc[indicies,
-                                                        'Code'].apply(lambda x: x + [code])
+            flags = bolt_code_flags(arrays, self.required_rotation,
+                                    self.criteria["Values"])
+            records['Approval'] = approvals(flags)
+            records['Code'] = [[code for code, flag in zip(BOLT_CODES, row) if flag]
+                               for row in flags]
+            # One bolt diagnostic per flagged code, bolt order within each code
+            bolt_no = records["BoltNo"].to_numpy()
+            for column, code in enumerate(BOLT_CODES):
+                severity = "Fail" if code < 0 else "Alert"
+                for bolt in bolt_no[flags[:, column]]:
+                    self.diagnostics.add(diag.bolt_code(code), severity,
+                                         BOLT_MESSAGES[code], bolt=int(bolt))
 
         else:
             # If we do not have a required rotation level, alert all bolts.
@@ -592,56 +752,26 @@ class Flange:
 
         Returns
         -------
-        stats : dict
-            Dict of two dataframes with the count and average/deviance bolt stats.
+        stats : FlangeStats
+            Count, mean, deviation, extremes and percentiles of the bolt
+            rotations.
 
         """
-
-        # Get all bolt rotation cycle columns
-        cols = [col for col in self.records.columns if "Cycle" in col[1]
-                and "s" not in col[1]]
-        # Count number in each cycle that are experienced rotation
-        count = self.records[cols].fillna(0).astype(bool).sum(axis=0)
-        # Arrange into dataframe
-        count = count.to_numpy()
-        count = np.vstack([count[0:3], count[3:6]]).transpose()
-        count = pd.DataFrame(data=count,
-                             index=["Cycle 1", "Cycle 2", "Cycle 3+"],
-                             columns=["First Round", "Second Round"])
-
-        # Get the mean and standard deviation on the total rotations
-        # Get the total rotation columns (1st total, 2nd total, 3rd total)
-        totals = self.records[[
-            col for col in self.records.columns if "Total" in col[1] or "Total" in col[0]]].to_numpy()
-        # Calculate mean & SD
-        totals = np.around(
-            np.vstack([np.nanmean(totals, 0), np.nanstd(totals, 0)]), 1)
-        # Arrange into dataframe
-        totals = pd.DataFrame(data=totals,
-                              index=["Mean Rotation", "Standard Deviation"],
-                              columns=["First Round", "Second Round", "Total Rotation"])
-        stats = {}
-        stats["count"] = count
-        stats["total"] = totals
-
-        # Raise alerts if Mean is too high
-        total_mean_high = self.criteria["Values"]["total_mean_high"]
-        total_mean_veryhigh = self.criteria["Values"]["total_mean_veryhigh"]
-        if self.required_rotation:
-            if totals["Total Rotation"]["Mean Rotation"] < self.required_rotation:
-                self.errors += "\nMean rotation is less than required rotation."
-            elif totals["Total Rotation"]["Mean Rotation"] >= total_mean_veryhigh*self.required_rotation:
-                self.errors += "\nMean rotation is excessively high."
-            elif totals["Total Rotation"]["Mean Rotation"] >= total_mean_high*self.required_rotation:
-                self.errors += "\nMean rotation is high."
-
-        # Raise alters in SD is too high
-        total_SD_high = self.criteria["Values"]["total_SD_high"]
-        total_SD_veryhigh = self.criteria["Values"]["total_SD_veryhigh"]
-        if totals["Total Rotation"]["Standard Deviation"] >= total_SD_veryhigh*self.required_rotation:
-            self.errors += "\nStandard deviation of rotation is excessively high."
-        elif totals["Total Rotation"]["Standard Deviation"] >= total_SD_high*self.required_rotation:
-            self.errors += "\nStandard deviation of rotation is high."
+        # One contiguous float matrix of the cycle and total rotation columns
+        values = self.records[CYCLE_COLUMNS + TOTAL_COLUMNS].to_numpy(dtype=float)
+        stats = compute_stats(values)
+
+        # Raise alerts if Mean or SD is too high
+        mean_level, sd_level = stats_alert_levels(stats.total_mean, stats.total_std,
+                                                  self.required_rotation,
+                                                  self.criteria["Values"])
+        if mean_level:
+            self.diagnostics.add(diag.MEAN_CODES[int(mean_level)],
+                                 "Fail" if mean_level < 0 else "Alert",
+                                 MEAN_ALERTS[int(mean_level)])
+        if sd_level:
+            self.diagnostics.add(diag.SD_CODES[int(sd_level)], "Alert",
+                                 SD_ALERTS[int(sd_level)])
 
         self.stats = stats
         return stats
@@ -676,7 +806,7 @@ class Flange:
 
         try:
 
-            self.errors = ''
+            self.diagnostics.clear()
 
             # Data parsing
             # Get 1st and second round data
@@ -684,10 +814,10 @@ class Flange:
             self.xml_data["second"] = self.__get_data("second")
 
             # Check that data has been found
-            if any([self.xml_data["first"]["headers"].empty, self.xml_data["second"]["headers"].empty,
-                    self.xml_data["first"]["records"].empty, self.xml_data["second"]["records"].empty]):
-                self.errors += (
-                    "Required header or record data not determined.")
+            if any([not len(self.xml_data["first"]["headers"]), not len(self.xml_data["second"]["headers"]),
+                    not len(self.xml_data["first"]["records"]), not len(self.xml_data["second"]["records"])]):
+                self.diagnostics.add(diag.DATA_MISSING, "Error",
+                                     "Required header or record data not determined.")
 
             # Evaluate headers
             self.headers = self.__eval_headers()
@@ -701,7 +831,7 @@ class Flange:
 
             # Write errors to a text file in flange path
             # if self.errors:
-            #     with open(self.path+"\\Error.txt", "w") as writer:
+            #     with open(os.path.join(self.path, "Error.txt"), "w") as writer:
             #         writer.write(self.errors)
             #     print("____Errors or alerts detected. Check error log file.")
 
@@ -709,7 +839,8 @@ class Flange:
             return 1
         except Exception as error:
             print(error)
-            with open(self.path+"\\Error.txt", "w") as writer:
+            self.diagnostics.add(diag.EXCEPTION, "Error", f"{type(error).__name__}: {error}")
+            with open(os.path.join(self.path, "Error.txt"), "w") as writer:
                 writer.write(str(error))
             return 0
         pass
@@ -4,14 +4,32 @@ Created on Wed Jan 10 11:05:47 2024
 
 @author: TOBHI
 """
-import pandas as pd
 import os
-import xml.etree.ElementTree as et
-from datetime import datetime as dt
+import glob
 import re
 import numpy as np
 import hashlib
 
+from tower_bolt_package.records import (RoundData, RoundHeader, RoundRecords,
+                                        CYCLE_PATTERN, NO_TIMESTAMP, to_timestamps)
+from tower_bolt_package.xml_backends import get_backend
+
+
+# Folder name patterns of the tower and flange folders, matched in lower case
+tower_patterns = [r"[a-z]{1,3}[ ]{0,1}[a-z]{0,1}[0-9]{1,3}"]
+flange_patterns = []
+
+
+def cache_dir() -> str:
+    """
+    Local folder for the tool's indexes and caches. Kept outside the synced
+    parent folder, set TOWER_BOLT_CACHE to move it.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.environ.get("TOWER_BOLT_CACHE") or os.path.join(base, "tower_bolt")
+    os.makedirs(path, exist_ok=True)
+    return path
+
 
 def discover_folders(folderpath, patterns):
     """
@@ -60,11 +78,12 @@ def discover_folders(folderpath, patterns):
     return folders
 
 
-def discover_xmls(folderpath, keyphrase):
+def discover_xmls(folderpath, keyphrase, rename=True):
     """
     Searches for Xml files in the given folder that have the defined keyphrase
     in either the filename or in the text. Used to determine the file locations
-    of the required Xml files.
+    of the required Xml files. Files found by their text are renamed to start
+    with the keyphrase, unless rename is False.
 
     Parameters
     ----------
@@ -72,6 +91,9 @@ def discover_xmls(folderpath, keyphrase):
         Location of the folder to search for the Xml file in.
     keyphrase : str
         Keyphrase to match the required file. Usually "first" or "second".
+    rename : bool
+        Rename the files found by their text. Only the analysis renames,
+        checks that can run at the same time as it pass False.
 
     Returns
     -------
@@ -94,158 +116,195 @@ def discover_xmls(folderpath, keyphrase):
 
         # If keyphrase not in filepath, check inside the Xml file
         else:
-            with open(filepath) as f:
-                f = f.read().lower()
-            if "programid" in f and f"installation {keyphrase} round" in f:
-                new_filepath = os.path.join(folderpath, f"{keyphrase}_{name}")
-                os.rename(filepath, new_filepath)
-                matches.append(new_filepath)
+            with open(filepath, "rb") as f:
+                data = f.read()
+            if xml_mentions_round(data, keyphrase):
+                if rename:
+                    new_filepath = os.path.join(folderpath, f"{keyphrase}_{name}")
+                    os.rename(filepath, new_filepath)
+                    filepath = new_filepath
+                matches.append(filepath)
 
     # Return all matching filepaths
     return matches
 
 
-def parse_round(filepath):
+def xml_mentions_round(data, keyphrase: str) -> bool:
+    """
+    True if Xml content names the given round in its program id, the check
+    discover_xmls uses for files without the round in their name. Searches
+    bytes-like content case-insensitively without decoding or copying it.
+    """
+    return bool(re.search(rb"programid", data, re.IGNORECASE) and
+                re.search(b"installation " + keyphrase.lower().encode() + b" round",
+                          data, re.IGNORECASE))
+
+
+def has_required_xmls(flange_path: str) -> bool:
     """
-    Parses an Xml file from the smart tensioner tool into dataframes. 
-    Expects a known format.
+    True if both XML groups exist in the flange folder. Read only, the files
+    are not renamed, so it is safe next to a running analysis.
+    """
+    return all((discover_xmls(flange_path, "first", rename=False),
+                discover_xmls(flange_path, "second", rename=False)))
+
+
+def latest_pdf_in_folder(folder: str, pattern: str = "Report-*.pdf"):
+    """Return path to latest PDF in a folder, or None."""
+    pdfs = list(glob.iglob(os.path.join(folder, pattern)))
+    if not pdfs:
+        return None
+    pdfs.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    return pdfs[0]
+
+
+def read_round_rows(filepath, backend=None):
+    """
+    Reads the header values and every bolt record of a round Xml file as
+    text, including the superseded records of bolts that were tensioned
+    again.
 
     Parameters
     ----------
-    filepath : str
-        File location of the Xml file to parse..
-
-    Raises
-    ------
-    Exception
-        DESCRIPTION.
+    filepath : str or bytes-like
+        File location of the Xml file, or its content already read.
+    backend : optional
+        Xml parser backend from xml_backends.get_backend.
 
     Returns
     -------
-    round_data: Pandas Series
-        Pandas Series including dataframes for the header data and the records
-        data from the Xml file.
+    header_pairs : list
+        (name, value) of the header values.
+    rows : list
+        Dict of the record values by name per record, in file order, with
+        the highest cycle number of the record as "Cycles".
+    columns : list
+        Record names in order found, including "Cycles".
 
     """
-    headers = pd.DataFrame()
-    records = pd.DataFrame()
-    round_data = pd.Series({"headers": None,
-                            "records": None})
+    if backend is None:
+        backend = get_backend()
+    header_pairs = []
+    rows = []
+    columns = []        # Record names in order found
+
+    # Iterate through nodes in xml file
+    for tag, pairs in backend.iter_groups(filepath):
+
+        # If node is the header node, collect the header values
+        if tag == 'headers':
+            header_pairs.extend(pairs)
+
+        # If this is a records node, collect the record values
+        elif tag == 'records':
+
+            # Parse record data into a temporary dict first
+            temp_dict = {}
+            N_cyc = 0
+            for name, value in pairs:
+                # Iterate through record nodes in bolt
+                if name not in columns:
+                    columns.append(name)
+                temp_dict[name] = value
+
+                # Get number of bolt cycles
+                match = CYCLE_PATTERN.match(name)
+                if match and int(match.group(1)) > N_cyc:
+                    N_cyc = int(match.group(1))
+
+            # Add cycles to data
+            temp_dict["Cycles"] = N_cyc
+            if "Cycles" not in columns:
+                columns.append("Cycles")
+            rows.append(temp_dict)
 
-    try:
-        # Set up XML parsing
-        xroot = et.parse(filepath).getroot()
-
-        # Iterate through nodes in xml file
-        for nodes in xroot:
-
-            # If node is the header node, build out the header dataframe
-            if nodes.tag == 'headers':
-                for node in nodes:
-                    name = node.find("name").text
-                    val = node.find("value").text
-                    headers[name] = [val]
-
-            # If this is a records node, fill/build the records dataframe
-            elif nodes.tag == 'records':
-
-                # Parse record data into a temporary dict first
-                temp_dict = {}
-                N_cyc = 0
-                for node in nodes:
-                    # Iterate through record nodes in bolt
-                    name = node.find("name").text   # Name of record
-                    if name not in records.columns:  # Add column to dataframe
-                        records[name] = ""
-                    val = node.find("value").text   # Value of record
-                    temp_dict[name] = val           # Push into temporary dict
-
-                    # Get number of bolt cycles
-                    if "BoltRotationAngleCycle" in name:
-                        n = int(name[22:])  # Number cycle for record node name
-                        if n > N_cyc:       # Overwrite if greater
-                            N_cyc = n
-
-                # Add cycles to data
-                temp_dict["Cycles"] = N_cyc
-                if "Cycles" not in records.columns:
-                    records["Cycles"] = []
-
-                # Not implemented right now
-                # Placeholders for errors to raise if required keys are not found
-                if not "BoltNo" in temp_dict.keys():
-                    # self.errors += "\nRecord encountered without associated bolt number. Last valid bolt number was #"+records["BoltNo"][-1]
-                    # raise Exception(
-                    #     "Record encountered without associated bolt number. Last valid bolt number was #"+records["BoltNo"][-1])
-                    continue
+        else:
+            # print("    Unrecognized Node: " + node.tag)
+            pass
 
-                else:
-                    if not "BoltRotationAngleCycle1" in temp_dict.keys():
-                        # self.errors +="\nRequired Key 'BoltRotationAngleCycle1' not found for bolt #"+str(temp_dict["BoltNo"])
-                        # raise Exception(
-                        #     "Required Key 'BoltRotationAngleCycle1' not found for bolt #"+str(temp_dict["BoltNo"]))
-                        pass
-                    if not "BoltRotationAngleCycle2" in temp_dict.keys():
-                        # self.errors +="\nRequired Key 'BoltRotationAngleCycle2' not found for bolt #"+str(temp_dict["BoltNo"])
-                        # raise Exception(
-                        #     "Required Key 'BoltRotationAngleCycle2' not found for bolt #"+str(temp_dict["BoltNo"]))
-                        pass
-                    if not "BoltRotationAngleCycle3" in temp_dict.keys():
-                        # self.errors +="\nRequired Key 'BoltRotationAngleCycle3' not found for bolt #"+str(temp_dict["BoltNo"])
-                        # raise Exception(
-                        #     "Required Key 'BoltRotationAngleCycle3' not found for bolt #"+str(temp_dict["BoltNo"]))
-                        pass
-                    if not "BoltRotationAngle" in temp_dict.keys():
-                        # self.errors +="\nRequired Key 'BoltRotationAngle' not found for bolt #"+str(temp_dict["BoltNo"])
-                        # raise Exception(
-                        #     "Required Key 'BoltRotationAngle' not found for bolt #"+str(temp_dict["BoltNo"]))
-                        pass
-
-                # Push new row into dataframe
-                # If bolt number already has a row in the dataframe
-                # Use record with more recent date
-                bolt_no = temp_dict['BoltNo']
-                if any(records.BoltNo.isin([bolt_no])):
-                    # Date of first record
-                    date1 = dt.strptime(
-                        records.loc[bolt_no].Date, "%m/%d/%Y %H:%M:%S")
-                    # Date of second record
-                    date2 = dt.strptime(
-                        temp_dict["Date"], "%m/%d/%Y %H:%M:%S")
-
-                    if date1 > date2:  # First record is newer
-                        pass
-                    else:  # Second record is newer
-                        records.loc[bolt_no] = temp_dict
-                else:
-                    records.loc[bolt_no] = temp_dict
+    return header_pairs, rows, columns
 
-            else:
-                # print("    Unrecognized Node: " + node.tag)
-                pass
 
-        # Clear up data from records
-        records = records.replace('-', 0)
-        records = records.replace('', 0)
-        records = records.fillna(0)
-        # Fix data types
-        for col in records.columns:
-            if col == "BoltNo" or col == "Cycles":
-                records[col] = records[col].astype(int)
-                continue
-            else:
-                try:
-                    records[col] = records[col].astype(float)
-                except:
-                    pass
+def latest_rows(rows, timestamp=None) -> dict:
+    """
+    Selects the latest record of each bolt from read_round_rows records. Of
+    the records of a bolt the one with the latest Date is used, the last in
+    the file on a tie.
+
+    Parameters
+    ----------
+    rows : list
+        Record dicts from read_round_rows.
+    timestamp : numpy array, optional
+        records.to_timestamps of the record dates if already parsed.
+
+    Returns
+    -------
+    latest : dict
+        Index into rows of the latest record by bolt number, in the order
+        the bolts were first found.
 
-        # Push data into return series
-        round_data["headers"] = headers.transpose()
-        round_data["records"] = records
-        return round_data
+    """
+    # Records without a bolt number can not be placed
+    index = [i for i, row in enumerate(rows) if "BoltNo" in row]
+    bolts = [rows[i]["BoltNo"] for i in index]
+    first = {bolt_no: n for n, bolt_no in enumerate(dict.fromkeys(bolts))}
+    if len(first) == len(bolts):
+        return dict(zip(bolts, index))
+
+    # Bolts tensioned again, the dates decide
+    if timestamp is None:
+        timestamp = to_timestamps([row.get("Date") for row in rows])
+    index = np.array(index)
+    codes = np.array([first[bolt_no] for bolt_no in bolts])
+    timestamp = timestamp[index]
+    repeated = np.bincount(codes)[codes] > 1
+    if (timestamp[repeated] == NO_TIMESTAMP).any():
+        raise ValueError("Unable to compare the record dates of a bolt tensioned more than once.")
+    # Sorted by bolt, date and position, the last record of each bolt is the latest
+    order = np.lexsort((index, timestamp, codes))
+    last = order[np.append(codes[order][1:] != codes[order][:-1], True)]
+    return dict(zip(first, index[last].tolist()))
+
+
+def parse_round(filepath, backend=None, path=None):
+    """
+    Parses an Xml file from the smart tensioner tool into typed round data. 
+    Expects a known format. Values are converted once, after the latest
+    record of each bolt has been selected.
+
+    Parameters
+    ----------
+    filepath : str or bytes-like
+        File location of the Xml file to parse, or its content already read,
+        e.g. a buffer from bulk_reader.
+    backend : optional
+        Xml parser backend from xml_backends.get_backend. Defaults to the
+        fastest available backend.
+    path : str, optional
+        File location stored in the round data when filepath is content.
+
+    Returns
+    -------
+    round_data: RoundData
+        Header and bolt record data from the Xml file. None if the file could
+        not be parsed.
+
+    """
+    try:
+        header_pairs, rows, columns = read_round_rows(filepath, backend)
+        # Record dates parsed once, for selecting and storing
+        timestamp = to_timestamps([row.get("Date") for row in rows])
+        selected = list(latest_rows(rows, timestamp).values())
+
+        # Convert into typed data
+        return RoundData(path=filepath if path is None else path,
+                         header=RoundHeader.from_pairs(header_pairs),
+                         records=RoundRecords.from_rows([rows[i] for i in selected],
+                                                        columns, timestamp[selected]))
     except Exception as error:
         print(error)
-        return pd.DataFrame()
+        return None
 
 def find_duplicate_xmls(root_path, search_subfolders=True, criteria="File Name and Size"):
     """
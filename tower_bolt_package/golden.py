@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:43:52 2026
+
+@author: BECHY
+
+Golden output harness for the flange analysis. A corpus of anonymised and
+synthetic round Xml pairs is run through Flange and the header approvals,
+per bolt results and codes, stats and errors of every case are snapshot to a
+JSON file together with the time of each analysis stage. Checking a changed
+parser or evaluator against the snapshots shows every changed result and the
+speed of each case before and after.
+
+Only Flange and the report template are used, so the snapshots can be
+recorded with the Flange of an older checkout (record --baseline) and checked
+against the current one. tests/golden holds the synthetic corpus and its
+snapshots recorded with the code before the record and parser rewrites.
+"""
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as et
+
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package import flange as flange_module
+from tower_bolt_package.flange import Flange
+
+
+GOLDEN_NAME = "golden.json"
+GOLDEN_VERSION = 2
+TEMPLATE_NAME = "report_template.xlsx"
+# Relative difference allowed between floats, e.g. from a different summation order
+TOLERANCE = 1e-9
+# Runs per case, the fastest is kept
+REPEAT = 3
+# Differences listed per case
+MAX_DIFFS = 20
+# Header values replaced by anonymize_xml
+ANONYMIZED_FIELDS = ("TurbineVUI", "TowerVUI", "BoltVUI", "TensionerVUI", "PumpVUI",
+                     "OperatorID", "OperatorName", "Company")
+SYNTHETIC_PROJECT = "Synthetic"
+
+HEADER_FIELDS = ("Date", "SoftwareVersion", "ProgramID", "BoltType", "TurbineVUI",
+                 "TowerVUI", "BoltVUI", "TensionerVUI", "PumpVUI", "OperatorID",
+                 "OperatorName", "Company", "BoltSize", "BoltQTY", "ClampingLength",
+                 "FlangeLocation", "AngleSensorResetForce")
+
+# Synthetic cases by tower/flange folder: keyword arguments of synthetic_round
+# for both rounds, then for the second round only
+SYNTHETIC_CASES = {
+    "T01/Base-M1": ({}, {}),
+    "T01/M1-M2": ({"cycle_range": (2.0, 12.0)}, {"cycle_range": (0.5, 3.0)}),
+    "T01/M2-M3": ({"cycle_range": (20.0, 60.0), "max_cycles": 5}, {}),
+    "T01/M3-Top": ({"repeated": 6}, {"repeated": 3}),
+    "T02/Base-M1": ({"n_bolts": 24}, {"n_bolts": 23}),
+    "T02/M1-M2": ({}, {"bolt_size": "M48", "tensioner": "T-9", "start_hours": 200}),
+    "T02/M2-M3": ({}, {"start_hours": -30}),
+    "T02/M3-Top": ({"day_first": True}, {}),
+    "T03/Base-M1": ({"bolt_size": "M72", "max_cycles": 12, "n_bolts": 60}, {}),
+    "T03/M1-M2": ({"placeholders": True}, {}),
+    "T03/M2-M3": ({"n_bolts": 120, "bolt_size": "M56"}, {"n_bolts": 120}),
+    "T03/M3-Top": ({}, {"text_values": True}),
+}
+
+
+def synthetic_round(round_name: str, seed: int, n_bolts: int = 40, bolt_size: str = "M42",
+                    tensioner: str = "T-100", start: datetime = datetime(2024, 3, 1, 8),
+                    start_hours: float = 0, cycle_range: tuple = None, max_cycles: int = 4,
+                    repeated: int = 0, day_first: bool = False, placeholders: bool = False,
+                    text_values: bool = False) -> str:
+    """
+    Text of a synthetic round Xml file in the smart tensioner tool format.
+
+    Parameters
+    ----------
+    round_name : str
+        "first" or "second".
+    seed : int
+        Seed of the random cycle rotations.
+    n_bolts : int
+        Bolts tensioned, also the header BoltQTY.
+    start_hours : float
+        Hours from start to the header Date.
+    cycle_range : tuple
+        Range of each cycle's rotation. Defaults to a typical range of the round.
+    max_cycles : int
+        Most cycles of a bolt, at least 2.
+    repeated : int
+        Bolts tensioned a second time at the end of the round.
+    day_first : bool
+        Write the header Date day first without a time.
+    placeholders : bool
+        Write "-" or nothing into some of the record values.
+    text_values : bool
+        Write text into some of the rotation values, which cannot be parsed.
+    """
+    rng = random.Random(seed)
+    if cycle_range is None:
+        cycle_range = (5.0, 45.0) if round_name == "first" else (1.0, 10.0)
+    date = start + timedelta(hours=start_hours)
+    headers = {"Date": date.strftime("%d/%m/%Y" if day_first else "%m/%d/%Y %H:%M:%S"),
+               "SoftwareVersion": "1.2.3", "ProgramID": f"Installation {round_name} round",
+               "BoltType": "X", "TurbineVUI": "TV1", "TowerVUI": "TW1", "BoltVUI": "B1",
+               "TensionerVUI": tensioner, "PumpVUI": "P-7", "OperatorID": "op1",
+               "OperatorName": "Operator", "Company": "Company", "BoltSize": bolt_size,
+               "BoltQTY": str(n_bolts), "ClampingLength": "300", "FlangeLocation": "-",
+               "AngleSensorResetForce": "-"}
+
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', "<root>", "<headers>"]
+    lines += [f"<header><name>{name}</name><value>{headers[name]}</value></header>"
+              for name in HEADER_FIELDS]
+    lines.append("</headers>")
+    for bolt in list(range(1, n_bolts + 1)) + list(range(1, repeated + 1)):
+        date += timedelta(seconds=30)
+        cycles = [round(rng.uniform(*cycle_range), 1)
+                  for _ in range(rng.randint(2, max(max_cycles, 2)))]
+        values = [("BoltNo", str(bolt)), ("Date", date.strftime("%m/%d/%Y %H:%M:%S")),
+                  ("BoltRotationAngle", f"{sum(cycles):.1f}"), ("BoltRotationAngleTarget", "30")]
+        values += [(f"BoltRotationAngleCycle{i}", str(cycle)) for i, cycle in enumerate(cycles, 1)]
+        if len(cycles) < 3:
+            values.append(("BoltRotationAngleCycle3", "-"))
+        if placeholders and bolt % 7 == 0:
+            values[2] = ("BoltRotationAngle", "-")
+        if placeholders and bolt % 11 == 0:
+            values[4] = (values[4][0], "")
+        if text_values and bolt % 13 == 0:
+            values[2] = ("BoltRotationAngle", "n/a")
+        values.append(("Pressure", ""))
+        lines.append("<records>")
+        lines += [f"<record><name>{name}</name><value>{value}</value></record>"
+                  for name, value in values]
+        lines.append("</records>")
+    lines.append("</root>")
+    return "\n".join(lines)
+
+
+def write_synthetic_corpus(folderpath: str, seed: int = 0) -> list:
+    """
+    Write the SYNTHETIC_CASES flange folders below folderpath/Synthetic.
+    The same seed always gives the same files.
+
+    Returns
+    -------
+    paths : list
+        Flange folders written.
+    """
+    paths = []
+    for number, (case, (both, second)) in enumerate(SYNTHETIC_CASES.items()):
+        path = os.path.join(folderpath, SYNTHETIC_PROJECT, *case.split("/"))
+        os.makedirs(path, exist_ok=True)
+        # Second round four hours after the first unless the case says otherwise
+        for round_name, options in (("first", both),
+                                    ("second", {"start_hours": 4, **both, **second})):
+            text = synthetic_round(round_name, seed * 1000 + number * 2 + (round_name == "second"),
+                                   **options)
+            with open(os.path.join(path, f"{round_name}_round.xml"), "w", encoding="utf-8") as f:
+                f.write(text)
+        paths.append(path)
+    return paths
+
+
+def anonymize_xml(source: str, target: str, salt: str = ""):
+    """
+    Copy a round Xml file with the ANONYMIZED_FIELDS header values replaced
+    by hashes. Equal values get equal hashes, so the header comparisons of a
+    flange keep their results; records are copied unchanged.
+    """
+    tree = et.parse(source)
+    for group in tree.getroot():
+        if group.tag != "headers":
+            continue
+        for node in group:
+            name, value = node.find("name"), node.find("value")
+            if name is not None and value is not None and value.text \
+                    and name.text in ANONYMIZED_FIELDS:
+                digest = hashlib.md5((salt + value.text).encode("utf-8")).hexdigest()[:8]
+                value.text = f"{name.text}-{digest}"
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    tree.write(target, encoding="utf-8", xml_declaration=True)
+
+
+def find_cases(folderpath: str) -> list:
+    """Flange folders with Xml files below a corpus folder, sorted."""
+    return sorted(root for root, dirs, files in os.walk(folderpath)
+                  if any(name.lower().endswith(".xml") for name in files))
+
+
+def load_criteria():
+    """Failure criteria of the report template next to the Flange in use."""
+    template = os.path.join(os.path.dirname(os.path.abspath(flange_module.__file__)),
+                            TEMPLATE_NAME)
+    return pd.read_excel(template, "Failure Criteria", index_col=0, engine="openpyxl")
+
+
+def case_location(path: str) -> dict:
+    """Project, tower and flange of a case from its last three folder names."""
+    tower_path, flange = os.path.split(os.path.normpath(os.path.abspath(path)))
+    project_path, tower = os.path.split(tower_path)
+    return dict(project=os.path.basename(project_path), tower=tower, flange=flange)
+
+
+def _timed(name: str, stage: str):
+    method = getattr(Flange, name)
+
+    def timed(self, *args):
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            self.stage_seconds[stage] = (self.stage_seconds.get(stage, 0.0)
+                                         + time.perf_counter() - start)
+    return timed
+
+
+class TimedFlange(Flange):
+    """Flange that adds up the time of each analysis stage in stage_seconds."""
+    _Flange__get_data = _timed("_Flange__get_data", "parse")
+    _Flange__eval_headers = _timed("_Flange__eval_headers", "headers")
+    _Flange__eval_bolts = _timed("_Flange__eval_bolts", "bolts")
+    _Flange__get_stats = _timed("_Flange__get_stats", "stats")
+
+    def run(self):
+        self.stage_seconds = {}
+        start = time.perf_counter()
+        try:
+            return super().run()
+        finally:
+            self.stage_seconds["total"] = time.perf_counter() - start
+
+
+def _plain(value):
+    """JSON value of a frame cell or array."""
+    if isinstance(value, np.ndarray):
+        return [_plain(item) for item in value.tolist()]
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def snapshot(flange_obj, ok) -> dict:
+    """
+    Results of an analysed flange that must not change silently.
+
+    Returns
+    -------
+    dict
+        ok, required_rotation, headers (first, second and approval by
+        field), bolts (record values by bolt number), stats (the count and
+        total tables by row and column) and errors (lines). Only ok for a
+        failed analysis, whose partial results depend on where it stopped.
+    """
+    if not ok:
+        return {"ok": _plain(ok)}
+    result = {"ok": _plain(ok), "required_rotation": _plain(flange_obj.required_rotation),
+              "headers": None, "bolts": None, "stats": None,
+              "errors": [line for line in flange_obj.errors.split("\n") if line]}
+    if flange_obj.headers is not None:
+        result["headers"] = {str(field): [_plain(value) for value in row]
+                             for field, row in zip(flange_obj.headers.index,
+                                                   flange_obj.headers.to_numpy())}
+    if flange_obj.records is not None:
+        records = flange_obj.records
+        labels = [" / ".join(part for part in column if part) if isinstance(column, tuple)
+                  else str(column) for column in records.columns]
+        bolts = {}
+        for row in records.to_numpy():
+            values = dict(zip(labels, (_plain(value) for value in row)))
+            bolts[str(values.pop("BoltNo"))] = values
+        result["bolts"] = bolts
+    # Older code keeps the tables in a dict, newer code in a FlangeStats
+    stats = flange_obj.stats
+    frames = stats.to_frames() if hasattr(stats, "to_frames") else stats
+    if frames and frames.get("count") is not None:
+        result["stats"] = {name: {str(row): {str(column): _plain(value)
+                                             for column, value in frame.loc[row].items()}
+                                  for row in frame.index}
+                           for name, frame in frames.items()}
+    return result
+
+
+def run_case(path: str, criteria, repeat: int = REPEAT) -> tuple:
+    """
+    Analyse a case repeat times.
+
+    Returns
+    -------
+    (snapshot, seconds) : tuple
+        Snapshot of the last run and the fastest time of each stage.
+    """
+    best = {}
+    for _ in range(max(repeat, 1)):
+        flange_obj = TimedFlange(path, case_location(path), criteria)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = flange_obj.run()
+        for stage, seconds in flange_obj.stage_seconds.items():
+            best[stage] = min(seconds, best.get(stage, seconds))
+    return snapshot(flange_obj, ok), best
+
+
+def compare(expected, actual, tolerance: float = TOLERANCE, path: str = "") -> list:
+    """
+    Differences between two snapshots.
+
+    Returns
+    -------
+    diffs : list
+        "path: expected != actual" texts, empty if they match.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in list(expected) + [key for key in actual if key not in expected]:
+            if key not in actual:
+                diffs.append(f"{path}/{key}: missing")
+            elif key not in expected:
+                diffs.append(f"{path}/{key}: unexpected {actual[key]!r}")
+            else:
+                diffs += compare(expected[key], actual[key], tolerance, f"{path}/{key}")
+        return diffs
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        diffs = []
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            diffs += compare(a, b, tolerance, f"{path}/{i}")
+        return diffs
+    if isinstance(expected, float) and isinstance(actual, (int, float)) \
+            and not isinstance(actual, bool):
+        if math.isclose(expected, actual, rel_tol=tolerance, abs_tol=tolerance):
+            return []
+    elif expected == actual and type(expected) is type(actual):
+        return []
+    return [f"{path or '/'}: {expected!r} != {actual!r}"]
+
+
+def default_golden_path(corpus: str) -> str:
+    return os.path.join(corpus, GOLDEN_NAME)
+
+
+def record(corpus: str, golden_path: str = None, repeat: int = REPEAT) -> dict:
+    """
+    Run every case of a corpus and write the snapshots and stage times.
+
+    Returns
+    -------
+    golden : dict
+        Content of the golden file.
+    """
+    criteria = load_criteria()
+    cases = {}
+    for path in find_cases(corpus):
+        result, seconds = run_case(path, criteria, repeat)
+        cases[os.path.relpath(path, corpus).replace(os.sep, "/")] = {
+            "snapshot": result, "seconds": seconds}
+    golden = {"version": GOLDEN_VERSION, "created": datetime.now().isoformat(timespec="seconds"),
+              "repeat": repeat, "cases": cases}
+    with open(golden_path or default_golden_path(corpus), "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=1, sort_keys=True)
+    return golden
+
+
+def check(corpus: str, golden_path: str = None, repeat: int = REPEAT,
+          tolerance: float = TOLERANCE) -> list:
+    """
+    Run every case of a corpus and compare with the golden file.
+
+    Returns
+    -------
+    results : list
+        Dict per case with case, status ("ok", "changed", "new" or
+        "missing"), diffs, seconds and golden_seconds.
+    """
+    with open(golden_path or default_golden_path(corpus), "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    if golden.get("version") != GOLDEN_VERSION:
+        raise ValueError(f"Unsupported golden file version {golden.get('version')}.")
+    expected = golden["cases"]
+    criteria = load_criteria()
+    results = []
+    seen = set()
+    for path in find_cases(corpus):
+        case = os.path.relpath(path, corpus).replace(os.sep, "/")
+        seen.add(case)
+        result, seconds = run_case(path, criteria, repeat)
+        if case not in expected:
+            results.append({"case": case, "status": "new", "diffs": [],
+                            "seconds": seconds, "golden_seconds": {}})
+            continue
+        diffs = compare(expected[case]["snapshot"], result, tolerance)
+        results.append({"case": case, "status": "changed" if diffs else "ok", "diffs": diffs,
+                        "seconds": seconds, "golden_seconds": expected[case]["seconds"]})
+    for case in sorted(set(expected) - seen):
+        results.append({"case": case, "status": "missing", "diffs": [], "seconds": {},
+                        "golden_seconds": expected[case]["seconds"]})
+    return results
+
+
+def report(results: list, max_diffs: int = MAX_DIFFS) -> str:
+    """Text of check results: a line per case with its times, then the totals."""
+    stages = ("parse", "headers", "bolts", "stats", "total")
+    lines = [f"{'case':<32} {'status':<8} " + " ".join(f"{stage:>15}" for stage in stages)]
+    totals = {stage: [0.0, 0.0] for stage in stages}
+    for result in results:
+        cells = []
+        for stage in stages:
+            now = result["seconds"].get(stage)
+            before = result["golden_seconds"].get(stage)
+            if now is not None and before is not None:
+                totals[stage][0] += before
+                totals[stage][1] += now
+            cells.append(f"{_ms(before)}>{_ms(now)}")
+        lines.append(f"{result['case']:<32} {result['status']:<8} "
+                     + " ".join(f"{cell:>15}" for cell in cells))
+        for diff in result["diffs"][:max_diffs]:
+            lines.append(f"    {diff}")
+        if len(result["diffs"]) > max_diffs:
+            lines.append(f"    ... and {len(result['diffs']) - max_diffs} more")
+    lines.append(f"{'total ms, golden>now':<41} "
+                 + " ".join(f"{_ms(before)}>{_ms(now)}".rjust(15)
+                            for before, now in totals.values()))
+    speedup = totals["total"][0] / totals["total"][1] if totals["total"][1] else float("nan")
+    failed = sum(result["status"] != "ok" for result in results)
+    lines.append(f"{len(results) - failed}/{len(results)} cases match, "
+                 f"total time {speedup:.2f}x the golden run speed")
+    return "\n".join(lines)
+
+
+def _ms(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Golden output regression check of the flange analysis.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("synthetic", help="Write the synthetic cases into a corpus.")
+    make.add_argument("corpus")
+    make.add_argument("--seed", type=int, default=0)
+    anon = commands.add_parser("anonymize",
+                               help="Copy a flange folder's Xml files into a corpus, anonymised.")
+    anon.add_argument("flange_path")
+    anon.add_argument("target", help="Case folder to write, e.g. corpus/Anon/T01/Base-M1.")
+    anon.add_argument("--salt", default="", help="Secret mixed into the hashes.")
+    for name, text in (("record", "Snapshot every case of a corpus."),
+                       ("check", "Compare every case of a corpus with the snapshots.")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("corpus")
+        command.add_argument("--golden", default=None,
+                             help=f"Golden file. Defaults to {GOLDEN_NAME} in the corpus.")
+        command.add_argument("--repeat", type=int, default=REPEAT,
+                             help="Runs per case, the fastest is kept.")
+        if name == "record":
+            command.add_argument("--baseline", default=None,
+                                 help="Checkout whose Flange is recorded, e.g. a git worktree "
+                                      "of the commit before a rewrite.")
+        if name == "check":
+            command.add_argument("--tolerance", type=float, default=TOLERANCE,
+                                 help="Relative difference allowed between floats.")
+    args = parser.parse_args()
+
+    if args.command == "synthetic":
+        print(f"{len(write_synthetic_corpus(args.corpus, args.seed))} synthetic cases written")
+    elif args.command == "anonymize":
+        names = [name for name in os.listdir(args.flange_path) if name.lower().endswith(".xml")]
+        for name in names:
+            anonymize_xml(os.path.join(args.flange_path, name),
+                          os.path.join(args.target, name), args.salt)
+        print(f"{len(names)} Xml files anonymised")
+    elif args.command == "record" and args.baseline:
+        # Run this file again with the older package first on the path
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            filter(None, (os.path.abspath(args.baseline), os.environ.get("PYTHONPATH")))))
+        corpus = os.path.abspath(args.corpus)
+        golden_path = os.path.abspath(args.golden or default_golden_path(corpus))
+        sys.exit(subprocess.call([sys.executable, os.path.abspath(__file__), "record", corpus,
+                                  "--golden", golden_path, "--repeat", str(args.repeat)],
+                                 env=env, cwd=os.path.abspath(args.baseline)))
+    elif args.command == "record":
+        golden = record(args.corpus, args.golden, args.repeat)
+        print(f"{len(golden['cases'])} cases recorded")
+    else:
+        results = check(args.corpus, args.golden, args.repeat, args.tolerance)
+        print(report(results))
+        sys.exit(0 if all(result["status"] == "ok" for result in results) else 1)
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:58:14 2026
+
+@author: BECHY
+
+Resource limits of the report worker processes, for batch runs on shared
+workstations: a cap on the worker count, lower scheduling priority, and
+workers replaced after a number of jobs or when their memory passes a
+ceiling. The limits come from tension_config.json or the command line and
+can be restricted to working hours, so overnight runs use the whole machine.
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from datetime import datetime as dt
+from functools import partial
+import json
+import os
+import sys
+import threading
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(os.path.dirname(PACKAGE_DIR), "tension_config.json")
+MB = 1 << 20
+# Windows priority classes used for a positive nice value
+BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+IDLE_PRIORITY_CLASS = 0x40
+IDLE_NICE = 15
+
+# tension_config.json keys of each ResourceLimits field
+CONFIG_KEYS = {"max_workers": "max_workers",
+               "memory_mb": "worker_memory_mb",
+               "recycle_after": "worker_recycle_after",
+               "nice": "worker_nice",
+               "day_hours": "governor_day_hours"}
+
+
+def read_config(path: str = CONFIG_PATH) -> dict:
+    """The app's tension_config.json, empty if missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_day_hours(value) -> tuple:
+    """(start, end) hours from "8-18" or [8, 18], None if not set."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.replace(" ", "").split("-")
+    start, end = (int(hour) for hour in value)
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Day hours must be between 0 and 24, got {start}-{end}.")
+    return start, end
+
+
+@dataclass
+class ResourceLimits:
+    """
+    Resource limits of the report worker processes.
+
+    Attributes
+    ----------
+    max_workers : int
+        Most worker processes of a run, both pipeline stages together. None
+        for no limit. Below 2 the pipeline runs both stages on one pool.
+    memory_mb : float
+        Worker memory ceiling. Workers are replaced when one is above it
+        after a job. None for no ceiling.
+    recycle_after : int
+        Jobs a worker process runs before the workers are replaced. None to
+        keep them for the whole run.
+    nice : int
+        Niceness added to the workers, 0 for normal priority. On Windows any
+        positive value is below normal priority, IDLE_NICE and above idle.
+    day_hours : tuple
+        (start, end) hours in which max_workers and nice apply. None for
+        always. The memory ceiling and recycling apply at any hour. Running
+        pools change over when the hours start or end, see GovernedPool.
+    """
+    max_workers: int = None
+    memory_mb: float = None
+    recycle_after: int = None
+    nice: int = 0
+    day_hours: tuple = None
+
+    @classmethod
+    def from_config(cls, config: dict = None, **overrides) -> "ResourceLimits":
+        """
+        Limits from tension_config.json values, see CONFIG_KEYS. overrides,
+        e.g. command line values, replace the config values that are not None.
+        """
+        config = config or {}
+        values = {field: config.get(key) for field, key in CONFIG_KEYS.items()}
+        values.update({field: value for field, value in overrides.items() if value is not None})
+        return cls(max_workers=int(values["max_workers"]) if values["max_workers"] else None,
+                   memory_mb=float(values["memory_mb"]) if values["memory_mb"] else None,
+                   recycle_after=int(values["recycle_after"]) if values["recycle_after"] else None,
+                   nice=int(values["nice"] or 0),
+                   day_hours=parse_day_hours(values["day_hours"]))
+
+    def is_day(self, now: dt = None) -> bool:
+        """True if now is within day_hours, or day_hours is not set."""
+        if self.day_hours is None:
+            return True
+        start, end = self.day_hours
+        hour = (now or dt.now()).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def active(self, now: dt = None) -> "ResourceLimits":
+        """The limits that apply now: without max_workers and nice outside day_hours."""
+        if self.is_day(now):
+            return self
+        return replace(self, max_workers=None, nice=0)
+
+    @property
+    def recycles(self) -> bool:
+        """True if workers are replaced by job count or memory."""
+        return bool(self.memory_mb or self.recycle_after)
+
+    @property
+    def scheduled(self) -> bool:
+        """True if max_workers or nice only apply in day_hours."""
+        return bool(self.day_hours and (self.max_workers or self.nice))
+
+    def workers(self, requested: int = None) -> int:
+        """Worker count of a pool, requested capped at max_workers."""
+        requested = requested or os.cpu_count() or 1
+        return min(requested, self.max_workers) if self.max_workers else requested
+
+    def split(self, analysis: int, render: int) -> tuple:
+        """
+        Analysis and render worker counts of the two stage pipeline capped at
+        max_workers together. Rendering keeps most of the workers and each
+        stage keeps at least one, so below 2 workers the counts are (1, 1)
+        and the pipeline runs both stages on one shared pool.
+        """
+        if not self.max_workers or analysis + render <= self.max_workers:
+            return analysis, render
+        analysis = max(1, min(analysis, self.max_workers // 4))
+        return analysis, max(1, self.max_workers - analysis)
+
+    def text(self) -> str:
+        """One line description."""
+        parts = [f"max {self.max_workers} workers" if self.max_workers else "no worker limit"]
+        if self.nice:
+            parts.append(f"nice {self.nice}")
+        if self.memory_mb:
+            parts.append(f"{self.memory_mb:g} MB per worker")
+        if self.recycle_after:
+            parts.append(f"recycled after {self.recycle_after} jobs")
+        if self.day_hours:
+            parts.append("worker limit and priority from {}:00 to {}:00".format(*self.day_hours))
+        return ", ".join(parts)
+
+
+def add_arguments(parser):
+    """Add the limit options to a command line parser, see from_args."""
+    group = parser.add_argument_group(
+        "resource limits", "Override the tension_config.json values, see governor.CONFIG_KEYS.")
+    group.add_argument("--max-workers", type=int, default=None, help="Most worker processes.")
+    group.add_argument("--memory-mb", type=float, default=None,
+                       help="Replace the workers when one uses more memory.")
+    group.add_argument("--recycle-after", type=int, default=None,
+                       help="Replace the workers after this many jobs each.")
+    group.add_argument("--nice", type=int, default=None,
+                       help="Niceness added to the workers, e.g. 10.")
+    group.add_argument("--day-hours", type=parse_day_hours, default=None,
+                       help="Hours the worker limit and priority apply, e.g. 8-18.")
+
+
+def from_args(args, config: dict = None) -> ResourceLimits:
+    """Limits from the tension_config.json values and the add_arguments options."""
+    return ResourceLimits.from_config(
+        read_config() if config is None else config,
+        max_workers=args.max_workers, memory_mb=args.memory_mb,
+        recycle_after=args.recycle_after, nice=args.nice, day_hours=args.day_hours)
+
+
+def lower_priority(nice: int):
+    """Lower the scheduling priority of this process by nice."""
+    if nice <= 0:
+        return
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            kernel32.SetPriorityClass.argtypes = (ctypes.c_void_p, ctypes.c_uint32)
+            priority = IDLE_PRIORITY_CLASS if nice >= IDLE_NICE else BELOW_NORMAL_PRIORITY_CLASS
+            if not kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), priority):
+                raise ctypes.WinError()
+        else:
+            os.nice(nice)
+    except (OSError, AttributeError) as error:
+        print(f"Unable to lower the worker priority: {error}")
+
+
+def memory_mb() -> float:
+    """Resident memory of this process in MB, None if it cannot be read."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                        "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                        "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            psapi = ctypes.windll.psapi
+            psapi.GetProcessMemoryInfo.argtypes = (ctypes.c_void_p, ctypes.c_void_p,
+                                                   wintypes.DWORD)
+            if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                          ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / MB
+            return None
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current memory; kB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+def init_governed(initializer, initargs: tuple, nice: int):
+    """Worker process setup: the pool's initializer, then the priority."""
+    if initializer is not None:
+        initializer(*initargs)
+    lower_priority(nice)
+
+
+def _capped(requested: int, active: ResourceLimits) -> int:
+    return active.workers(requested)
+
+
+def governed_call(fn, *args):
+    """Run a job in a worker and return (result, worker pid, worker memory in MB)."""
+    return fn(*args), os.getpid(), memory_mb()
+
+
+class GovernedPool:
+
+    def __init__(self, workers: int, limits: ResourceLimits, initializer=None,
+                 initargs: tuple = (), sizing=None):
+        """
+        Process pool that keeps its workers within ResourceLimits. At most
+        workers jobs run at a time; the others wait here, not in the worker
+        processes. When a worker has run limits.recycle_after jobs, or is
+        above limits.memory_mb after a job, new jobs go to a new set of
+        worker processes while the old ones finish their running jobs and
+        exit, so the number of running jobs never exceeds workers.
+        Replacement workers get the priority that applies at that time. A
+        worker that dies, e.g. killed when out of memory, fails its running
+        jobs but not the ones still waiting.
+
+        The worker count and priority that apply now, see
+        ResourceLimits.active, are checked before each job is started. When
+        they change, e.g. when day_hours start during a night run, the
+        workers are replaced the same way.
+
+        Attributes
+        ----------
+        workers : int
+            Jobs running at the same time, as it applies now.
+        sizing : callable
+            Worker count for the limits that apply, called with
+            limits.active(). Defaults to limits.workers(workers).
+        limits : ResourceLimits
+            Limits of the workers.
+        recycles : int
+            Times the worker processes were replaced.
+        peak_mb : float
+            Highest worker memory seen after a job.
+
+        Methods
+        -------
+        submit(fn, *args)
+            Schedule a job, returns a Future.
+        shutdown(wait=True)
+            Run the scheduled jobs, then stop the workers.
+        """
+        self.limits = limits
+        self.sizing = sizing if sizing is not None else partial(_capped, workers)
+        self.workers, self._nice = self._applied()
+        self.initializer = initializer
+        self.initargs = initargs
+        self.recycles = 0
+        self.peak_mb = 0.0
+        self._changed = threading.Condition()
+        self._pending = deque()
+        self._running = 0
+        self._generation = 0
+        self._jobs = {}         # Jobs run by each worker pid of the current generation
+        self._recycle_due = False
+        self._closing = False
+        self._executor = None
+        self._retired = []
+        self._thread = threading.Thread(target=self._dispatch, name="GovernedPool",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        with self._changed:
+            if self._closing:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._pending.append((future, fn, args))
+            self._changed.notify()
+        return future
+
+    def _applied(self) -> tuple:
+        """Worker count and niceness that apply now."""
+        active = self.limits.active()
+        return max(1, self.sizing(active)), active.nice
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_governed,
+                                   initargs=(self.initializer, self.initargs, self._nice))
+
+    def _dispatch(self):
+        """Start jobs as workers come free and replace the workers when due."""
+        while True:
+            with self._changed:
+                while not (self._recycle_due or
+                           (self._pending and self._running < self.workers) or
+                           (self._closing and not self._pending)):
+                    self._changed.wait()
+                if self._pending and not self._recycle_due and self._executor is not None \
+                        and self._applied() != (self.workers, self._nice):
+                    self._recycle_due = True
+                if self._recycle_due:
+                    retired, self._executor = self._executor, None
+                    self._recycle_due = False
+                    self._generation += 1
+                    self._jobs = {}
+                    self.recycles += 1
+                    self.workers, self._nice = self._applied()
+                    job = None
+                elif self._pending and self._running < self.workers:
+                    if self._executor is None:
+                        self.workers, self._nice = self._applied()
+                    retired = None
+                    job = self._pending.popleft()
+                    self._running += 1
+                else:
+                    break
+                generation = self._generation
+            # Executor calls are made without the lock, their callbacks take it
+            if job is None:
+                if retired is not None:
+                    retired.shutdown(wait=False)
+                    self._retired.append(retired)
+                continue
+            future, fn, args = job
+            if not future.set_running_or_notify_cancel():
+                self._done(generation)
+                continue
+            try:
+                if self._executor is None:
+                    self._executor = self._new_executor()
+                try:
+                    job = self._executor.submit(governed_call, fn, *args)
+                except BrokenProcessPool:
+                    self._executor = self._new_executor()
+                    job = self._executor.submit(governed_call, fn, *args)
+                job.add_done_callback(partial(self._finished, future, generation))
+            except Exception as error:
+                self._done(generation)
+                future.set_exception(error)
+        for executor in self._retired + [self._executor]:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def _done(self, generation: int, pid: int = None, worker_mb: float = None,
+              broken: bool = False):
+        """Count a finished job and check whether the workers are due to be replaced."""
+        with self._changed:
+            self._running -= 1
+            if broken and generation == self._generation:
+                self._recycle_due = True
+            if worker_mb is not None:
+                self.peak_mb = max(self.peak_mb, worker_mb)
+            if pid is not None and generation == self._generation:
+                self._jobs[pid] = self._jobs.get(pid, 0) + 1
+                if ((self.limits.recycle_after and self._jobs[pid] >= self.limits.recycle_after)
+                        or (self.limits.memory_mb and worker_mb is not None
+                            and worker_mb > self.limits.memory_mb)):
+                    self._recycle_due = True
+            self._changed.notify()
+
+    def _finished(self, future: Future, generation: int, job: Future):
+        try:
+            result, pid, worker_mb = job.result()
+        except BaseException as error:
+            self._done(generation, broken=isinstance(error, BrokenProcessPool))
+            future.set_exception(error)
+            return
+        self._done(generation, pid, worker_mb)
+        future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        with self._changed:
+            self._closing = True
+            self._changed.notify()
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+        return False
+
+    def summary(self) -> str:
+        """Worker replacements and peak memory."""
+        return (f"Workers replaced {self.recycles} times, "
+                f"peak worker memory {self.peak_mb:.0f} MB ({self.limits.text()})")
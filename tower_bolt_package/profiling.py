@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:52:40 2026
+
+@author: BECHY
+
+Profiles the analysis and report stages of a single flange run with cProfile
+and tracemalloc, and writes the results next to the flange reports so they
+can be sent in for a slow flange.
+"""
+import argparse
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime as dt
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+
+TOP_N = 15
+
+
+class FlangeProfiler:
+
+    def __init__(self, location: dict, top: int = TOP_N):
+        """
+        Collects a cProfile profile and tracemalloc snapshots over the stages
+        of a flange run.
+
+        Attributes
+        ----------
+        location : dict
+            Project, tower and flange names, used for the file names.
+        top : int
+            Number of functions and allocation sites in the summaries.
+        stages : list
+            (name, seconds, peak traced memory in bytes) of each stage.
+        paths : list
+            Files written by save.
+
+        Methods
+        -------
+        stage(name:str)
+            Context manager profiling one stage.
+        save(out_dir:str)
+            Write the .prof file and the allocation report.
+        summary()
+            Stage times and the hot functions as text.
+        """
+        self.location = location
+        self.top = top
+        self.stages = []
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+        self.paths = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """Profile the code run inside the with block as one stage."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracing = True
+        if hasattr(tracemalloc, "reset_peak"):     # Python 3.9+, else peak of the run
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            yield
+        except BaseException:
+            self.profile.disable()
+            self.stop()
+            raise
+        self.profile.disable()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        self.snapshot = tracemalloc.take_snapshot()
+        self.stages.append((name, seconds, peak))
+
+    def stop(self):
+        """Stop tracing memory if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stats(self) -> pstats.Stats:
+        return pstats.Stats(self.profile, stream=io.StringIO())
+
+    def hot_functions(self) -> list:
+        """
+        (function, calls, own seconds, cumulative seconds) of the functions
+        with the most own time, the most first.
+        """
+        rows = []
+        for (filename, line, name), (cc, calls, own, cumulative, callers) in \
+                self.stats().stats.items():
+            where = name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+            rows.append((where, calls, own, cumulative))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:self.top]
+
+    def top_allocations(self) -> list:
+        """Allocation sites holding the most memory at the end of the last stage."""
+        if self.snapshot is None:
+            return []
+        snapshot = self.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+        return snapshot.statistics("lineno")[:self.top]
+
+    def summary(self) -> str:
+        """Stage times and the hot functions, for a dialog or the console."""
+        lines = [f"{name}: {seconds:.2f} s, peak memory {peak / 1e6:.1f} MB"
+                 for name, seconds, peak in self.stages]
+        lines.append("")
+        lines.append(f"Top {self.top} functions by own time (own s, cumulative s, calls):")
+        lines += [f"{own:8.3f} {cumulative:8.3f} {calls:>8}  {where}"
+                  for where, calls, own, cumulative in self.hot_functions()]
+        return "\n".join(lines)
+
+    def save(self, out_dir: str) -> list:
+        """
+        Write the profile next to the flange reports.
+
+        Returns
+        -------
+        paths : list
+            The .prof file, loadable with pstats or snakeviz, and the text
+            report with the stage times, hot functions and top allocations.
+        """
+        ts = dt.strftime(dt.today(), "%Y%m%d_%H%M%S")
+        location = self.location
+        base = os.path.join(out_dir, f"Profile-{location['project']}_{location['tower']}_"
+                                     f"{location['flange']}-{ts}")
+        self.profile.dump_stats(f"{base}.prof")
+
+        stream = io.StringIO()
+        stream.write(self.summary())
+        stream.write(f"\n\nTop {self.top} allocation sites at the end of the run:\n")
+        for stat in self.top_allocations():
+            frame = stat.traceback[0]
+            stream.write(f"{stat.size / 1024:10.1f} KiB {stat.count:>8} blocks  "
+                         f"{frame.filename}:{frame.lineno}\n")
+        stream.write("\nCumulative time:\n")
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top * 2)
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(stream.getvalue())
+        self.paths = [f"{base}.prof", f"{base}.txt"]
+        return self.paths
+
+
+def profile_flange(flange_path: str, location: dict, out_dir: str = "",
+                   output_pdf: bool = True, output_excel: bool = True,
+                   top: int = TOP_N) -> FlangeProfiler:
+    """
+    Analyse one flange and write its reports with every stage profiled, then
+    save the profile next to the reports.
+    """
+    from tower_bolt_package.batch import load_criteria, report_filename, TEMPLATE_PATH
+    from tower_bolt_package.flange import Flange
+    from tower_bolt_package.reporting import generate_pdf, pdf_profile, write_to_excel
+
+    out_dir = out_dir or flange_path
+    profiler = FlangeProfiler(location, top)
+    try:
+        with profiler.stage("Analysis"):
+            flange_obj = Flange(flange_path, location, load_criteria())
+            flange_obj.run()
+        output_path = os.path.join(out_dir, report_filename(location))
+        if output_excel:
+            with profiler.stage("Excel"):
+                write_to_excel(flange_obj, TEMPLATE_PATH, f"{output_path}.xlsx")
+        if output_pdf:
+            with profiler.stage("PDF"):
+                generate_pdf(flange_obj, f"{output_path}.pdf", pdf_profile(output_pdf))
+    finally:
+        profiler.stop()
+    profiler.save(out_dir)
+    return profiler
+
+
+if __name__ == "__main__":
+    from tower_bolt_package.reporting import PDF_PROFILES
+
+    parser = argparse.ArgumentParser(
+        description="Run one flange with cProfile and tracemalloc and save the profile "
+                    "next to its reports.")
+    parser.add_argument("flange_path", help="Flange folder with the round Xml files.")
+    parser.add_argument("--output", default="", help="Report folder. Defaults to the flange folder.")
+    parser.add_argument("--format", choices=["pdf", "excel", "both"], default="both")
+    parser.add_argument("--profile", choices=PDF_PROFILES, default="full",
+                        help="PDF pages to render.")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Functions to list.")
+    args = parser.parse_args()
+
+    path = os.path.normpath(os.path.abspath(args.flange_path))
+    tower_path, flange = os.path.split(path)
+    project_path, tower = os.path.split(tower_path)
+    location = dict(project=os.path.basename(project_path), tower=tower, flange=flange)
+
+    profiler = profile_flange(path, location, args.output,
+                              args.format in ("pdf", "both") and args.profile,
+                              args.format in ("excel", "both"), args.top)
+    print(profiler.summary())
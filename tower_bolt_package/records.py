@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:26:08 2026
+
+@author: BECHY
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime as dt
+from functools import lru_cache
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Format of the record dates written by the smart tensioner tool
+RECORD_DATE_FORMAT = "%m/%d/%Y %H:%M:%S"
+# Timestamp used for record dates that could not be parsed, the value of NaT
+NO_TIMESTAMP = np.iinfo(np.int64).min
+# Record dates as the tool writes them, zero padded, for the fast path of to_timestamps
+RECORD_DATE_PADDED = re.compile(r"(\d\d)/(\d\d)/((?:19|20)\d\d) (\d\d:\d\d:\d\d)")
+# Formats of the header Date, US formats are tested first
+HEADER_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%Y %H:%M:%S", "%d/%m/%Y", "%d/%m/%Y %H:%M:%S")
+
+CYCLE_PATTERN = re.compile(r"BoltRotationAngleCycle(\d+)$")
+
+# Values the tool writes for missing data
+BLANK_VALUES = (None, "", "-")
+
+
+def to_timestamps(values, date_format: str = RECORD_DATE_FORMAT) -> np.ndarray:
+    """
+    Dates as text to int64 ns since epoch in one vectorised pass, the same
+    dates dt.strptime accepts. Values that are missing or do not match the
+    format are NO_TIMESTAMP.
+    """
+    if date_format == RECORD_DATE_FORMAT:
+        # Dates as the tool writes them are converted by numpy, which rejects
+        # the same invalid dates, without the fixed cost of pandas
+        try:
+            return np.array([f"{match[3]}-{match[1]}-{match[2]}T{match[4]}"
+                             for match in map(RECORD_DATE_PADDED.fullmatch, values)],
+                            dtype="datetime64[ns]").astype(np.int64)
+        except (TypeError, ValueError):
+            pass
+    values = pd.Series(values, dtype=object)
+    if not len(values):
+        return np.zeros(0, dtype=np.int64)
+    timestamp = pd.to_datetime(values, format=date_format, errors="coerce") \
+        .to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    # pandas also reads "now"/"today" and rolls over second 60 and 61, which
+    # strptime rejects. Such values are checked one at a time.
+    odd = values.str.contains(r"[A-Za-z]|:6\d\s*$", regex=True, na=False).to_numpy()
+    for i in np.flatnonzero(odd):
+        try:
+            timestamp[i] = np.datetime64(dt.strptime(values.iat[i], date_format), "ns").astype(np.int64)
+        except ValueError:
+            timestamp[i] = NO_TIMESTAMP
+    return timestamp
+
+
+@lru_cache(maxsize=256)
+def infer_date_format(value, formats: tuple = HEADER_DATE_FORMATS):
+    """First of the formats that parses a date text, None if none does."""
+    for date_format in formats:
+        try:
+            dt.strptime(value, date_format)
+            return date_format
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def parse_header_date(value):
+    """Round date from a header value, US formats first like Flange. NaT if unknown."""
+    value = str(value)
+    date_format = infer_date_format(value)
+    if date_format is None:
+        return pd.NaT
+    return pd.Timestamp(dt.strptime(value, date_format))
+
+
+@dataclass
+class RoundHeader:
+    """
+    Header data of one round Xml file with a fixed schema. Unknown header
+    names are kept in extra.
+
+    Attributes
+    ----------
+    names : tuple
+        Header names in the order found in the Xml file.
+    extra : dict
+        Values of header names that are not part of the schema.
+    Date, SoftwareVersion, ... : str
+        Header values as text, None if missing.
+    """
+    __slots__ = ("names", "extra",
+                 "Date", "SoftwareVersion", "ProgramID", "BoltType", "TurbineVUI",
+                 "TowerVUI", "BoltVUI", "TensionerVUI", "PumpVUI", "OperatorID",
+                 "OperatorName", "Company", "BoltSize", "BoltQTY", "ClampingLength",
+                 "FlangeLocation", "AngleSensorResetForce", "MinBoltTensioningPressure",
+                 "MinBoltTensioningForce", "MinNutRotationAngleFirst",
+                 "MaxNutRotationAngleLast", "MinNutLooseningAngle", "MinNutTorque",
+                 "InitialMeanSettlement", "InitialMaxSettlement",
+                 "MinRequiredMeanClampingforce", "NoFirstTensioningProcess",
+                 "NoLastTensioningProcess", "TighteningsQTY", "MeanResidualForce",
+                 "FlangeApprovalTighteningsQTY", "FlangeApprovalFirstTightening",
+                 "FlangeApprovalLastTightening", "FlangeApprovalMeanResidualForce")
+
+    names: tuple
+    extra: dict
+    Date: str
+    SoftwareVersion: str
+    ProgramID: str
+    BoltType: str
+    TurbineVUI: str
+    TowerVUI: str
+    BoltVUI: str
+    TensionerVUI: str
+    PumpVUI: str
+    OperatorID: str
+    OperatorName: str
+    Company: str
+    BoltSize: str
+    BoltQTY: str
+    ClampingLength: str
+    FlangeLocation: str
+    AngleSensorResetForce: str
+    MinBoltTensioningPressure: str
+    MinBoltTensioningForce: str
+    MinNutRotationAngleFirst: str
+    MaxNutRotationAngleLast: str
+    MinNutLooseningAngle: str
+    MinNutTorque: str
+    InitialMeanSettlement: str
+    InitialMaxSettlement: str
+    MinRequiredMeanClampingforce: str
+    NoFirstTensioningProcess: str
+    NoLastTensioningProcess: str
+    TighteningsQTY: str
+    MeanResidualForce: str
+    FlangeApprovalTighteningsQTY: str
+    FlangeApprovalFirstTightening: str
+    FlangeApprovalLastTightening: str
+    FlangeApprovalMeanResidualForce: str
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Build the header from (name, value) pairs. Later duplicates of a
+        name overwrite earlier ones.
+        """
+        values = dict(pairs)
+        schema = HEADER_FIELDS
+        return cls(names=tuple(values),
+                   extra={name: value for name, value in values.items()
+                          if name not in schema},
+                   **{name: values.get(name) for name in schema})
+
+    def __len__(self):
+        return len(self.names)
+
+    def get(self, name: str, default=None):
+        """Value of a header name, schema or extra."""
+        if name in HEADER_FIELDS:
+            return getattr(self, name)
+        return self.extra.get(name, default)
+
+    def to_series(self) -> pd.Series:
+        """Header values indexed by name, in file order."""
+        return pd.Series([self.get(name) for name in self.names],
+                         index=list(self.names), dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Single column dataframe of the header values indexed by name."""
+        return self.to_series().to_frame()
+
+
+HEADER_FIELDS = frozenset(field.name for field in fields(RoundHeader)) - {"names", "extra"}
+
+
+@dataclass
+class RoundRecords:
+    """
+    Bolt record data of one round Xml file as typed arrays, one row per bolt.
+
+    Rotation angles are kept as float64 so the comparisons against the
+    required rotation give the same result as the values in the Xml file.
+
+    Attributes
+    ----------
+    bolt_no : numpy array
+        int16 bolt numbers.
+    total : numpy array
+        float64 BoltRotationAngle, the listed total rotation of the round.
+    angles : numpy array
+        (n_bolts, max_cycle) float64 BoltRotationAngleCycleN values.
+    cycles : numpy array
+        int16 highest cycle number recorded for each bolt.
+    timestamp : numpy array
+        int64 record Date in ns since epoch. NO_TIMESTAMP if not parsed.
+    fields : dict
+        float64 arrays of the other numeric record values by name.
+    text : dict
+        object arrays of record values that are not numeric by name, and of
+        the record dates if they are not all written as RECORD_DATE_FORMAT
+        with zero padding, so they keep their original text.
+    columns : tuple
+        Record names in the order they were found in the Xml file.
+    max_cycle : int
+        Highest cycle number in the file.
+    """
+    __slots__ = ("bolt_no", "total", "angles", "cycles", "timestamp",
+                 "fields", "text", "columns", "max_cycle")
+
+    bolt_no: np.ndarray
+    total: np.ndarray
+    angles: np.ndarray
+    cycles: np.ndarray
+    timestamp: np.ndarray
+    fields: dict
+    text: dict
+    columns: tuple
+    max_cycle: int
+
+    def __len__(self):
+        return len(self.bolt_no)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the numeric arrays."""
+        arrays = [self.bolt_no, self.total, self.angles, self.cycles, self.timestamp]
+        arrays += list(self.fields.values()) + list(self.text.values())
+        return sum(array.nbytes for array in arrays)
+
+    @classmethod
+    def from_rows(cls, rows, columns, timestamp=None):
+        """
+        Convert the record values to typed arrays, once.
+
+        Parameters
+        ----------
+        rows : list
+            Dicts of the record values as text by name, one per bolt.
+        columns : list
+            Record names in file order, including "Cycles".
+        timestamp : numpy array, optional
+            to_timestamps of the record dates if already parsed.
+
+        Returns
+        -------
+        RoundRecords
+            The converted records.
+        """
+        n = len(rows)
+        cycle_numbers = {name: int(match.group(1)) for name in columns
+                         for match in [CYCLE_PATTERN.match(name)] if match}
+        max_cycle = max(cycle_numbers.values(), default=0)
+
+        bolt_no = np.array([int(row["BoltNo"]) for row in rows], dtype=np.int16)
+        cycles = np.array([row["Cycles"] for row in rows], dtype=np.int16)
+        total = _to_float(rows, "BoltRotationAngle")
+        angles = np.zeros((n, max_cycle))
+        for name, number in cycle_numbers.items():
+            angles[:, number - 1] = _to_float(rows, name)
+
+        if timestamp is None:
+            timestamp = to_timestamps([row.get("Date") for row in rows])
+        dates_parsed = not (timestamp == NO_TIMESTAMP).any()
+
+        other = {}
+        text = {}
+        for name in columns:
+            if name in ("BoltNo", "Cycles", "BoltRotationAngle") or name in cycle_numbers:
+                continue
+            if name == "Date" and dates_parsed:
+                # Zero padded dates are rebuilt from the timestamps as they were
+                # written, other dates keep their text
+                values = [row.get(name) for row in rows]
+                if not all(map(RECORD_DATE_PADDED.fullmatch, values)):
+                    text[name] = np.array(values, dtype=object)
+                continue
+            try:
+                other[name] = _to_float(rows, name)
+            except ValueError:
+                values = [row.get(name) for row in rows]
+                text[name] = np.array([0 if value in BLANK_VALUES else value
+                                       for value in values], dtype=object)
+
+        return cls(bolt_no=bolt_no, total=total, angles=angles, cycles=cycles,
+                   timestamp=timestamp, fields=other, text=text,
+                   columns=tuple(columns), max_cycle=max_cycle)
+
+    def dates(self) -> np.ndarray:
+        """Record dates as text, as written in the Xml file."""
+        if "Date" in self.text:
+            return self.text["Date"]
+        return pd.to_datetime(self.timestamp).strftime(RECORD_DATE_FORMAT).to_numpy(dtype=object)
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one record name."""
+        if name == "BoltNo":
+            return self.bolt_no.astype(int)
+        if name == "Cycles":
+            return self.cycles.astype(int)
+        if name == "BoltRotationAngle":
+            return self.total
+        if name == "Date" and "Date" not in self.text:
+            return self.dates()
+        match = CYCLE_PATTERN.match(name)
+        if match:
+            return self.angles[:, int(match.group(1)) - 1]
+        if name in self.text:
+            return self.text[name]
+        return self.fields[name]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Records as a dataframe with one column per record name, indexed by
+        bolt number.
+        """
+        return pd.DataFrame({name: self.column(name) for name in self.columns},
+                            index=pd.Index(self.bolt_no.astype(str), dtype=object))
+
+
+@dataclass
+class RoundData:
+    """
+    Parsed data of one round Xml file.
+
+    Attributes
+    ----------
+    path : str
+        Xml file path.
+    header : RoundHeader
+        Header data.
+    records : RoundRecords
+        Bolt record data.
+    """
+    __slots__ = ("path", "header", "records")
+
+    path: str
+    header: RoundHeader
+    records: RoundRecords
+
+
+def _to_float(rows, name: str) -> np.ndarray:
+    """float64 array of one record name with missing values as 0."""
+    return np.array([0 if row.get(name) in BLANK_VALUES else row[name]
+                     for row in rows], dtype=float)
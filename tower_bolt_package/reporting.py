@@ -58,8 +58,8 @@ def write_to_excel(flange_obj, template_path: str, filename: str):
         return 0
 
     headers = flange_obj.headers
-    rd1 = flange_obj.xml_data["first"]["records"]
-    rd2 = flange_obj.xml_data["second"]["records"]
+    rd1 = flange_obj.xml_data["first"]["records"].to_frame()
+    rd2 = flange_obj.xml_data["second"]["records"].to_frame()
 
     try:
         # Create the output report file by copying template
@@ -81,6 +81,9 @@ def write_to_excel(flange_obj, template_path: str, filename: str):
             headers.to_excel(writer, sheet_name="Headers")
             rd1.to_excel(writer, sheet_name="First Round")
             rd2.to_excel(writer, sheet_name="Second Round")
+            diagnostics = getattr(flange_obj, "diagnostics", None)
+            if diagnostics:
+                diagnostics.to_frame().to_excel(writer, sheet_name="Diagnostics", index=False)
 
         return filename
     except Exception:
@@ -112,80 +115,8 @@ def _inch_to_fig():
     return inch_h, inch_v
 
 
-def generate_pdf(flange_obj, filepath: str):
-    """
-    Build the multi-page PDF report from flange_obj data.
-    """
-    if not getattr(flange_obj, "has_run", False):
-        return
-
-    project = flange_obj.location["project"]
-    tower = flange_obj.location["tower"]
-    flange = flange_obj.location["flange"]
-    headers = flange_obj.headers
-    records = flange_obj.records.sort_values(by=["BoltNo"])
-    required_rotation = flange_obj.required_rotation
-    stats = flange_obj.stats
-
-    initials = os.getlogin()
-    date = str(dt.today())[:19]
-
-    # Only show headers with actual Approval status
-    print_headers = headers.loc[~headers["Approval"].str.contains("N/A", na=False), :]
-
-    # Check for failed bolts
-    failed_bolts = records[records["Approval"] == "Fail"]
-    has_failures = len(failed_bolts) > 0
-
-    inch_h, inch_v = _inch_to_fig()
-
-    # ===========
-    # Main Report Page
-    # ===========
-    fig, ((ax0, ax1), (ax2, ax3)) = plt.subplots(
-        nrows=2, ncols=2,
-        figsize=[8.5, 11],
-        dpi=400,
-        gridspec_kw={"hspace": 0.1, "wspace": 0.05},
-    )
-
-    # Layout
-    ax0.set_position([0.5 * inch_h, 9.5 * inch_v, 1 - inch_h, 1.0 * inch_v])      # header (smaller)
-    ax1.set_position([0.5 * inch_h, 6.3 * inch_v, 1 - inch_h, 2.7 * inch_v])      # header table (compressed)
-    ax2.set_position([0.5 * inch_h, 3.5 * inch_v, 1 - inch_h, 2.5 * inch_v])      # stats tables (adjusted)
-    ax3.set_position([1.2 * inch_h, 1.0 * inch_v, 0.8 - inch_h, 1.5 * inch_v])      # rotation chart (moved right 0.5")
-
-    # Header (ax0)
-    ax0.axis("off")
-    ax0.text(
-        0.5, 1.10, "Flange Bolt Report",
-        ha="center", va="top", fontweight="extra bold", fontsize="xx-large",
-        color=vestas_colors["Night Sky"],
-    )
-    ax0.axhline(0.85, color=vestas_colors["Night Sky"])
-    header_text1 = "\n".join([
-        f"Project: {project}",
-        f"Tower: {tower}",
-        f"Flange: {flange}",
-        f"Report Date: {date}",
-        f"Report Generated By: {initials}",
-        "",
-    ])
-    header_text2 = "\n".join([
-        "PDF report generated by flange report Python tool",
-        "for Vestas AME Service Engineering.",
-        "",
-        "VAME flange bolt tension lead: GEOBE",
-        "Software maintained by: TOBHI.",
-        "",
-    ])
-    ax0.text(0, 0.75, header_text1, ha="left", va="top", fontweight="bold", fontsize="medium")
-    ax0.text(1, 0, header_text2, ha="right", va="bottom", fontsize="small")
-
-    # Header Table (ax1)
-    ax1.set_title("Header Data from Xml Files", fontsize="large", fontweight="bold")
-    ax1.axis("off")
-
+def _header_table_cells(print_headers: pd.DataFrame):
+    """Cell text and colors of the header table."""
     vals = np.append(
         np.transpose([print_headers.index.to_numpy()]),
         print_headers.to_numpy(),
@@ -193,6 +124,13 @@ def generate_pdf(flange_obj, filepath: str):
     )
     colors = np.full_like(vals, [vestas_colors["Light Grey"], "w", "w", "w"])
     colors[:, 3] = color_code(print_headers["Approval"])
+    return vals, colors
+
+
+def _draw_header_table(ax1, vals, colors):
+    """Header table of the report page, see _header_table_cells."""
+    ax1.set_title("Header Data from Xml Files", fontsize="large", fontweight="bold")
+    ax1.axis("off")
 
     table = ax1.table(
         cellText=vals,
@@ -210,7 +148,9 @@ def generate_pdf(flange_obj, filepath: str):
         cell.set_text_props(fontsize="small")
     table.auto_set_column_width(range(np.shape(colors)[1]))
 
-    # Stats Tables (ax2)
+
+def _draw_stats_tables(ax2, total_table, count):
+    """Rotation stats and bolts per cycle tables of the report page."""
     ax2.text(
         0.5, 1.0, "Bolt Rotation Data",
         ha="center", va="top", fontweight="extra bold", fontsize="x-large",
@@ -221,7 +161,7 @@ def generate_pdf(flange_obj, filepath: str):
 
     # Total stats table (LEFT)
     table = ax2.table(
-        cellText=stats["total"].to_numpy(),
+        cellText=total_table,
         colLabels=["First\nRound", "Second\nRound", "Total\nRotation"],
         rowLabels=["Mean\nRotation", "Standard\nDeviation"],
         colColours=[vestas_colors["Medium Grey"]] * 3,
@@ -238,7 +178,7 @@ def generate_pdf(flange_obj, filepath: str):
 
     # Counts table (RIGHT)
     table = ax2.table(
-        cellText=stats["count"].to_numpy().transpose(),
+        cellText=count,
         rowLabels=["First\nRound", "Second\nRound"],
         colLabels=["Cycle 1", "Cycle 2", "Cycle 3+"],
         colColours=[vestas_colors["Medium Grey"]] * 3,
@@ -256,7 +196,9 @@ def generate_pdf(flange_obj, filepath: str):
     ax2.text(0.24, 0.83, "Bolt Rotation Angles", fontweight="bold", fontsize="medium", ha="center")
     ax2.text(0.76, 0.83, "Rotated Bolts Per Cycle", fontweight="bold", fontsize="medium", ha="center")
 
-    # Rotation chart (ax3)
+
+def _rotation_chart_data(records: pd.DataFrame):
+    """Step positions, stacked cycle rotations and round totals of the chart."""
     boltnos = records[("BoltNo", "")].to_numpy()
     boltnos = np.append(min(boltnos) - 0.5, np.append(boltnos, max(boltnos) + 0.5))
 
@@ -270,6 +212,15 @@ def generate_pdf(flange_obj, filepath: str):
     ].fillna(0).to_numpy()
     vals = np.vstack([vals[0, :], vals, vals[-1, :]])
 
+    rd1_total = np.append(records[("First Round", "Round Total")].iloc[0], records[("First Round", "Round Total")])
+    rd1_total = np.append(rd1_total, rd1_total[-1])
+    total = np.append(records["Total Rotation"].iloc[0], records["Total Rotation"])
+    total = np.append(total, total[-1])
+    return boltnos, vals, rd1_total, total
+
+
+def _draw_rotation_chart(ax3, boltnos, vals, rd1_total, total, required_rotation):
+    """Stacked rotation chart of the report page, see _rotation_chart_data."""
     ax3.grid(True)
     ax3.set_axisbelow(True)
     ax3.stackplot(
@@ -289,11 +240,6 @@ def generate_pdf(flange_obj, filepath: str):
         edgecolor=vestas_colors["Medium Grey"],
     )
 
-    rd1_total = np.append(records[("First Round", "Round Total")].iloc[0], records[("First Round", "Round Total")])
-    rd1_total = np.append(rd1_total, rd1_total[-1])
-    total = np.append(records["Total Rotation"].iloc[0], records["Total Rotation"])
-    total = np.append(total, total[-1])
-
     ax3.step(boltnos, rd1_total, color="w", where="mid", linewidth=1.5)
     ax3.step(boltnos, total, color="k", where="mid", linewidth=1.5)
     ax3.set_xlim(0, max(boltnos) + 1)
@@ -303,54 +249,252 @@ def generate_pdf(flange_obj, filepath: str):
     ax3.set_ylabel("Rotation Degrees")
     ax3.set_xticks(np.arange(0, max(boltnos) + 1, 5))
 
-    # Save both pages to the same PDF
-    with PdfPages(filepath) as pdf:
-        # Save main report page
-        fig.supxlabel(
-            f"Report Generated at {date} for {project}-{tower}-{flange} by user: {initials}",
-            fontsize=8,
-        )
-        pdf.savefig()
-        plt.close(fig)
-
-        # Create failure analysis page (only if there are failures)
-        if has_failures:
-            # ===========
-            # Failure Analysis Page - Simplified
-            # ===========
-            fig_fail = plt.figure(figsize=[8.5, 11], dpi=400)
-            ax_fail = fig_fail.add_axes([0.1, 0.1, 0.8, 0.8])
-
-            # Page header
-            ax_fail.text(
-                0.5, 1.0, f"FAILED BOLTS",
-                ha="center", va="top", fontweight="extra bold", fontsize="xx-large",
-                color=vestas_colors["Earth Red"],
-            )
-            ax_fail.axhline(0.95, color=vestas_colors["Earth Red"], linewidth=4)
-
-            # Get failed bolt information
-            failed_bolt_nos = sorted(failed_bolts[("BoltNo", "")].tolist())
-
-            # Create the failure report text
-            failure_text = f"Number of Failed Bolts: {len(failed_bolt_nos)}\n\n"
-            failure_text += "Failed Bolt Numbers:\n"
-            failure_text += abbreviate_numbers(failed_bolt_nos)
-            failure_text += "\n\nFailure Reason: Insufficient Total Rotation"
-
-            # Display the failure information
-            ax_fail.text(
-                0.05, 0.85, failure_text,
-                ha="left", va="top", fontsize="large", fontweight="bold",
-                color=vestas_colors["Night Sky"],
-                linespacing=1.5,
-            )
 
-            ax_fail.axis("off")
+# PDF render profiles. "full" is the report page and the failed bolts page,
+# "summary" one low resolution page of text and a small chart for triage,
+# "failures" only the failed bolts page, no file for flanges without failures.
+PDF_PROFILES = ("full", "summary", "failures")
+SUMMARY_DPI = 100
+# Errors and alerts listed on the summary page
+SUMMARY_DIAGNOSTICS = 12
+
+
+def pdf_profile(output_pdf) -> str:
+    """
+    Render profile of an output_pdf option as used by batch and the GUI:
+    True is "full", a profile name is itself, False or None is no PDF.
+    """
+    if not output_pdf:
+        return None
+    if output_pdf is True:
+        return "full"
+    if output_pdf not in PDF_PROFILES:
+        raise ValueError(f"Unknown PDF profile {output_pdf!r}, expected one of {PDF_PROFILES}.")
+    return output_pdf
+
+
+def _report_data(flange_obj) -> dict:
+    """Values shared by the report pages."""
+    records = flange_obj.records.sort_values(by=["BoltNo"])
+    failed_bolts = records[records["Approval"] == "Fail"]
+    location = flange_obj.location
+    return {"project": location["project"],
+            "tower": location["tower"],
+            "flange": location["flange"],
+            "flange_obj": flange_obj,
+            "records": records,
+            "failed_bolt_nos": sorted(failed_bolts[("BoltNo", "")].tolist()),
+            "initials": os.getlogin(),
+            "date": str(dt.today())[:19]}
+
+
+def _footer(fig, data: dict):
+    fig.supxlabel(
+        f"Report Generated at {data['date']} for {data['project']}-{data['tower']}-"
+        f"{data['flange']} by user: {data['initials']}",
+        fontsize=8,
+    )
+
+
+def _main_page(data: dict):
+    """Report page: header, header table, stats tables and rotation chart."""
+    flange_obj = data["flange_obj"]
+    headers = flange_obj.headers
+    stats = flange_obj.stats
+
+    # Only show headers with actual Approval status
+    print_headers = headers.loc[~headers["Approval"].str.contains("N/A", na=False), :]
+
+    inch_h, inch_v = _inch_to_fig()
+
+    fig, ((ax0, ax1), (ax2, ax3)) = plt.subplots(
+        nrows=2, ncols=2,
+        figsize=[8.5, 11],
+        dpi=400,
+        gridspec_kw={"hspace": 0.1, "wspace": 0.05},
+    )
+
+    # Layout
+    ax0.set_position([0.5 * inch_h, 9.5 * inch_v, 1 - inch_h, 1.0 * inch_v])      # header (smaller)
+    ax1.set_position([0.5 * inch_h, 6.3 * inch_v, 1 - inch_h, 2.7 * inch_v])      # header table (compressed)
+    ax2.set_position([0.5 * inch_h, 3.5 * inch_v, 1 - inch_h, 2.5 * inch_v])      # stats tables (adjusted)
+    ax3.set_position([1.2 * inch_h, 1.0 * inch_v, 0.8 - inch_h, 1.5 * inch_v])      # rotation chart (moved right 0.5")
+
+    # Header (ax0)
+    ax0.axis("off")
+    ax0.text(
+        0.5, 1.10, "Flange Bolt Report",
+        ha="center", va="top", fontweight="extra bold", fontsize="xx-large",
+        color=vestas_colors["Night Sky"],
+    )
+    ax0.axhline(0.85, color=vestas_colors["Night Sky"])
+    header_text1 = "\n".join([
+        f"Project: {data['project']}",
+        f"Tower: {data['tower']}",
+        f"Flange: {data['flange']}",
+        f"Report Date: {data['date']}",
+        f"Report Generated By: {data['initials']}",
+        "",
+    ])
+    header_text2 = "\n".join([
+        "PDF report generated by flange report Python tool",
+        "for Vestas AME Service Engineering.",
+        "",
+        "VAME flange bolt tension lead: GEOBE",
+        "Software maintained by: TOBHI.",
+        "",
+    ])
+    ax0.text(0, 0.75, header_text1, ha="left", va="top", fontweight="bold", fontsize="medium")
+    ax0.text(1, 0, header_text2, ha="right", va="bottom", fontsize="small")
+
+    # Header Table (ax1)
+    _draw_header_table(ax1, *_header_table_cells(print_headers))
+
+    # Stats Tables (ax2)
+    _draw_stats_tables(ax2, stats.total_table(), stats.count.transpose())
+
+    # Rotation chart (ax3)
+    _draw_rotation_chart(ax3, *_rotation_chart_data(data["records"]), flange_obj.required_rotation)
+
+    _footer(fig, data)
+    return fig
+
+
+def _failure_page(data: dict, footer: bool = False):
+    """Failed bolts page. The footer identifies the flange when it is the only page."""
+    fig_fail = plt.figure(figsize=[8.5, 11], dpi=400)
+    ax_fail = fig_fail.add_axes([0.1, 0.1, 0.8, 0.8])
+
+    # Page header
+    ax_fail.text(
+        0.5, 1.0, f"FAILED BOLTS",
+        ha="center", va="top", fontweight="extra bold", fontsize="xx-large",
+        color=vestas_colors["Earth Red"],
+    )
+    ax_fail.axhline(0.95, color=vestas_colors["Earth Red"], linewidth=4)
+
+    # Get failed bolt information
+    failed_bolt_nos = data["failed_bolt_nos"]
+
+    # Create the failure report text
+    failure_text = f"Number of Failed Bolts: {len(failed_bolt_nos)}\n\n"
+    failure_text += "Failed Bolt Numbers:\n"
+    failure_text += abbreviate_numbers(failed_bolt_nos)
+    failure_text += "\n\nFailure Reason: Insufficient Total Rotation"
+
+    # Display the failure information
+    ax_fail.text(
+        0.05, 0.85, failure_text,
+        ha="left", va="top", fontsize="large", fontweight="bold",
+        color=vestas_colors["Night Sky"],
+        linespacing=1.5,
+    )
+
+    ax_fail.axis("off")
+    if footer:
+        _footer(fig_fail, data)
+    return fig_fail
+
+
+def _summary_page(data: dict):
+    """Triage page: result counts, stats, failed bolts, findings and a small chart."""
+    flange_obj = data["flange_obj"]
+    records = data["records"]
+    stats = flange_obj.stats
+    counts = records["Approval"].value_counts()
+    failed_bolt_nos = data["failed_bolt_nos"]
+    findings = [item for item in getattr(flange_obj, "diagnostics", [])
+                if item.severity != "Info"]
+
+    fig = plt.figure(figsize=[8.5, 11], dpi=SUMMARY_DPI)
+    ax_text = fig.add_axes([0.08, 0.35, 0.84, 0.6])
+    ax_text.axis("off")
+    ax_text.text(
+        0.5, 1.0, "Flange Bolt Summary",
+        ha="center", va="top", fontweight="bold", fontsize="xx-large",
+        color=vestas_colors["Night Sky"],
+    )
+    ax_text.axhline(0.94, color=vestas_colors["Night Sky"])
+    lines = [
+        f"Project: {data['project']}    Tower: {data['tower']}    Flange: {data['flange']}",
+        "",
+        "Bolts: " + "    ".join(f"{name} {int(counts.get(name, 0))}"
+                                for name in ("Pass", "Alert", "Fail")),
+        f"Total rotation: mean {stats.total_mean:.1f}, SD {stats.total_std:.1f}, "
+        f"required {flange_obj.required_rotation}",
+        "Failed bolts: " + (abbreviate_numbers(failed_bolt_nos) if failed_bolt_nos else "none"),
+        "",
+        f"Errors and alerts: {len(findings)}",
+    ]
+    lines += [f"  {item.severity}: {item.message}" for item in findings[:SUMMARY_DIAGNOSTICS]]
+    if len(findings) > SUMMARY_DIAGNOSTICS:
+        lines.append(f"  ... and {len(findings) - SUMMARY_DIAGNOSTICS} more")
+    ax_text.text(0, 0.9, "\n".join(lines), ha="left", va="top", fontsize="medium",
+                 linespacing=1.5, wrap=True)
+
+    # Round and total rotation per bolt against the requirement
+    ax_chart = fig.add_axes([0.12, 0.08, 0.8, 0.22])
+    boltnos = records[("BoltNo", "")].to_numpy()
+    ax_chart.step(boltnos, records[("First Round", "Round Total")].to_numpy(),
+                  color=vestas_colors["Blue Sky 01"], where="mid", linewidth=1)
+    ax_chart.step(boltnos, records["Total Rotation"].to_numpy(), color="k",
+                  where="mid", linewidth=1)
+    ax_chart.axhline(flange_obj.required_rotation, color="k", linestyle="--", linewidth=0.8)
+    if failed_bolt_nos:
+        failed = records[("BoltNo", "")].isin(failed_bolt_nos).to_numpy()
+        ax_chart.plot(boltnos[failed], records["Total Rotation"].to_numpy()[failed], "o",
+                      color=vestas_colors["Earth Red"], markersize=3)
+    ax_chart.set_xlabel("Bolt #")
+    ax_chart.set_ylabel("Rotation Degrees")
+    ax_chart.grid(True, linewidth=0.5)
+
+    _footer(fig, data)
+    return fig
+
+
+def generate_pdf(flange_obj, filepath: str, profile: str = "full"):
+    """
+    Build the PDF report from flange_obj data. Pages are built one at a time
+    and only if the profile includes them.
+
+    Parameters
+    ----------
+    flange_obj : Flange
+        Analysed flange.
+    filepath : str
+        PDF file to write.
+    profile : str
+        One of PDF_PROFILES.
+
+    Returns
+    -------
+    str
+        The file path, None if the flange has not run or the profile has no
+        page for it (no failures with "failures").
+    """
+    if not getattr(flange_obj, "has_run", False):
+        return None
+    if profile not in PDF_PROFILES:
+        raise ValueError(f"Unknown PDF profile {profile!r}, expected one of {PDF_PROFILES}.")
+
+    data = _report_data(flange_obj)
+    has_failures = len(data["failed_bolt_nos"]) > 0
+    if profile == "full":
+        # Failure analysis page only if there are failures
+        pages = [_main_page] + ([_failure_page] if has_failures else [])
+    elif profile == "summary":
+        pages = [_summary_page]
+    else:
+        pages = [lambda data: _failure_page(data, footer=True)] if has_failures else []
+    if not pages:
+        return None
 
-            # Save failure analysis page
-            pdf.savefig(fig_fail)
-            plt.close(fig_fail)
+    with PdfPages(filepath) as pdf:
+        for page in pages:
+            fig = page(data)
+            pdf.savefig(fig)
+            plt.close(fig)
+    return filepath
 
 
 def abbreviate_numbers(lst: list) -> str:
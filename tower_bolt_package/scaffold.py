@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:14:05 2026
+
+@author: BECHY
+
+Project folder trees from a manifest. The project/tower/flange folders of
+many projects are planned in memory, compared with one listing of the
+folders that already exist and only the missing ones are created, many at a
+time, so a large site on a synced share is set up without a stat and mkdir
+round trip per folder.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import csv
+import json
+import os
+
+
+DEFAULT_SEGMENTS = 4
+WORKERS = 16
+
+
+def flange_names(n_segments: int) -> list:
+    """Flange folder names of a tower with n segments, Base-M1 ... Mn-Top."""
+    names = []
+    for i in range(n_segments):
+        seg1 = "Base" if i == 0 else f"M{i}"
+        seg2 = "Top" if i == n_segments - 1 else f"M{i+1}"
+        names.append(f"{seg1}-{seg2}")
+    return names
+
+
+def _towers(value) -> list:
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    return [str(tower).strip() for tower in value or [] if str(tower).strip()]
+
+
+def _check_name(name: str, number: int):
+    """A project or tower name must be a single folder below its parent."""
+    separators = [sep for sep in ("/", "\\", os.sep, os.altsep) if sep]
+    if name in (".", "..") or any(sep in name for sep in separators):
+        raise ValueError(f"Manifest row {number}: {name!r} is not a valid folder name.")
+
+
+def read_manifest(filepath: str, segments: int = DEFAULT_SEGMENTS) -> list:
+    """
+    Projects of a manifest file.
+
+    A CSV manifest has a header row with the columns project, tower and
+    optionally segments, one row per tower; a row may also list several
+    towers separated by semicolons. A JSON manifest is a list of objects
+    with project, towers (list or comma separated) and optionally segments.
+
+    Returns
+    -------
+    entries : list
+        Dict per row with project, towers (list) and segments (int).
+
+    Raises
+    ------
+    ValueError
+        If a row has no project or tower, a project or tower name is not a
+        single folder name (path separators, "." or "..") or the segments
+        are not a whole number of at least 1.
+    """
+    if filepath.lower().endswith(".json"):
+        with open(filepath, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("projects", [])
+    else:
+        with open(filepath, "r", encoding="utf-8-sig", newline="") as f:
+            rows = [{key.strip().lower(): value for key, value in row.items() if key}
+                    for row in csv.DictReader(f)]
+
+    entries = []
+    for number, row in enumerate(rows, 1):
+        project = str(row.get("project") or "").strip()
+        towers = _towers(row.get("towers", row.get("tower")))
+        if not project or not towers:
+            raise ValueError(f"Manifest row {number} needs a project and at least one tower.")
+        for name in [project] + towers:
+            _check_name(name, number)
+        try:
+            n_segments = int(row.get("segments") or segments)
+        except ValueError:
+            raise ValueError(f"Manifest row {number}: segments must be a whole number.")
+        if n_segments < 1:
+            raise ValueError(f"Manifest row {number}: segments must be at least 1.")
+        entries.append({"project": project, "towers": towers, "segments": n_segments})
+    return entries
+
+
+def _list_folders(path: str) -> list:
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries if entry.is_dir()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+class FolderPlan:
+
+    def __init__(self, parent_path: str, entries: list, workers: int = WORKERS):
+        """
+        The project/tower/flange folders of manifest entries below a parent
+        folder, compared with the folders that exist.
+
+        Attributes
+        ----------
+        parent_path : str
+            Folder the projects are created in.
+        folders : list
+            Relative paths of all planned folders, parents first.
+        existing : set
+            Normalised relative paths of the planned levels found by scan.
+        missing : list
+            Planned folders not found by scan, parents first.
+        workers : int
+            Folders listed or created at the same time.
+
+        Methods
+        -------
+        scan()
+            List the existing folders, one listing per planned parent.
+        build(progress=None)
+            Create the missing folders.
+        preview(limit=30)
+            Dry-run text of what build would create.
+        """
+        self.parent_path = parent_path
+        self.workers = workers
+        folders = {}
+        for entry in entries:
+            project = entry["project"]
+            folders[project] = None
+            for tower in entry["towers"]:
+                folders[os.path.join(project, tower)] = None
+                for flange in flange_names(entry["segments"]):
+                    folders[os.path.join(project, tower, flange)] = None
+        self.folders = list(folders)
+        self.existing = set()
+        self.missing = list(self.folders)
+
+    def _levels(self, folders) -> list:
+        """Folders grouped by depth, projects first."""
+        levels = [[], [], []]
+        for folder in folders:
+            levels[folder.count(os.sep)].append(folder)
+        return levels
+
+    def scan(self) -> list:
+        """
+        List the parent folder and every planned project and tower folder
+        that exists, each level at the same time, and find the missing
+        folders.
+
+        Returns
+        -------
+        missing : list
+            Relative paths of the folders to create.
+        """
+        existing = set()
+        parents = [""]
+        with ThreadPoolExecutor(self.workers) as pool:
+            for level in self._levels(self.folders):
+                wanted = {os.path.normcase(folder) for folder in level}
+                listings = pool.map(_list_folders, [os.path.join(self.parent_path, parent)
+                                                    for parent in parents])
+                found = {os.path.normcase(os.path.join(parent, name))
+                         for parent, names in zip(parents, listings) for name in names}
+                existing |= found & wanted
+                # Only look inside planned folders that exist
+                parents = [folder for folder in level if os.path.normcase(folder) in existing]
+        self.existing = existing
+        self.missing = [folder for folder in self.folders
+                        if os.path.normcase(folder) not in existing]
+        return self.missing
+
+    def build(self, progress=None) -> list:
+        """
+        Create the missing folders, level by level with the folders of a
+        level created at the same time. Call scan first.
+
+        Parameters
+        ----------
+        progress : callable, optional
+            Called with (created, total) after each folder. Return False to
+            stop; the folders already being created are finished.
+
+        Returns
+        -------
+        errors : list
+            (relative path, error message) of folders that could not be created.
+        """
+        total = len(self.missing)
+        created = 0
+        errors = []
+        with ThreadPoolExecutor(self.workers) as pool:
+            for level in self._levels(self.missing):
+                failed = {os.path.normcase(path) for path, message in errors}
+                futures = {}
+                for folder in level:
+                    if os.path.normcase(os.path.dirname(folder)) in failed:
+                        errors.append((folder, "Parent folder could not be created."))
+                        created += 1
+                    else:
+                        futures[pool.submit(os.makedirs, os.path.join(self.parent_path, folder),
+                                            exist_ok=True)] = folder
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is not None:
+                            errors.append((futures[future], str(future.exception())))
+                        created += 1
+                    if progress is not None and progress(created, total) is False:
+                        wait(pending)
+                        return errors
+        return errors
+
+    def preview(self, limit: int = 30) -> str:
+        """Dry-run summary: folder counts and the first missing folders."""
+        projects = {folder.split(os.sep)[0] for folder in self.folders}
+        flanges = sum(folder.count(os.sep) == 2 for folder in self.folders)
+        lines = [f"{len(projects)} projects, {flanges} flange folders planned "
+                 f"below {self.parent_path}",
+                 f"{len(self.folders) - len(self.missing)} folders exist, "
+                 f"{len(self.missing)} to create:"]
+        lines += self.missing[:limit]
+        if len(self.missing) > limit:
+            lines.append(f"... and {len(self.missing) - limit} more")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the project/tower/flange folders listed in a manifest.")
+    parser.add_argument("manifest", help="CSV or JSON manifest of projects, towers and segments.")
+    parser.add_argument("parent", help="Folder the projects are created in.")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="Tower segments where the manifest has none.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="Only list the missing folders.")
+    args = parser.parse_args()
+
+    plan = FolderPlan(args.parent, read_manifest(args.manifest, args.segments), args.workers)
+    plan.scan()
+    print(plan.preview(limit=len(plan.missing) if args.dry_run else 30))
+    if not args.dry_run:
+        errors = plan.build()
+        print(f"Created {len(plan.missing) - len(errors)} folders.")
+        for folder, message in errors:
+            print(f"Unable to create {folder}: {message}")
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:14:22 2026
+
+@author: BECHY
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Row/column labels used when the stats are shown as tables
+CYCLE_LABELS = ["Cycle 1", "Cycle 2", "Cycle 3+"]
+ROUND_LABELS = ["First Round", "Second Round"]
+TOTAL_LABELS = ["First Round", "Second Round", "Total Rotation"]
+PERCENTILES = (5, 50, 95)
+
+
+@dataclass
+class FlangeStats:
+    """
+    Summary statistics of the bolt rotations on a flange.
+
+    All rotation values are in degrees and rounded to 0.1, matching the
+    precision shown in the report.
+
+    Attributes
+    ----------
+    count : numpy array
+        (3, 2) int array of the number of bolts rotated in each cycle
+        (Cycle 1, Cycle 2, Cycle 3+) for each round (First, Second).
+    n : numpy array
+        (3,) int array of the number of bolts with a total rotation for the
+        First Round, Second Round and Total Rotation.
+    mean : numpy array
+        (3,) mean rotation for the First Round, Second Round and Total Rotation.
+    std : numpy array
+        (3,) standard deviation (population) of the same columns.
+    min : numpy array
+        (3,) minimum rotation of the same columns.
+    max : numpy array
+        (3,) maximum rotation of the same columns.
+    percentiles : numpy array
+        (len(PERCENTILES), 3) rotation percentiles of the same columns.
+    """
+    __slots__ = ("count", "n", "mean", "std", "min", "max", "percentiles")
+
+    count: np.ndarray
+    n: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    percentiles: np.ndarray
+
+    @property
+    def total_mean(self) -> float:
+        """Mean of the total (both rounds) rotation."""
+        return float(self.mean[2])
+
+    @property
+    def total_std(self) -> float:
+        """Standard deviation of the total (both rounds) rotation."""
+        return float(self.std[2])
+
+    def total_table(self) -> np.ndarray:
+        """(2, 3) array of the mean and standard deviation rows."""
+        return np.vstack([self.mean, self.std])
+
+    def to_frames(self) -> dict:
+        """
+        Arrange the stats into the dataframes used before this object existed.
+
+        Returns
+        -------
+        dict
+            Dict of the "count" and "total" dataframes.
+        """
+        count = pd.DataFrame(data=self.count,
+                             index=CYCLE_LABELS,
+                             columns=ROUND_LABELS)
+        total = pd.DataFrame(data=self.total_table(),
+                             index=["Mean Rotation", "Standard Deviation"],
+                             columns=TOTAL_LABELS)
+        return {"count": count, "total": total}
+
+
+def compute_stats(values: np.ndarray) -> FlangeStats:
+    """
+    Calculates the flange stats from the round/cycle matrix of the records.
+
+    Parameters
+    ----------
+    values : numpy array
+        (n_bolts, 9) float array. The first 6 columns are the cycle 1, 2, 3+
+        rotations of the first round then the second round, the last 3 are
+        the first round, second round and total rotations. Missing values are
+        NaN.
+
+    Returns
+    -------
+    FlangeStats
+        The calculated stats.
+    """
+    values = np.ascontiguousarray(values, dtype=float)
+    valid = ~np.isnan(values)
+
+    # Bolts rotated per cycle. Missing values count as not rotated.
+    rotated = (values[:, :6] != 0) & valid[:, :6]
+    count = rotated.sum(axis=0).reshape(2, 3).transpose()
+
+    totals = values[:, 6:]
+    n = valid[:, 6:].sum(axis=0)
+    if totals.shape[0]:
+        percentiles = np.nanpercentile(totals, PERCENTILES, axis=0)
+        minimum = np.nanmin(totals, axis=0)
+        maximum = np.nanmax(totals, axis=0)
+    else:
+        percentiles = np.full((len(PERCENTILES), 3), np.nan)
+        minimum = np.full(3, np.nan)
+        maximum = np.full(3, np.nan)
+
+    return FlangeStats(count=count,
+                       n=n,
+                       mean=np.around(np.nanmean(totals, axis=0), 1),
+                       std=np.around(np.nanstd(totals, axis=0), 1),
+                       min=np.around(minimum, 1),
+                       max=np.around(maximum, 1),
+                       percentiles=np.around(percentiles, 1))
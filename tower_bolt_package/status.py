@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:05:22 2026
+
+@author: BECHY
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import glob
+import os
+import threading
+
+from tower_bolt_package.funcs import has_required_xmls, latest_pdf_in_folder
+
+
+OUTCOME_LEVELS = ("Pass", "Alert", "Fail")
+
+
+@dataclass
+class FlangeStatus:
+    """
+    Cached state of one flange folder.
+
+    Attributes
+    ----------
+    path : str
+        Flange folder.
+    mtime : int
+        Folder modification time in ns when the status was read.
+    has_xmls : bool
+        Both round Xml files are present.
+    latest_pdf : str
+        Path of the latest report PDF, None if there is none.
+    pdf_mtime : float
+        Modification time of the latest report PDF, None if there is none.
+    outcome : dict
+        Pass/Alert/Fail bolt counts of the last run, None if not run.
+    """
+    __slots__ = ("path", "mtime", "has_xmls", "latest_pdf", "pdf_mtime", "outcome")
+
+    path: str
+    mtime: int
+    has_xmls: bool
+    latest_pdf: str
+    pdf_mtime: float
+    outcome: dict
+
+    @property
+    def level(self) -> str:
+        """Worst approval of the last run, None if not run."""
+        if not self.outcome:
+            return None
+        return next((name for name in reversed(OUTCOME_LEVELS) if self.outcome.get(name)),
+                    "Pass")
+
+    def summary(self) -> str:
+        """One line description for tool tips."""
+        parts = ["XMLs present" if self.has_xmls else "XMLs missing"]
+        if self.latest_pdf:
+            parts.append(f"report: {os.path.basename(self.latest_pdf)}")
+        else:
+            parts.append("no report")
+        if self.outcome:
+            parts.append(", ".join(f"{name}: {self.outcome.get(name, 0)}"
+                                   for name in OUTCOME_LEVELS))
+        return " | ".join(parts)
+
+
+def stored_outcome(path: str) -> dict:
+    """
+    Outcome of the newest analysis file in a flange folder, see
+    analysis_store, None if there is none or it cannot be read.
+    """
+    from tower_bolt_package.analysis_store import load_outcome
+
+    files = glob.glob(os.path.join(glob.escape(path), "Analysis-*.npz"))
+    if not files:
+        return None
+    try:
+        return load_outcome(max(files, key=os.path.getmtime))
+    except Exception as error:
+        print(f"Unable to read the outcome of {path}: {error}")
+        return None
+
+
+def read_status(path: str, outcome: dict = None) -> FlangeStatus:
+    """
+    Read the status of a flange folder from disk. Without the outcome of a
+    run in this session, the outcome stored with the newest analysis file of
+    the folder is used.
+    """
+    # Taken first, a change while reading makes the status stale
+    mtime = os.stat(path).st_mtime_ns
+    has_xmls = has_required_xmls(path)
+    latest_pdf = latest_pdf_in_folder(path)
+    pdf_mtime = os.path.getmtime(latest_pdf) if latest_pdf else None
+    if outcome is None:
+        outcome = stored_outcome(path)
+    return FlangeStatus(path=path, mtime=mtime, has_xmls=has_xmls, latest_pdf=latest_pdf,
+                        pdf_mtime=pdf_mtime, outcome=outcome)
+
+
+def outcome_of(flange_obj) -> dict:
+    """Pass/Alert/Fail bolt counts of an analysed flange."""
+    if not getattr(flange_obj, "has_run", False):
+        return None
+    counts = flange_obj.records["Approval"].value_counts()
+    return {name: int(counts.get(name, 0)) for name in OUTCOME_LEVELS}
+
+
+class FlangeStatusIndex:
+
+    def __init__(self, workers: int = 4):
+        """
+        Status of the flange folders, read in background threads and kept
+        until the folder's modification time changes.
+
+        Attributes
+        ----------
+        workers : int
+            Number of threads reading folders.
+
+        Methods
+        -------
+        get(path:str)
+            Cached status if still current, else None.
+        request(paths:list, callback=None)
+            Read the stale statuses in the background.
+        record_outcome(path:str, outcome:dict)
+            Keep the Pass/Alert/Fail counts of a run.
+        """
+        self.workers = workers
+        self._status = {}
+        self._outcomes = {}
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def get(self, path: str, check: bool = True) -> FlangeStatus:
+        """
+        Cached status of a flange folder.
+
+        Parameters
+        ----------
+        path : str
+            Flange folder.
+        check : bool
+            Compare the folder modification time, one stat call. Otherwise
+            the cached status is returned as is.
+
+        Returns
+        -------
+        FlangeStatus
+            The status, None if not cached or out of date.
+        """
+        status = self._status.get(path)
+        if status is None or not check:
+            return status
+        try:
+            if os.stat(path).st_mtime_ns == status.mtime:
+                return status
+        except OSError:
+            pass
+        return None
+
+    def refresh(self, path: str) -> FlangeStatus:
+        """Read the status of a flange folder now."""
+        status = read_status(path, self._outcomes.get(path))
+        with self._lock:
+            self._status[path] = status
+        return status
+
+    def request(self, paths, callback=None):
+        """
+        Read the statuses that are missing or out of date in the background.
+
+        Parameters
+        ----------
+        paths : list
+            Flange folders.
+        callback : callable, optional
+            Called with each status once read. Runs in a worker thread.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        for path in paths:
+            if self.get(path) is not None:
+                continue
+            with self._lock:
+                if path in self._queued:
+                    continue
+                self._queued.add(path)
+            self._pool.submit(self._read, path, callback)
+
+    def _read(self, path: str, callback):
+        try:
+            status = self.refresh(path)
+        except OSError:
+            status = None
+        finally:
+            with self._lock:
+                self._queued.discard(path)
+        if status is not None and callback is not None:
+            callback(status)
+
+    def record_outcome(self, path: str, outcome: dict):
+        """Keep the Pass/Alert/Fail counts of the last run of a flange."""
+        with self._lock:
+            self._outcomes[path] = outcome
+            status = self._status.get(path)
+            if status is not None:
+                status.outcome = outcome
+
+    def invalidate(self, path: str = None):
+        """Forget the status of a flange, or of all flanges."""
+        with self._lock:
+            if path is None:
+                self._status.clear()
+            else:
+                self._status.pop(path, None)
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:31:06 2026
+
+@author: BECHY
+
+Watches the parent folder for new round Xml files and queues the analysis of
+the flanges that received them.
+"""
+import argparse
+import os
+import time
+
+from tower_bolt_package.funcs import (discover_folders, has_required_xmls,
+                                      tower_patterns, flange_patterns)
+
+
+# Folder levels below the parent folder
+PARENT, PROJECT, TOWER, FLANGE = range(4)
+LEVEL_PATTERNS = {PARENT: [], PROJECT: tower_patterns, TOWER: flange_patterns}
+
+
+def xml_signature(flange_path: str):
+    """
+    (size, mtime) of the Xml files in a flange folder. Changes while a file
+    is still being synced, but not when the analysis renames a file.
+    """
+    try:
+        with os.scandir(flange_path) as entries:
+            return tuple(sorted((entry.stat().st_size, entry.stat().st_mtime_ns)
+                                for entry in entries
+                                if entry.is_file() and '.xml' in entry.name.lower()))
+    except OSError:
+        return ()
+
+
+class FlangeWatcher:
+
+    def __init__(self, parent_path: str, on_ready, settle: float = 30.0,
+                 process_existing: bool = False):
+        """
+        Polling folder watcher for the project/tower/flange tree. Each poll
+        only stats the known folders, a folder is listed again only when its
+        modification time changed. Flanges whose Xml files changed are queued
+        once the files have stopped changing for the settle time and both
+        rounds are present.
+
+        Attributes
+        ----------
+        parent_path : str
+            Folder with the project folders.
+        on_ready : callable
+            Called with (location dict, flange path) for each flange ready to
+            be analysed.
+        settle : float
+            Seconds the Xml files of a flange must stay unchanged before it is
+            queued. Covers partially synced files.
+        process_existing : bool
+            Queue the flanges that already have both rounds when the watcher
+            starts. Otherwise only later changes are queued.
+
+        Methods
+        -------
+        scan()
+            Build the folder state with one full scan of the tree.
+        poll()
+            Check for changes and queue the flanges that are ready.
+        run(interval:float, stop=None)
+            Poll until stop() returns True.
+        """
+        self.parent_path = parent_path
+        self.on_ready = on_ready
+        self.settle = settle
+        self.process_existing = process_existing
+        self.folders = {}       # path: [level, mtime, child paths, location]
+        self.processed = {}     # flange path: Xml signature that was handled
+        self.pending = {}       # flange path: [Xml signature, time first seen]
+        self.scanned = False
+
+    def scan(self):
+        """Build the folder state with one full scan of the tree."""
+        self.folders.clear()
+        self.pending.clear()
+        self._add(self.parent_path, PARENT, {})
+        self.scanned = True
+
+    def _add(self, path: str, level: int, location: dict):
+        """Add a folder and everything below it to the state."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        self.folders[path] = [level, mtime, set(), location]
+        if level == FLANGE:
+            signature = xml_signature(path)
+            if self.scanned or self.process_existing:
+                self.pending[path] = [signature, time.monotonic()]
+            else:
+                self.processed[path] = signature
+        else:
+            self._list(path)
+
+    def _remove(self, path: str):
+        """Drop a folder and everything below it from the state."""
+        level, mtime, children, location = self.folders.pop(path)
+        for child in children:
+            self._remove(child)
+        self.pending.pop(path, None)
+        self.processed.pop(path, None)
+
+    def _list(self, path: str):
+        """List the subfolders of a project, tower or parent folder again."""
+        level, mtime, children, location = self.folders[path]
+        names = discover_folders(path, LEVEL_PATTERNS[level])
+        found = {os.path.join(path, name): name for name in names}
+        for child in children - set(found):
+            self._remove(child)
+        for child, name in found.items():
+            if child not in children:
+                key = ("project", "tower", "flange")[level]
+                self._add(child, level + 1, dict(location, **{key: name}))
+        self.folders[path][2] = set(found)
+
+    def poll(self) -> list:
+        """
+        Check the known folders for changes and queue the flanges that are
+        ready.
+
+        Returns
+        -------
+        queued : list
+            Paths of the flanges passed to on_ready during this poll.
+        """
+        if not self.scanned:
+            self.scan()
+
+        for path in list(self.folders):
+            if path not in self.folders:    # Removed with its parent
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                if path != self.parent_path:
+                    self._remove(path)
+                continue
+            state = self.folders[path]
+            if mtime == state[1]:
+                continue
+            state[1] = mtime
+            if state[0] == FLANGE:
+                if path not in self.pending:
+                    self.pending[path] = [xml_signature(path), time.monotonic()]
+            else:
+                self._list(path)
+
+        queued = []
+        now = time.monotonic()
+        for path in list(self.pending):
+            signature = xml_signature(path)
+            first_seen = self.pending[path]
+            if signature != first_seen[0]:
+                # Still changing, wait for the files to settle
+                self.pending[path] = [signature, now]
+                continue
+            if now - first_seen[1] < self.settle:
+                continue
+            del self.pending[path]
+            if signature == self.processed.get(path):
+                continue
+            ready = has_required_xmls(path)
+            self.processed[path] = signature
+            if ready:
+                self.on_ready(self.folders[path][3], path)
+                queued.append(path)
+        return queued
+
+    def run(self, interval: float = 5.0, stop=None):
+        """
+        Poll the tree until stop() returns True.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between polls.
+        stop : callable, optional
+            Checked after each poll. Runs until interrupted if not given.
+        """
+        while True:
+            self.poll()
+            if stop is not None and stop():
+                return
+            time.sleep(interval)
+
+
+def watch(parent_path: str, workers: int = None, interval: float = 5.0,
+          settle: float = 30.0, process_existing: bool = False, out_dir: str = "",
+          output_pdf: bool = True, output_excel: bool = True, limits=None):
+    """
+    Watch a parent folder and write the reports of each flange that receives
+    both rounds, on a pool of worker processes, within the worker limits of
+    limits (governor.ResourceLimits) if given.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+    from tower_bolt_package.batch import make_pool, run_flange_job
+    from tower_bolt_package.equipment import EquipmentHistory
+
+    pool = make_pool(workers, limits)
+    history = EquipmentHistory()
+    jobs = {}
+
+    def on_ready(location, path):
+        nonlocal pool
+        print(f"Queued: {location['project']} / {location['tower']} / {location['flange']}")
+        args = (run_flange_job, path, location, out_dir, output_pdf, output_excel)
+        try:
+            job = pool.submit(*args)
+        except BrokenProcessPool:
+            # A worker died, the pool takes no more jobs
+            pool.shutdown(wait=False)
+            pool = make_pool(workers, limits)
+            job = pool.submit(*args)
+        jobs[job] = location
+
+    def report_done():
+        for job in [job for job in jobs if job.done()]:
+            location = jobs.pop(job)
+            name = f"{location['project']} / {location['tower']} / {location['flange']}"
+            try:
+                result = job.result()
+            except Exception as error:
+                print(f"Errors: {name}: {type(error).__name__}: {error}")
+                continue
+            history.record(result["equipment"])
+            if result["outputs"]:
+                print(f"Done: {name} ({result['seconds']:.1f} s)")
+            if result["errors"].strip():
+                print(f"Errors: {name}: {result['errors'].strip()}")
+        return False
+
+    watcher = FlangeWatcher(parent_path, on_ready, settle, process_existing)
+    print(f"Watching {parent_path}")
+    try:
+        watcher.run(interval, stop=report_done)
+    except KeyboardInterrupt:
+        print("Stopping, waiting for the running jobs.")
+    finally:
+        pool.shutdown(wait=True)
+        history.close()
+
+
+if __name__ == "__main__":
+    from tower_bolt_package import governor
+
+    parser = argparse.ArgumentParser(
+        description="Write flange reports as soon as both round Xml files are in a flange folder.")
+    parser.add_argument("parent_path", help="Folder with the project folders.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes. Defaults to the number of CPUs.")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls.")
+    parser.add_argument("--settle", type=float, default=30.0,
+                        help="Seconds the Xml files must be unchanged before a flange is run.")
+    parser.add_argument("--existing", action="store_true",
+                        help="Also run the flanges that already have both rounds.")
+    parser.add_argument("--output", default="", help="Report folder. Defaults to the flange folder.")
+    parser.add_argument("--format", choices=["pdf", "excel", "both"], default="both")
+    governor.add_arguments(parser)
+    args = parser.parse_args()
+
+    watch(args.parent_path, args.workers, args.interval, args.settle, args.existing,
+          args.output, args.format in ("pdf", "both"), args.format in ("excel", "both"),
+          governor.from_args(args))
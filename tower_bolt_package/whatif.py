@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:51 2026
+
+@author: BECHY
+"""
+import numpy as np
+import pandas as pd
+
+from tower_bolt_package.flange import (Flange, bolt_arrays, bolt_code_flags,
+                                       stats_alert_levels, MEAN_ALERTS, SD_ALERTS)
+
+
+# Per-bolt arrays kept in the cache, see flange.bolt_arrays
+ARRAY_NAMES = ["rd2_cyc3", "cycles1", "cycles2", "total",
+               "sum_diff1", "sum_diff2", "missing"]
+LEVELS = ["Pass", "Alert", "Fail"]
+
+
+def criteria_values(criteria) -> dict:
+    """
+    Get the failure criteria values by name from the template criteria
+    dataframe, a Series or a dict.
+    """
+    if isinstance(criteria, pd.DataFrame):
+        criteria = criteria["Values"]
+    return {name: float(value) for name, value in dict(criteria).items()}
+
+
+class WhatIfCache:
+
+    def __init__(self, criteria=None):
+        """
+        Parsed per-bolt rotation data of many flanges held in memory so that
+        new failure criteria can be applied without re-parsing the Xml files
+        or re-rendering the reports.
+
+        Attributes
+        ----------
+        criteria : dict
+            Criteria values the cached flanges were analysed with. Used as the
+            baseline when comparing.
+        locations : list
+            (project, tower, flange) of each cached flange.
+        required_rotation : numpy array
+            Required rotation of each cached flange.
+        total_mean : numpy array
+            Rounded mean total rotation of each cached flange.
+        total_std : numpy array
+            Rounded standard deviation of the total rotation of each flange.
+
+        Methods
+        -------
+        add(flange_obj:Flange)
+            Add the bolt data of an analysed flange to the cache.
+        evaluate(criteria)
+            Pass/Alert/Fail bolt counts and flange alerts for a criteria set.
+        compare(criteria, baseline=None)
+            Shift in the counts per flange and per project between two
+            criteria sets.
+        save(path:str), load(path:str)
+            Store the cache to or restore it from a .npz file.
+        """
+        self.criteria = criteria_values(criteria) if criteria is not None else {}
+        self.locations = []
+        self.required_rotation = np.zeros(0)
+        self.total_mean = np.zeros(0)
+        self.total_std = np.zeros(0)
+        self._parts = []
+        self._arrays = None
+        self._flange_index = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    def add(self, flange_obj: Flange):
+        """
+        Add the bolt data of an analysed flange to the cache. Flanges that
+        have not run are ignored.
+        """
+        if not getattr(flange_obj, "has_run", False):
+            return
+        location = flange_obj.location
+        self.locations.append((location["project"], location["tower"], location["flange"]))
+        self.required_rotation = np.append(self.required_rotation,
+                                           float(flange_obj.required_rotation))
+        self.total_mean = np.append(self.total_mean, flange_obj.stats.total_mean)
+        self.total_std = np.append(self.total_std, flange_obj.stats.total_std)
+        self._parts.append(bolt_arrays(flange_obj.records))
+        self._arrays = None
+
+    def _concatenate(self):
+        """Join the per-flange arrays into single arrays over all bolts."""
+        if self._arrays is None:
+            self._arrays = {name: np.concatenate([part[name] for part in self._parts])
+                            if self._parts else np.zeros(0)
+                            for name in ARRAY_NAMES}
+            self._flange_index = np.repeat(np.arange(len(self._parts)),
+                                           [len(part["total"]) for part in self._parts])
+        return self._arrays, self._flange_index
+
+    def evaluate(self, criteria) -> pd.DataFrame:
+        """
+        Apply a criteria set to every cached bolt in one vectorized sweep.
+
+        Parameters
+        ----------
+        criteria : Pandas DataFrame, Series or dict
+            Failure criteria, e.g. the "Failure Criteria" sheet of the template.
+
+        Returns
+        -------
+        results : Pandas DataFrame
+            One row per flange with the Pass/Alert/Fail bolt counts and the
+            mean and SD flange alerts.
+        """
+        values = criteria_values(criteria)
+        arrays, flange_index = self._concatenate()
+        required = self.required_rotation[flange_index]
+
+        flags = bolt_code_flags(arrays, required, values)
+        level = np.where(flags[:, -1], 2, np.where(flags[:, :-1].any(axis=1), 1, 0))
+        # Without a required rotation all bolts are alerted
+        level[required == 0] = 1
+        counts = np.bincount(flange_index*3 + level,
+                             minlength=3*len(self)).reshape(len(self), 3)
+
+        mean_level, sd_level = stats_alert_levels(self.total_mean, self.total_std,
+                                                  self.required_rotation, values)
+        results = pd.DataFrame(self.locations, columns=["Project", "Tower", "Flange"])
+        for i, name in enumerate(LEVELS):
+            results[name] = counts[:, i]
+        results["Mean Alert"] = [MEAN_ALERTS.get(int(x), "") for x in mean_level]
+        results["SD Alert"] = [SD_ALERTS.get(int(x), "") for x in sd_level]
+        return results
+
+    def compare(self, criteria, baseline=None):
+        """
+        Compare the results of a new criteria set to a baseline set.
+
+        Parameters
+        ----------
+        criteria : Pandas DataFrame, Series or dict
+            New failure criteria.
+        baseline : Pandas DataFrame, Series or dict, optional
+            Baseline failure criteria. Defaults to the criteria the cache was
+            built with.
+
+        Returns
+        -------
+        flanges : Pandas DataFrame
+            Per flange counts before, after and the change, with the flange
+            alerts before and after.
+        projects : Pandas DataFrame
+            The same counts summed per project.
+        """
+        before = self.evaluate(self.criteria if baseline is None else baseline)
+        after = self.evaluate(criteria)
+
+        flanges = before[["Project", "Tower", "Flange"]].copy()
+        for name in LEVELS:
+            flanges[f"{name} Before"] = before[name]
+            flanges[f"{name} After"] = after[name]
+            flanges[f"{name} Change"] = after[name] - before[name]
+        for name in ["Mean Alert", "SD Alert"]:
+            flanges[f"{name} Before"] = before[name]
+            flanges[f"{name} After"] = after[name]
+        flanges["Changed"] = ((flanges[[f"{name} Change" for name in LEVELS]] != 0).any(axis=1) |
+                              (before[["Mean Alert", "SD Alert"]] !=
+                               after[["Mean Alert", "SD Alert"]]).any(axis=1))
+
+        count_cols = [f"{name} {when}" for name in LEVELS
+                      for when in ["Before", "After", "Change"]]
+        projects = flanges.groupby("Project")[count_cols + ["Changed"]].sum().reset_index()
+        projects = projects.rename(columns={"Changed": "Flanges Changed"})
+        return flanges, projects
+
+    def save(self, path: str):
+        """Store the cache in a .npz file."""
+        arrays, flange_index = self._concatenate()
+        np.savez_compressed(
+            path,
+            locations=np.array(self.locations, dtype=str).reshape(-1, 3),
+            required_rotation=self.required_rotation,
+            total_mean=self.total_mean,
+            total_std=self.total_std,
+            flange_index=flange_index,
+            criteria_names=np.array(list(self.criteria), dtype=str),
+            criteria_values=np.array(list(self.criteria.values()), dtype=float),
+            **{f"bolt_{name}": arrays[name] for name in ARRAY_NAMES})
+
+    @classmethod
+    def load(cls, path: str):
+        """Restore a cache stored with save."""
+        with np.load(path, allow_pickle=False) as data:
+            cache = cls(dict(zip(data["criteria_names"].tolist(),
+                                 data["criteria_values"].tolist())))
+            cache.locations = [tuple(row) for row in data["locations"].tolist()]
+            cache.required_rotation = data["required_rotation"]
+            cache.total_mean = data["total_mean"]
+            cache.total_std = data["total_std"]
+            flange_index = data["flange_index"]
+            arrays = {name: data[f"bolt_{name}"] for name in ARRAY_NAMES}
+        # Split back into the per-flange parts so more flanges can be added
+        bounds = np.searchsorted(flange_index, np.arange(1, len(cache.locations)))
+        if cache.locations:
+            cache._parts = [dict(zip(ARRAY_NAMES, split))
+                            for split in zip(*[np.split(arrays[name], bounds)
+                                               for name in ARRAY_NAMES])]
+        return cache
+
+
+def build_cache(flanges, criteria, progress=None) -> WhatIfCache:
+    """
+    Parse and analyse flanges once and keep their bolt data for what-if runs.
+
+    Parameters
+    ----------
+    flanges : iterable
+        (location dict, flange folder path) of each flange.
+    criteria : Pandas DataFrame
+        Failure criteria the flanges are analysed with, the cache baseline.
+    progress : callable, optional
+        Called with the location dict before each flange is analysed.
+
+    Returns
+    -------
+    WhatIfCache
+        Cache of the flanges that could be analysed.
+    """
+    cache = WhatIfCache(criteria)
+    for location, path in flanges:
+        if progress is not None:
+            progress(location)
+        flange_obj = Flange(path, location, criteria)
+        flange_obj.run()
+        cache.add(flange_obj)
+    return cache
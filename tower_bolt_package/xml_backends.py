@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:40:17 2026
+
+@author: BECHY
+
+Xml parser backends for the smart tensioner tool files. Each backend yields
+the top level nodes of the file as (tag, [(name, value), ...]) groups, where
+name and value are the texts of the first "name" and "value" elements of each
+child node, as ElementTree's node.find("name").text would give them.
+
+The default backend is picked by a short benchmark the first time one is
+needed and the choice is cached with the tool's indexes, so it is only timed
+again after Python or lxml change.
+"""
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as et
+import xml.parsers.expat
+
+try:
+    import lxml.etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+
+def is_path(source) -> bool:
+    """True if an Xml source is a file path rather than a buffer."""
+    return isinstance(source, (str, os.PathLike))
+
+
+class ElementTreeBackend:
+    """Reference backend. Builds the full tree with xml.etree.ElementTree."""
+    name = "etree"
+
+    def iter_groups(self, source):
+        """
+        Yield the (tag, pairs) groups of an Xml file.
+
+        Parameters
+        ----------
+        source : str or bytes-like
+            Xml file path, or the file content as bytes, a memoryview or an
+            mmap. Buffers are parsed without copying.
+        """
+        if not is_path(source):
+            parser = et.XMLParser()
+            parser.feed(source)
+            xroot = parser.close()
+        else:
+            xroot = et.parse(source).getroot()
+        for nodes in xroot:
+            yield nodes.tag, [(node.find("name").text, node.find("value").text)
+                              for node in nodes]
+
+
+class ExpatBackend:
+    """Streaming backend using the expat SAX-style parser, no tree is built."""
+    name = "expat"
+    chunk_size = 1 << 16
+
+    def iter_groups(self, source):
+        """
+        Yield the (tag, pairs) groups of an Xml file.
+
+        Parameters
+        ----------
+        source : str or bytes-like
+            Xml file path, or the file content as bytes, a memoryview or an
+            mmap. Buffers are parsed without copying.
+        """
+        groups = []
+        # Parser state kept in closure variables, the handlers run per element
+        depth = 0
+        group_tag = pairs = child = field = text = None
+        nested = 0
+
+        def start(tag, attrs):
+            nonlocal depth, group_tag, pairs, child, field, text, nested
+            depth += 1
+            if depth == 4:          # name / value
+                if field is None and (tag == "name" or tag == "value") and tag not in child:
+                    field = tag
+                    text = []
+            elif depth == 3:        # one header or record
+                child = {}
+            elif depth == 2:        # headers / records / other top level node
+                group_tag = _clark(tag)
+                pairs = []
+            elif depth > 4 and field is not None:
+                # Only text before the first child element counts, as .text
+                nested += 1
+
+        def end(tag):
+            nonlocal depth, field, nested
+            if depth == 4:
+                if field is not None:
+                    value = "".join(text)
+                    child[field] = value if value else None
+                    field = None
+                    nested = 0
+            elif depth == 3:
+                if "name" not in child or "value" not in child:
+                    raise ValueError(f"Node <{_clark(tag)}> is missing a name or value element.")
+                pairs.append((child["name"], child["value"]))
+            elif depth == 2:
+                groups.append((group_tag, pairs))
+            depth -= 1
+
+        def chars(data):
+            if field is not None and depth == 4 and not nested:
+                text.append(data)
+
+        # Namespaces are resolved like ElementTree does, so a namespaced
+        # "name" or "value" element is not taken for the plain one
+        parser = xml.parsers.expat.ParserCreate(namespace_separator="}")
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = chars
+
+        if not is_path(source):
+            parser.Parse(source, True)
+            yield from groups
+            return
+
+        with open(source, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                parser.Parse(chunk, not chunk)
+                # Hand over the finished groups while streaming
+                yield from groups
+                groups.clear()
+                if not chunk:
+                    break
+
+
+def _clark(tag: str) -> str:
+    """Tag of a namespaced expat element as ElementTree writes it, {uri}tag."""
+    return "{" + tag if "}" in tag else tag
+
+
+class LxmlBackend:
+    """Backend using lxml's C tree builder. Only available if lxml is installed."""
+    name = "lxml"
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise ImportError("lxml is not installed.")
+        # Comments and processing instructions are dropped like ElementTree does
+        self.parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True)
+        # First name and value element of every child, selected in C
+        self.find_names = lxml_etree.XPath("*/name[1]")
+        self.find_values = lxml_etree.XPath("*/value[1]")
+
+    def iter_groups(self, source):
+        """
+        Yield the (tag, pairs) groups of an Xml file.
+
+        Parameters
+        ----------
+        source : str or bytes-like
+            Xml file path, or the file content as bytes, a memoryview or an
+            mmap. Buffers are parsed without copying.
+        """
+        if not is_path(source):
+            xroot = lxml_etree.fromstring(source, self.parser)
+        else:
+            xroot = lxml_etree.parse(source, self.parser).getroot()
+        for nodes in xroot:
+            names = self.find_names(nodes)
+            values = self.find_values(nodes)
+            if not len(names) == len(values) == len(nodes):
+                raise ValueError(f"Node <{nodes.tag}> has a child without a name or value element.")
+            yield nodes.tag, [(name.text, value.text) for name, value in zip(names, values)]
+
+
+BACKENDS = {"etree": ElementTreeBackend,
+            "expat": ExpatBackend,
+            "lxml": LxmlBackend}
+# Order used when picking a backend without a benchmark, fastest first as
+# measured with benchmark_backends on full rounds. ElementTree's C tree builder
+# is ahead of lxml once the values are read back into Python, expat streams
+# with the least memory but runs a Python callback per element.
+PREFERRED = ("etree", "lxml", "expat")
+# File in funcs.cache_dir() with the backend selected by select_fastest_backend
+SELECTION_NAME = "xml_backend.json"
+# Bolts in the generated round the backends are timed on
+SAMPLE_BOLTS = 200
+
+_default = None
+
+
+def available_backends() -> list:
+    """Names of the backends that can be used in this environment."""
+    return [name for name in BACKENDS if name != "lxml" or lxml_etree is not None]
+
+
+def get_backend(name=None):
+    """
+    Get a parser backend.
+
+    Parameters
+    ----------
+    name : str, optional
+        "etree", "expat" or "lxml". Defaults to the fastest available one.
+
+    Returns
+    -------
+    backend
+        Backend object with an iter_groups(source) method.
+    """
+    global _default
+    if name is not None:
+        return BACKENDS[name]()
+    if _default is None:
+        set_default_backend(selected_backend())
+    return _default
+
+
+def set_default_backend(name: str):
+    """Use the named backend when parse_round is not given one."""
+    global _default
+    _default = BACKENDS[name]()
+
+
+def environment_key() -> str:
+    """Python and lxml versions, the benchmark result depends on them."""
+    lxml_version = ".".join(map(str, lxml_etree.LXML_VERSION)) if lxml_etree is not None else "-"
+    return f"python {sys.version.split()[0]}, lxml {lxml_version}"
+
+
+def selection_path() -> str:
+    from tower_bolt_package.funcs import cache_dir
+
+    return os.path.join(cache_dir(), SELECTION_NAME)
+
+
+def sample_round(n_bolts: int = SAMPLE_BOLTS) -> bytes:
+    """Content of a round Xml file in the tool's format to time the backends on."""
+    headers = "".join(f"<header><name>{name}</name><value>{value}</value></header>"
+                      for name, value in (("Date", "03/01/2024 08:00:00"),
+                                          ("ProgramID", "Installation first round"),
+                                          ("BoltSize", "M42"), ("BoltQTY", str(n_bolts))))
+    records = "".join(
+        "<records>"
+        + "".join(f"<record><name>{name}</name><value>{value}</value></record>"
+                  for name, value in (("BoltNo", bolt), ("Date", "03/01/2024 08:30:00"),
+                                      ("BoltRotationAngle", "42.5"),
+                                      ("BoltRotationAngleCycle1", "30.5"),
+                                      ("BoltRotationAngleCycle2", "8.0"),
+                                      ("BoltRotationAngleCycle3", "4.0"), ("Pressure", "")))
+        + "</records>" for bolt in range(1, n_bolts + 1))
+    return (f'<?xml version="1.0" encoding="utf-8"?><root><headers>{headers}</headers>'
+            f"{records}</root>").encode("utf-8")
+
+
+def selected_backend() -> str:
+    """
+    Name of the default backend. The fastest backend for this environment is
+    read from the cached selection, or selected and cached if there is none.
+    Falls back to the PREFERRED order if the cache cannot be used.
+    """
+    available = available_backends()
+    try:
+        with open(selection_path(), "r", encoding="utf-8") as f:
+            selection = json.load(f)
+        if selection.get("environment") == environment_key() \
+                and selection.get("backend") in available:
+            return selection["backend"]
+    except (OSError, ValueError):
+        pass
+    try:
+        return select_fastest_backend([sample_round()])
+    except Exception as error:
+        print(f"Xml backend benchmark failed: {error}")
+        return next(name for name in PREFERRED if name in available)
+
+
+def select_fastest_backend(paths, repeat: int = 3) -> str:
+    """
+    Benchmark the available backends on a sample of Xml files, make the
+    fastest one the default and cache the choice for this environment.
+
+    Parameters
+    ----------
+    paths : list
+        Xml file paths or contents to time the backends on, a few files are
+        enough.
+    repeat : int
+        Number of passes over the files.
+
+    Returns
+    -------
+    name : str
+        Name of the selected backend.
+    """
+    timings = benchmark_backends(paths, repeat=repeat)
+    name = min(timings, key=timings.get)
+    set_default_backend(name)
+    path = selection_path()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_key(), "backend": name,
+                       "timings": timings}, f, indent=1)
+        os.replace(temp_path, path)
+    except OSError as error:
+        print(f"Unable to cache the Xml backend selection: {error}")
+    return name
+
+
+def compare_backends(paths, names=None) -> list:
+    """
+    Differential check of the backends against the ElementTree reference.
+
+    Parameters
+    ----------
+    paths : list
+        Xml file paths of the corpus.
+    names : list, optional
+        Backends to check. Defaults to all available ones.
+
+    Returns
+    -------
+    mismatches : list
+        (path, backend name, description) of every difference found.
+    """
+    from tower_bolt_package.funcs import parse_round
+
+    names = [name for name in (names or available_backends()) if name != "etree"]
+    reference = get_backend("etree")
+    mismatches = []
+    for path in paths:
+        expected = parse_round(path, reference)
+        for name in names:
+            result = parse_round(path, get_backend(name))
+            if (expected is None) != (result is None):
+                mismatches.append((path, name, "parsed by only one backend"))
+            elif expected is None:
+                continue
+            elif not expected.header.to_frame().equals(result.header.to_frame()):
+                mismatches.append((path, name, "headers differ"))
+            elif not expected.records.to_frame().equals(result.records.to_frame()):
+                mismatches.append((path, name, "records differ"))
+    return mismatches
+
+
+def benchmark_backends(paths, names=None, repeat: int = 3) -> dict:
+    """
+    Time parse_round over a corpus with each backend.
+
+    Parameters
+    ----------
+    paths : list
+        Xml file paths or contents of the corpus.
+    names : list, optional
+        Backends to time. Defaults to all available ones.
+    repeat : int
+        Number of passes over the corpus. The fastest pass is kept.
+
+    Returns
+    -------
+    timings : dict
+        Seconds per pass over the corpus by backend name.
+    """
+    from tower_bolt_package.funcs import parse_round
+
+    timings = {}
+    for name in names or available_backends():
+        backend = get_backend(name)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for path in paths:
+                parse_round(path, backend)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return timings
+
+
+def find_xml_files(folderpath: str) -> list:
+    """All Xml files below a folder."""
+    return sorted(os.path.join(root, name)
+                  for root, dirs, files in os.walk(folderpath)
+                  for name in files if name.lower().endswith(".xml"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m tower_bolt_package.xml_backends <folder_path>")
+        sys.exit(1)
+
+    corpus = find_xml_files(sys.argv[1])
+    print(f"{len(corpus)} Xml files, backends: {', '.join(available_backends())}")
+    differences = compare_backends(corpus)
+    for path, name, description in differences:
+        print(f"MISMATCH {name}: {description}: {path}")
+    print("All backends match the reference." if not differences else
+          f"{len(differences)} mismatches.")
+    timings = benchmark_backends(corpus)
+    reference = timings["etree"]
+    for name, seconds in timings.items():
+        print(f"{name:>6}: {seconds:.3f} s  ({len(corpus)/seconds:.0f} files/s, "
+              f"{reference/seconds:.2f}x etree)")
+    print(f"Fastest: {min(timings, key=timings.get)}")
+    print(f"Default: {select_fastest_backend(corpus)} (cached in {selection_path()})")
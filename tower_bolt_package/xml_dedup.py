@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:05:19 2026
+
+@author: BECHY
+
+Picks the round Xml file of a flange when discovery finds more than one.
+Candidates are fingerprinted with a content hash and their header Date, kept
+in SQLite by path, size and modification time, so byte-identical uploads are
+collapsed and real conflicts are settled the same way on every run without
+reading the files again.
+"""
+import argparse
+from dataclasses import dataclass, field
+import os
+import sqlite3
+
+from tower_bolt_package.dup_index import hash_file
+from tower_bolt_package.funcs import cache_dir, discover_xmls
+from tower_bolt_package.records import parse_header_date
+from tower_bolt_package.xml_backends import ExpatBackend
+
+
+DB_NAME = "xml_fingerprints.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    date TEXT
+);
+"""
+
+
+def default_db_path() -> str:
+    return os.path.join(cache_dir(), DB_NAME)
+
+
+def header_date(path: str):
+    """
+    Header Date value of a round Xml file, None if it has none. The file is
+    streamed and parsing stops after the header node.
+    """
+    for tag, pairs in ExpatBackend().iter_groups(path):
+        if tag == "headers":
+            return dict(pairs).get("Date")
+    return None
+
+
+def fingerprint(path: str, size: int) -> tuple:
+    """(MD5 hex digest, header Date value) of a file, the date None if unreadable."""
+    digest = hash_file(path, size, full=True)[1]
+    try:
+        date = header_date(path)
+    except Exception:
+        date = None
+    return digest, date
+
+
+@dataclass
+class XmlChoice:
+    """
+    Round Xml file chosen from the discovered candidates.
+
+    Attributes
+    ----------
+    path : str
+        File to parse, None if there were no candidates.
+    distinct : list
+        One path per distinct content, the chosen file first.
+    duplicates : dict
+        Paths collapsed as byte-identical copies, by the path kept.
+    """
+    path: str = None
+    distinct: list = field(default_factory=list)
+    duplicates: dict = field(default_factory=dict)
+
+    @property
+    def conflict(self) -> bool:
+        """True if the candidates have different content."""
+        return len(self.distinct) > 1
+
+
+class FingerprintCache:
+
+    def __init__(self, db_path: str = None):
+        """
+        Content hash and header Date of Xml files, recomputed only when a
+        file's size or modification time changes.
+
+        Attributes
+        ----------
+        db_path : str
+            SQLite database file. Defaults to the tool's cache folder.
+        hashed : int
+            Files read since the cache was opened.
+
+        Methods
+        -------
+        fingerprint(path:str)
+            (digest, header date) of a file.
+        """
+        self.db_path = db_path or default_db_path()
+        # Batch worker processes share the database
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self.hashed = 0
+
+    def fingerprint(self, path: str) -> tuple:
+        """(MD5 hex digest, header Date value) of a file, from the cache if unchanged."""
+        info = os.stat(path)
+        path = os.path.abspath(path)
+        row = self.conn.execute("SELECT digest, date FROM fingerprints "
+                                "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                (path, info.st_size, info.st_mtime_ns)).fetchone()
+        if row is not None:
+            return row
+        digest, date = fingerprint(path, info.st_size)
+        self.hashed += 1
+        try:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO fingerprints "
+                                  "(path, size, mtime_ns, digest, date) VALUES (?, ?, ?, ?, ?)",
+                                  (path, info.st_size, info.st_mtime_ns, digest, date))
+        except sqlite3.Error as error:
+            # Still locked by another process after the timeout, read it again next time
+            print(f"Unable to cache the fingerprint of {path}: {error}")
+        return digest, date
+
+    def close(self):
+        self.conn.close()
+
+
+def choose_xml(matches: list, cache: FingerprintCache = None) -> XmlChoice:
+    """
+    Choose the round Xml file from discover_xmls matches. Byte-identical files
+    are collapsed onto the first by path. Of files with different content the
+    one with the latest header Date is chosen, files without a readable date
+    last and the first by path on a tie, so the choice does not depend on the
+    folder listing order.
+
+    Parameters
+    ----------
+    matches : list
+        Candidate file paths.
+    cache : FingerprintCache, optional
+        Opened and closed here if not given and there is more than one match.
+
+    Returns
+    -------
+    XmlChoice
+    """
+    matches = sorted(matches)
+    if len(matches) < 2:
+        return XmlChoice(matches[0] if matches else None, matches)
+
+    own_cache = cache is None
+    try:
+        if own_cache:
+            cache = FingerprintCache()
+        read = cache.fingerprint
+    except sqlite3.Error as error:
+        print(f"Xml fingerprint cache unavailable: {error}")
+        read = lambda path: fingerprint(path, os.path.getsize(path))
+    fingerprints = {}
+    try:
+        for path in matches:
+            try:
+                fingerprints[path] = read(path)
+            except OSError:
+                # Unreadable now, parsing it will report the error
+                fingerprints[path] = (path, None)
+    finally:
+        if own_cache and cache is not None:
+            cache.close()
+
+    kept = {}
+    duplicates = {}
+    for path in matches:
+        digest = fingerprints[path][0]
+        if digest in kept:
+            duplicates.setdefault(kept[digest], []).append(path)
+        else:
+            kept[digest] = path
+
+    def latest_first(path):
+        date = parse_header_date(fingerprints[path][1])
+        return (date != date, -date.value if date == date else 0, path)
+
+    distinct = sorted(kept.values(), key=latest_first)
+    return XmlChoice(distinct[0], distinct, duplicates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Show which round Xml files of a flange folder would be used.")
+    parser.add_argument("flange_path", help="Flange folder with the round Xml files.")
+    parser.add_argument("--db", default=None, help="Fingerprint database. Defaults to the cache folder.")
+    args = parser.parse_args()
+
+    cache = FingerprintCache(args.db)
+    for keyphrase in ("first", "second"):
+        choice = choose_xml(discover_xmls(args.flange_path, keyphrase), cache)
+        print(f"{keyphrase}: {choice.path}")
+        for path in choice.distinct[1:]:
+            print(f"  conflicting, not used: {path}")
+        for kept, copies in choice.duplicates.items():
+            for path in copies:
+                print(f"  identical to {os.path.basename(kept)}: {path}")
+    print(f"{cache.hashed} files read")
+    cache.close()